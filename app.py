@@ -7,13 +7,17 @@ import os
 
 # --- 경로 설정 및 모듈 import ---
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from persistence import init_db, get_all_projects, create_project, delete_project, update_project
+from persistence import (init_db, start_maintenance, get_project_page, count_projects, create_project, delete_project, update_project,
+                         DASHBOARD_STAGES, PROJECT_PAGE_SIZE)
+from generation_jobs import start_job_runner
 
 # --- 페이지 기본 설정 ---
 st.set_page_config(page_title="대시보드 - AI 관리 지원 도구", page_icon="🚀", layout="wide")
 
 # --- 앱 초기화 ---
 init_db()
+start_maintenance()  # 공간 회수 및 (MCP_RETENTION_ENABLED=1일 때) 보존 정책 적용 (프로세스당 한 번만 시작됨)
+start_job_runner()  # 백그라운드 생성 작업 실행 (재시작 전에 남은 작업도 이어서 실행)
 
 # --- session_state 관리 ---
 if 'editing_project' not in st.session_state:
@@ -24,6 +28,47 @@ if 'selected_project_name' not in st.session_state:
     st.session_state.selected_project_name = None
 if 'show_create_dialog' not in st.session_state:
     st.session_state.show_create_dialog = False
+if 'project_cursors' not in st.session_state:
+    st.session_state.project_cursors = [None]  # 프로젝트 목록 페이지별 keyset 커서 스택 (첫 페이지는 None)
+if 'project_table_version' not in st.session_state:
+    st.session_state.project_table_version = 0  # 바뀌면 목록 테이블의 행 선택이 초기화됨
+
+# 대시보드 진행 현황 열에 표시할 단계 이름 (DASHBOARD_STAGES 순서)
+STAGE_LABELS = {
+    "PROBLEM_DEF": "문제정의",
+    "MODEL_DESIGN": "설계",
+    "TEST_CASE": "테스트",
+    "PERF_REPORT": "성능",
+    "GOV_REPORT": "거버넌스",
+}
+
+# 프로젝트 목록 정렬 옵션 → (정렬 기준, 내림차순 여부)
+SORT_OPTIONS = {
+    "최근 생성순": ("created_at", True),
+    "오래된 생성순": ("created_at", False),
+    "이름순": ("name", False),
+    "이름 역순": ("name", True),
+}
+
+def format_datetime(value):
+    try:
+        return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M')
+    except (ValueError, TypeError):
+        return value
+
+def reset_project_table():
+    """검색어나 정렬이 바뀌면 첫 페이지로 돌아가고 행 선택을 해제합니다."""
+    st.session_state.project_cursors = [None]
+    st.session_state.project_table_version += 1
+
+def format_stage_status(stages):
+    """단계별 산출물 존재 여부를 '✅ 문제정의(2) · ⬜ 설계 ...' 형태의 한 줄로 만듭니다."""
+    parts = []
+    for stage_type in DASHBOARD_STAGES:
+        info = stages.get(stage_type)
+        label = STAGE_LABELS.get(stage_type, stage_type)
+        parts.append(f"✅ {label}({info['count']})" if info else f"⬜ {label}")
+    return " · ".join(parts)
 
 # --- 다이얼로그 함수 정의 ---
 @st.dialog("새 프로젝트 생성")
@@ -72,7 +117,7 @@ with st.sidebar:
                 st.rerun()
     # 생성 모드가 아닐 때의 안내 메시지
     else:
-        st.info("프로젝트를 수정하려면 목록에서 '수정' 버튼을 클릭하세요.")
+        st.info("프로젝트를 수정하려면 목록에서 행을 선택한 뒤 '수정' 버튼을 클릭하세요.")
 
 # --- 메인 콘텐츠: 프로젝트 목록 및 관리 ---
 col1, col2 = st.columns([3, 1])
@@ -90,49 +135,83 @@ if st.session_state.show_create_dialog:
 if st.session_state.selected_project_id:
     st.info(f"현재 작업 중인 프로젝트: **{st.session_state.selected_project_name}** (ID: {st.session_state.selected_project_id})")
 else:
-    st.info("작업할 프로젝트를 아래 목록에서 '선택' 버튼을 눌러 지정해주세요.")
+    st.info("작업할 프로젝트를 아래 목록에서 행을 선택한 뒤 '작업 대상으로 선택' 버튼을 눌러 지정해주세요.")
 st.divider()
 
 # --- 프로젝트 목록 테이블 ---
-projects = get_all_projects()
-if not projects:
-    st.info("생성된 프로젝트가 없습니다. '새 프로젝트 생성' 버튼을 클릭하여 시작하세요.")
+# 한 페이지(PROJECT_PAGE_SIZE개)만 조회해 하나의 st.dataframe으로 그리므로, 전체 프로젝트 수와 관계없이
+# 쿼리 비용과 위젯 수가 일정합니다. 선택/수정/삭제는 테이블에서 선택한 행에 적용됩니다.
+col_search, col_sort = st.columns([3, 1])
+search = col_search.text_input("프로젝트 검색", placeholder="🔍 프로젝트 이름 또는 설명으로 검색", key="project_search",
+                               on_change=reset_project_table, label_visibility="collapsed")
+sort_label = col_sort.selectbox("정렬", list(SORT_OPTIONS), key="project_sort", on_change=reset_project_table,
+                                label_visibility="collapsed")
+sort, descending = SORT_OPTIONS[sort_label]
+
+total = count_projects(search)
+if total == 0:
+    if search.strip():
+        st.info("검색어와 일치하는 프로젝트가 없습니다.")
+    else:
+        st.info("생성된 프로젝트가 없습니다. '새 프로젝트 생성' 버튼을 클릭하여 시작하세요.")
 else:
-    header_cols = st.columns([1, 3, 4, 2, 3])
-    header_cols[0].write("**ID**")
-    header_cols[1].write("**이름**")
-    header_cols[2].write("**설명**")
-    header_cols[3].write("**생성일**")
-    header_cols[4].write("**관리**")
-    
-    for proj in projects:
-        row_cols = st.columns([1, 3, 4, 2, 3])
-        row_cols[0].write(proj['id'])
-        row_cols[1].write(proj['name'])
-        row_cols[2].write(proj['description'])
-        try:
-            dt_object = datetime.fromisoformat(proj['created_at'])
-            row_cols[3].write(dt_object.strftime('%Y-%m-%d %H:%M'))
-        except (ValueError, TypeError):
-            row_cols[3].write(proj['created_at'])
-        
-        with row_cols[4]:
-            manage_cols = st.columns(3)
-            is_selected = (st.session_state.selected_project_id == proj['id'])
-            
-            if manage_cols[0].button("✓" if is_selected else "선택", key=f"select_{proj['id']}", type="primary" if is_selected else "secondary", help="이 프로젝트를 작업 대상으로 선택합니다."):
-                st.session_state.selected_project_id = proj['id']
-                st.session_state.selected_project_name = proj['name']
-                st.rerun()
+    cursors = st.session_state.project_cursors
+    page_index = len(cursors) - 1
+    projects, next_cursor = get_project_page(search, sort, descending, PROJECT_PAGE_SIZE, cursors[-1])
+    if not projects and page_index > 0:
+        # 마지막 페이지의 프로젝트가 모두 삭제된 경우 이전 페이지로
+        cursors.pop()
+        st.rerun()
 
-            if manage_cols[1].button("수정", key=f"edit_{proj['id']}"):
-                st.session_state.editing_project = proj
-                st.rerun()
-            
-            if manage_cols[2].button("삭제", key=f"delete_{proj['id']}"):
-                delete_project(proj['id'])
-                st.toast(f"프로젝트 '{proj['name']}'가 삭제되었습니다.")
-                if st.session_state.selected_project_id == proj['id']:
-                    st.session_state.selected_project_id = None
-                    st.session_state.selected_project_name = None
-                st.rerun()
+    table = {
+        "작업 중": ["✓" if proj['id'] == st.session_state.selected_project_id else "" for proj in projects],
+        "ID": [proj['id'] for proj in projects],
+        "이름": [proj['name'] for proj in projects],
+        "설명": [proj['description'] for proj in projects],
+        "생성일": [format_datetime(proj['created_at']) for proj in projects],
+        "진행 현황": [format_stage_status(proj['stages']) for proj in projects],
+        "최근 활동": [format_datetime(proj['last_activity']) for proj in projects],
+    }
+    event = st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"project_table_{st.session_state.project_table_version}_{page_index}",
+        column_config={
+            "작업 중": st.column_config.TextColumn(width="small"),
+            "ID": st.column_config.NumberColumn(width="small", format="%d"),
+            "진행 현황": st.column_config.TextColumn(width="large"),
+        },
+    )
+    selected_rows = event.selection.rows
+    proj = projects[selected_rows[0]] if selected_rows and selected_rows[0] < len(projects) else None
+
+    col_select, col_edit, col_delete = st.columns(3)
+    if col_select.button("✓ 작업 대상으로 선택", type="primary", disabled=proj is None, use_container_width=True,
+                         help="선택한 프로젝트를 작업 대상으로 지정합니다."):
+        st.session_state.selected_project_id = proj['id']
+        st.session_state.selected_project_name = proj['name']
+        st.rerun()
+    if col_edit.button("수정", disabled=proj is None, use_container_width=True):
+        st.session_state.editing_project = proj
+        st.rerun()
+    if col_delete.button("삭제", disabled=proj is None, use_container_width=True):
+        delete_project(proj['id'])
+        st.toast(f"프로젝트 '{proj['name']}'가 삭제되었습니다.")
+        if st.session_state.selected_project_id == proj['id']:
+            st.session_state.selected_project_id = None
+            st.session_state.selected_project_name = None
+        st.session_state.project_table_version += 1
+        st.rerun()
+
+    offset = page_index * PROJECT_PAGE_SIZE
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    if col_prev.button("◀ 이전", key="project_page_prev", disabled=page_index == 0, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    col_info.caption(f"전체 {total}개 프로젝트 중 {offset + 1}–{offset + len(projects)}")
+    if col_next.button("다음 ▶", key="project_page_next", disabled=next_cursor is None, use_container_width=True):
+        cursors.append(next_cursor)
+        st.rerun()
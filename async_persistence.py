@@ -0,0 +1,95 @@
+# async_persistence.py (persistence.py의 asyncio용 API)
+#
+# 모든 호출은 DB 전용 스레드 하나에서 순서대로 실행됩니다. 이 스레드가 자신의 풀링된 커넥션을
+# 소유하므로 이벤트 루프는 SQLite I/O로 막히지 않고, 여러 코루틴의 읽기/쓰기는 제출 순서대로 처리됩니다.
+# 예) 백그라운드 작업에서 여러 LLM 생성 결과를 동시에 저장할 때:
+#     await asyncio.gather(*(async_save_artifact(pid, "DESIGN", "MODEL_DESIGN", text) for text in texts))
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import persistence
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-db")
+        return _executor
+
+def shutdown_db_executor(wait=True):
+    """DB 전용 스레드를 종료합니다. 이후 호출 시 새 스레드가 다시 만들어집니다."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        if wait:
+            executor.submit(persistence.close_all_connections).result()
+        executor.shutdown(wait=wait)
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """동기 함수를 DB 전용 스레드에서 실행하고 결과를 기다립니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+# --- persistence.py 함수 미러 ---
+# 테스트/벤치마크에서 persistence.DB_PATH 등을 바꿔도 반영되도록 호출 시점에 모듈 속성을 조회합니다.
+
+async def async_init_db():
+    return await run_in_db_thread(persistence.init_db)
+
+async def async_get_all_projects():
+    return await run_in_db_thread(persistence.get_all_projects)
+
+async def async_create_project(name, description):
+    return await run_in_db_thread(persistence.create_project, name, description)
+
+async def async_update_project(project_id, name, description):
+    return await run_in_db_thread(persistence.update_project, project_id, name, description)
+
+async def async_delete_project(project_id):
+    return await run_in_db_thread(persistence.delete_project, project_id)
+
+async def async_save_artifact(project_id, stage, type, content):
+    return await run_in_db_thread(persistence.save_artifact, project_id, stage, type, content)
+
+async def async_get_artifacts_for_project(project_id, type):
+    return await run_in_db_thread(persistence.get_artifacts_for_project, project_id, type)
+
+async def async_get_latest_artifact(project_id, type):
+    return await run_in_db_thread(persistence.get_latest_artifact, project_id, type)
+
+async def async_get_project_snapshot(project_id, types):
+    return await run_in_db_thread(persistence.get_project_snapshot, project_id, types)
+
+async def async_count_artifacts(project_id, type):
+    return await run_in_db_thread(persistence.count_artifacts, project_id, type)
+
+async def async_get_artifact_history(project_id, type, limit=persistence.HISTORY_PAGE_SIZE, cursor=None):
+    return await run_in_db_thread(persistence.get_artifact_history, project_id, type, limit=limit, cursor=cursor)
+
+async def async_get_artifact_content(artifact_id):
+    return await run_in_db_thread(persistence.get_artifact_content, artifact_id)
+
+async def async_export_projects(path, project_ids=None):
+    return await run_in_db_thread(persistence.export_projects, path, project_ids)
+
+async def async_import_projects(path):
+    return await run_in_db_thread(persistence.import_projects, path)
+
+async def async_search_artifacts(query, type=None, project_id=None, limit=50):
+    return await run_in_db_thread(persistence.search_artifacts, query, type=type, project_id=project_id, limit=limit)
+
+async def async_artifact_contains_any(artifact_id, terms):
+    return await run_in_db_thread(persistence.artifact_contains_any, artifact_id, terms)
+
+async def async_get_content_summary(content, token_budget):
+    return await run_in_db_thread(persistence.get_content_summary, content, token_budget)
+
+async def async_save_content_summary(content, token_budget, summary):
+    return await run_in_db_thread(persistence.save_content_summary, content, token_budget, summary)
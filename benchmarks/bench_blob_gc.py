@@ -0,0 +1,130 @@
+# benchmarks/bench_blob_gc.py
+#
+# 프로젝트 삭제·보존 정책 적용 후의 blob 정리(_collect_garbage_blobs)를 확인하고 쓰기 잠금 시간을 측정합니다.
+#   1) 정확성: 프로젝트 삭제와 보존 정책 적용을 섞어 반복한 뒤마다, 남은 blob이 전체 재귀 CTE로 구한 '살아 있는 blob'과
+#      정확히 같음 (지워야 할 것이 남지 않고, 다른 프로젝트가 공유하는 본문이나 델타 기준은 지우지 않음).
+#      남은 산출물은 모두 원래 본문으로 복원됨
+#   2) 비용: 프로젝트 하나를 삭제하는 쓰기 트랜잭션 안에서 blob 정리에 걸린 시간. 기존 방식(전체 blob을 훑는 CTE)과 비교
+# 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/bench_blob_gc.py [--versions 20000] [--projects 200] [--deletes 20]
+
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import persistence
+from bench_storage import synthetic_history
+
+LIVE_BLOBS = """
+WITH RECURSIVE live(hash) AS (
+    SELECT content_hash FROM artifacts WHERE content_hash IS NOT NULL
+    UNION
+    SELECT b.base_hash FROM artifact_blobs b JOIN live ON b.hash = live.hash
+    WHERE b.base_hash IS NOT NULL
+)
+"""
+
+def full_scan_gc(conn):
+    """이전 구현: 전체 산출물과 blob 체인을 훑어 참조되지 않는 blob을 삭제."""
+    conn.execute(LIVE_BLOBS + "DELETE FROM artifact_blobs WHERE hash NOT IN (SELECT hash FROM live)")
+    conn.execute("DELETE FROM artifact_summaries WHERE content_hash NOT IN (SELECT hash FROM artifact_blobs)")
+
+def seed(num_versions, num_projects):
+    """프로젝트마다 델타 체인이 생기도록 이력을 넣고, 일부 버전은 다른 프로젝트의 본문을 그대로 재사용합니다."""
+    rng = random.Random(7)
+    started = datetime(2024, 1, 1)
+    texts = {}
+    with persistence.transaction() as conn:
+        ids = [conn.execute("INSERT INTO projects (name, description, created_at) VALUES (?, '', ?)",
+                            (f"p{i}", started.isoformat())).lastrowid for i in range(num_projects)]
+        saved = []
+        for n, (stream, content) in enumerate(synthetic_history(num_versions, num_projects)):
+            if saved and rng.random() < 0.05:
+                content = rng.choice(saved)   # 다른 프로젝트와 공유하는 본문
+            created_at = (started + timedelta(minutes=n)).isoformat()
+            persistence._insert_artifact(conn, ids[stream], "DESIGN", "MODEL_DESIGN", content, created_at)
+            texts[hashlib.sha256(content.encode("utf-8")).hexdigest()] = content
+            saved.append(content)
+            if len(saved) > 200:
+                saved.pop(0)
+        # 요약 캐시도 일부 넣어 blob과 함께 정리되는지 확인
+        for content_hash in list(texts)[::50]:
+            conn.execute("INSERT INTO artifact_summaries VALUES (?, 6000, '요약', ?)", (content_hash, started.isoformat()))
+    persistence.invalidate_read_cache()
+    return ids, texts
+
+def check_consistent(texts, restore=False):
+    conn = persistence.get_connection()
+    blobs = {row[0] for row in conn.execute("SELECT hash FROM artifact_blobs")}
+    live = {row[0] for row in conn.execute(LIVE_BLOBS + "SELECT hash FROM live")}
+    assert blobs == live, f"남은 blob {len(blobs - live)}개, 지워진 살아 있는 blob {len(live - blobs)}개"
+    orphan_summaries = conn.execute(
+        "SELECT COUNT(*) FROM artifact_summaries WHERE content_hash NOT IN (SELECT hash FROM artifact_blobs)").fetchone()[0]
+    assert orphan_summaries == 0, orphan_summaries
+    if restore:
+        persistence._content_cache.clear()
+        for row in conn.execute("SELECT DISTINCT content_hash FROM artifacts").fetchall():
+            assert persistence._load_content(conn, row[0]) == texts[row[0]], row[0]
+    return len(blobs)
+
+def timed_delete(project_id, gc):
+    """프로젝트 하나를 삭제하는 트랜잭션에서 blob 정리에 걸린 시간(ms)."""
+    with persistence.transaction() as conn:
+        hashes = [row[0] for row in conn.execute(
+            "SELECT DISTINCT content_hash FROM artifacts WHERE project_id = ?", (project_id,))]
+        conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+        started = time.perf_counter()
+        gc(conn, hashes)
+        elapsed = (time.perf_counter() - started) * 1000
+    persistence.invalidate_read_cache()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--versions", type=int, default=20000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--deletes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence.DB_PATH = os.path.join(tmp, "mcp.db")
+        persistence.ARCHIVE_PATH = os.path.join(tmp, "archive.jsonl.gz")
+        persistence.init_db()
+        ids, texts = seed(args.versions, args.projects)
+        blobs = check_consistent(texts)
+        print(f"seeded {args.versions} versions in {args.projects} projects, {blobs} blobs")
+
+        # 1) 같은 DB에서 번갈아 삭제하며 blob 정리 시간 비교 (프로젝트 삭제 자체와 FTS 트리거 비용은 제외)
+        rng = random.Random(11)
+        victims = rng.sample(ids, args.deletes * 3)
+        new_ms, old_ms = [], []
+        for n in range(args.deletes):
+            new_ms.append(timed_delete(victims[2 * n], persistence._collect_garbage_blobs))
+            old_ms.append(timed_delete(victims[2 * n + 1], lambda conn, hashes: full_scan_gc(conn)))
+            check_consistent(texts)
+        print(f"[gc cost] blob cleanup inside the delete transaction, median: candidate-based "
+              f"{statistics.median(new_ms):.2f} ms, full scan {statistics.median(old_ms):.2f} ms")
+
+        # 2) delete_project와 보존 정책 적용을 섞어 반복
+        for n in range(args.deletes):
+            persistence.delete_project(victims[2 * args.deletes + n])
+            if n % 5 == 4:
+                archived = persistence.apply_retention(policies={"MODEL_DESIGN": {"keep_last": 40 - n, "keep_monthly": False}})
+                assert archived > 0
+            blobs = check_consistent(texts)
+        check_consistent(texts, restore=True)
+        print(f"[correct] {args.deletes} deletes + {args.deletes // 5} retention runs: blobs == live set ({blobs} left), "
+              f"all contents restore")
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_cold_start.py
+#
+# 새 프로세스(오토스케일로 막 뜬 레플리카)의 콜드 스타트 비용을 측정합니다. 측정마다 새 파이썬 프로세스를 띄웁니다.
+#   1) 모듈 임포트 시간: 페이지들이 임포트하는 모듈별 소요 시간과, 그 결과 함께 로드된 무거운 패키지
+#   2) 첫 렌더링 시간: Streamlit AppTest로 각 페이지를 처음 실행한 시간과 바로 이어서 rerun한 시간
+#      (가짜 LLM 백엔드 사용. 빈 임시 디렉터리에서 실행하므로 DB 파일들은 그 아래 database/에 새로 만들어짐.
+#       성능 검증 페이지는 차트가 그려지는 상태로 실행)
+# 결과는 --repeat회 측정의 중앙값입니다.
+#
+# 실행: python benchmarks/bench_cold_start.py [--repeat 3] [--json]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["streamlit", "persistence", "llm_telemetry", "gemini_agent", "generation_jobs", "job_view"]
+HEAVY_PACKAGES = ["google.generativeai", "pandas", "matplotlib"]
+PAGES = [
+    "app.py",
+    "pages/2_문제정의.py",
+    "pages/3_모델_설계.py",
+    "pages/4_모델_구현.py",
+    "pages/5_성능_검증.py",
+    "pages/6_거버넌스_검토.py",
+]
+
+def _loaded_heavy():
+    return [name for name in HEAVY_PACKAGES if name in sys.modules]
+
+def child_import(module):
+    """module 하나를 임포트하는 데 걸린 시간과 함께 로드된 무거운 패키지."""
+    started = time.perf_counter()
+    __import__(module)
+    return {"ms": (time.perf_counter() - started) * 1000, "heavy": _loaded_heavy()}
+
+def child_render(page):
+    """
+    프로젝트와 산출물을 만든 뒤 page를 AppTest로 두 번 실행합니다. (현재 디렉터리는 빈 임시 디렉터리)
+    페이지가 임포트하는 모듈은 첫 실행 시간에 포함되도록 persistence 외에는 미리 임포트하지 않습니다.
+    """
+    import persistence
+    from streamlit.testing.v1 import AppTest
+
+    persistence.init_db()
+    persistence.create_project("cold-start", "콜드 스타트 측정")
+    project_id = persistence.get_all_projects()[0]["id"]
+    for type in ("MCP_YAML", "PROBLEM_DEF", "MODEL_DESIGN", "TEST_CASE", "PERF_REPORT"):
+        persistence.save_artifact(project_id, "bench", type, f"# {type}\n\n" + "본문 " * 300)
+    heavy_before = _loaded_heavy()
+
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=60)
+    at.session_state["selected_project_id"] = project_id
+    at.session_state["selected_project_name"] = "cold-start"
+    if page.startswith("pages/5_"):
+        at.session_state["generated_perf_report"] = "# 성능 평가 리포트"
+        at.session_state["current_perf_metrics"] = {"Accuracy": 0.95, "F1": 0.91}
+    started = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - started) * 1000
+    assert not at.exception, at.exception
+    started = time.perf_counter()
+    at.run()
+    rerun_ms = (time.perf_counter() - started) * 1000
+    return {"first_ms": first_ms, "rerun_ms": rerun_ms,
+            "heavy": [name for name in _loaded_heavy() if name not in heavy_before]}
+
+def run_child(kind, target):
+    env = dict(os.environ, LLM_BACKEND="fake", PYTHONWARNINGS="ignore")
+    with tempfile.TemporaryDirectory() as tmp:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", kind, target],
+                                cwd=ROOT if kind == "import" else tmp, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def median_of(results, key):
+    return statistics.median(r[key] for r in results)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 한 줄로도 출력 (추이 기록용)")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        kind, target = args.child
+        print(json.dumps(child_import(target) if kind == "import" else child_render(target), ensure_ascii=False))
+        return
+
+    report = {"imports": {}, "pages": {}}
+    print(f"{'module':<20} {'import ms':>10}  heavy packages loaded")
+    for module in MODULES:
+        results = [run_child("import", module) for _ in range(args.repeat)]
+        report["imports"][module] = {"ms": median_of(results, "ms"), "heavy": results[0]["heavy"]}
+        print(f"{module:<20} {report['imports'][module]['ms']:>10.0f}  {', '.join(results[0]['heavy']) or '-'}")
+
+    print(f"\n{'page':<28} {'first render ms':>16} {'rerun ms':>9}  heavy packages loaded")
+    for page in PAGES:
+        results = [run_child("render", page) for _ in range(args.repeat)]
+        report["pages"][page] = {"first_ms": median_of(results, "first_ms"), "rerun_ms": median_of(results, "rerun_ms"),
+                                 "heavy": results[0]["heavy"]}
+        row = report["pages"][page]
+        print(f"{page:<28} {row['first_ms']:>16.0f} {row['rerun_ms']:>9.0f}  {', '.join(row['heavy']) or '-'}")
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
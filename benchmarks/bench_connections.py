@@ -0,0 +1,111 @@
+# benchmarks/bench_connections.py
+#
+# 동시 읽기/쓰기 스트레스 테스트: 호출마다 connect/close 하던 기존 방식과
+# persistence.py의 풀링된 WAL 커넥션 관리자의 처리량을 비교합니다.
+#
+# 실행: python benchmarks/bench_connections.py [--readers 8] [--writers 4] [--seconds 5]
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import persistence
+
+CONTENT = "### 1. 문제 배경\n" + ("수작업 처리로 인한 응답 시간 지연. " * 40)
+
+# --- 기존 방식 (호출마다 connect, 기본 rollback journal) ---
+def legacy_save(db_path, project_id):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO artifacts (project_id, stage, type, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                   (project_id, "REQUIREMENT", "PROBLEM_DEF", CONTENT, datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+def legacy_read(db_path, project_id):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT content, created_at FROM artifacts WHERE project_id = ? AND type = ? ORDER BY created_at DESC LIMIT 20",
+                   (project_id, "PROBLEM_DEF"))
+    rows = [dict(r) for r in cursor.fetchall()]
+    conn.close()
+    return rows
+
+# --- 풀링된 방식 ---
+def pooled_save(db_path, project_id):
+    persistence.save_artifact(project_id, "REQUIREMENT", "PROBLEM_DEF", CONTENT)
+
+def pooled_read(db_path, project_id):
+    conn = persistence.get_connection()
+    return conn.execute("SELECT content, created_at FROM artifacts WHERE project_id = ? AND type = ? ORDER BY created_at DESC LIMIT 20",
+                        (project_id, "PROBLEM_DEF")).fetchall()
+
+def run(label, db_path, save_fn, read_fn, readers, writers, seconds):
+    counts = {"read": 0, "write": 0, "error": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker(fn, kind):
+        local = 0
+        errors = 0
+        while time.perf_counter() < stop:
+            try:
+                fn(db_path, 1)
+                local += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            counts[kind] += local
+            counts["error"] += errors
+
+    threads = [threading.Thread(target=worker, args=(read_fn, "read")) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(save_fn, "write")) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    total = counts["read"] + counts["write"]
+    print(f"[{label}] reads={counts['read']} writes={counts['write']} errors={counts['error']} "
+          f"-> {total / seconds:,.0f} ops/s ({counts['write'] / seconds:,.0f} writes/s)")
+    return total / seconds
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 기존 방식은 별도 DB 파일(rollback journal)에서 측정
+        legacy_db = os.path.join(tmp, "legacy.db")
+        persistence.DB_PATH = legacy_db
+        persistence.init_db()
+        persistence.create_project("bench", "")
+        persistence.close_all_connections()
+        conn = sqlite3.connect(legacy_db)
+        conn.execute("PRAGMA journal_mode = DELETE;")
+        conn.close()
+        legacy = run("connect-per-call", legacy_db, legacy_save, legacy_read,
+                     args.readers, args.writers, args.seconds)
+
+        pooled_db = os.path.join(tmp, "pooled.db")
+        persistence.DB_PATH = pooled_db
+        persistence.init_db()
+        persistence.create_project("bench", "")
+        pooled = run("pooled WAL", pooled_db, pooled_save, pooled_read,
+                     args.readers, args.writers, args.seconds)
+        persistence.close_all_connections()
+
+    print(f"speedup: x{pooled / legacy:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_dashboard.py
+#
+# 프로젝트 수에 따른 대시보드(app.py) 렌더링 시간을 Streamlit AppTest로 측정합니다.
+# 프로젝트 수마다 새 임시 DB를 만들고, 프로젝트의 절반에는 단계별 산출물을 하나씩 넣습니다.
+#   - first: 첫 실행 (모듈 임포트 제외를 위해 측정 전에 한 번 실행해 둔 뒤, 새 AppTest로 측정)
+#   - rerun: 데이터가 바뀌지 않은 rerun (조회 결과 캐시 사용)
+#   - rerun (cold): 조회 결과 캐시를 비운 뒤의 rerun (목록 쿼리 비용 포함)
+#   - elements: 화면에 그려진 버튼 수와 테이블 행 수
+#
+# 실행: python benchmarks/bench_dashboard.py [--projects 100 1000 5000] [--repeat 5]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.environ.setdefault("LLM_BACKEND", "fake")
+import persistence
+import generation_jobs
+import llm_cache
+import llm_telemetry
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(ROOT, "app.py")
+
+def seed(num_projects):
+    """프로젝트 num_projects개를 한 트랜잭션으로 만들고, 절반에는 DASHBOARD_STAGES 산출물을 하나씩 넣습니다."""
+    started = datetime(2024, 1, 1)
+    with persistence.transaction() as conn:
+        for i in range(num_projects):
+            created_at = (started + timedelta(minutes=i)).isoformat()
+            project_id = conn.execute("INSERT INTO projects (name, description, created_at) VALUES (?, ?, ?)",
+                                      (f"프로젝트 {i:05d}", f"벤치마크용 프로젝트 {i}", created_at)).lastrowid
+            if i % 2 == 0:
+                for type in persistence.DASHBOARD_STAGES:
+                    persistence._insert_artifact(conn, project_id, "bench", type, f"{type} {i}", created_at)
+    persistence.invalidate_read_cache()  # 모듈 밖에서 직접 넣었으므로
+
+def timed_run(at):
+    started = time.perf_counter()
+    at.run(timeout=120)
+    assert not at.exception, at.exception
+    return (time.perf_counter() - started) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # 작업 큐, 호출 기록 DB는 측정 내내 같은 파일을 사용 (작업 스레드가 시작될 때의 경로를 계속 씀)
+    shared_tmp = tempfile.TemporaryDirectory()
+    llm_cache.CACHE_DB_PATH = os.path.join(shared_tmp.name, "llm_cache.db")
+    llm_telemetry.TELEMETRY_DB_PATH = os.path.join(shared_tmp.name, "llm_telemetry.db")
+    generation_jobs.JOBS_DB_PATH = os.path.join(shared_tmp.name, "generation_jobs.db")
+
+    print(f"{'projects':>8} {'first ms':>9} {'rerun ms':>9} {'rerun (cold) ms':>16} {'buttons':>8} {'table rows':>11}")
+    for num_projects in args.projects:
+        with tempfile.TemporaryDirectory() as tmp:
+            persistence.DB_PATH = os.path.join(tmp, "mcp.db")
+            persistence.ARCHIVE_PATH = os.path.join(tmp, "archive.jsonl.gz")
+            persistence.init_db()
+            seed(num_projects)
+            AppTest.from_file(APP).run(timeout=120)  # 페이지 모듈 임포트와 스키마 초기화를 측정에서 제외
+
+            firsts, reruns, colds = [], [], []
+            for _ in range(args.repeat):
+                persistence.invalidate_read_cache()
+                at = AppTest.from_file(APP)
+                firsts.append(timed_run(at))
+                reruns.append(timed_run(at))
+                persistence.invalidate_read_cache()
+                colds.append(timed_run(at))
+            rows = len(at.dataframe[0].value) if len(at.dataframe) else 0
+            print(f"{num_projects:>8} {statistics.median(firsts):>9.0f} {statistics.median(reruns):>9.0f} "
+                  f"{statistics.median(colds):>16.0f} {len(at.button):>8} {rows:>11}")
+
+if __name__ == "__main__":
+    main()
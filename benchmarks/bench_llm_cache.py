@@ -0,0 +1,116 @@
+# benchmarks/bench_llm_cache.py
+#
+# LLM 응답 캐시 조회가 쓰기 잠금 없이 동작하는지 측정하고, 모아 둔 사용 시각 갱신으로도 LRU가 맞는지 확인합니다.
+#   1) 조회 처리량: 여러 스레드가 같은 키들을 반복 조회할 때의 조회 수/초와, 그동안 연 쓰기 트랜잭션 수
+#   2) 쓰기 잠금 중 조회: 다른 커넥션이 쓰기 트랜잭션을 --hold-ms 동안 잡고 있어도 조회가 기다리지 않음
+#   3) LRU: 갱신 간격이 지난 뒤 다시 사용한 항목은, 저장 때 용량 초과로 제거되는 대상에서 빠짐
+# 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/bench_llm_cache.py [--keys 200] [--threads 8] [--lookups 2000] [--hold-ms 300]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import llm_cache
+import persistence
+
+write_transactions = []
+
+def count_write_transactions():
+    transaction = persistence.transaction
+    def counted(db_path=None):
+        write_transactions.append(db_path)
+        return transaction(db_path)
+    llm_cache.transaction = counted
+
+def seed(num_keys, size=2000):
+    keys = [llm_cache.make_cache_key("bench", f"프롬프트 {n}") for n in range(num_keys)]
+    for key in keys:
+        llm_cache.store_response(key, "bench", "응" * size)
+    return keys
+
+def check_throughput(keys, num_threads, lookups):
+    write_transactions.clear()
+    errors = []
+    def reader(offset):
+        try:
+            for i in range(lookups):
+                assert llm_cache.get_cached_response(keys[(offset + i) % len(keys)]) is not None
+        except Exception as e:
+            errors.append(repr(e))
+    threads = [threading.Thread(target=reader, args=(n * 7,)) for n in range(num_threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    assert not errors, errors[:3]
+    total = num_threads * lookups
+    print(f"[lookups] {total} hits on {num_threads} threads in {elapsed * 1000:.0f} ms ({total / elapsed:.0f}/s), "
+          f"write transactions {len(write_transactions)}")
+    assert len(write_transactions) == 0, "최근 사용한 항목 조회가 쓰기 트랜잭션을 열었음"
+
+def check_lookup_during_write(keys, hold_ms):
+    holding = threading.Event()
+    def writer():
+        conn = persistence.get_connection(llm_cache.CACHE_DB_PATH)
+        conn.execute("BEGIN IMMEDIATE")
+        holding.set()
+        time.sleep(hold_ms / 1000)
+        conn.execute("COMMIT")
+    t = threading.Thread(target=writer)
+    t.start()
+    holding.wait()
+    started = time.perf_counter()
+    for key in keys[:50]:
+        assert llm_cache.get_cached_response(key) is not None
+    elapsed = (time.perf_counter() - started) * 1000
+    t.join()
+    print(f"[locked] 50 lookups while another connection held the write lock for {hold_ms} ms: {elapsed:.1f} ms")
+    assert elapsed < hold_ms / 2, "조회가 쓰기 잠금을 기다림"
+
+def check_lru(keys, size=2000):
+    llm_cache.clear_cache()
+    keys = seed(10, size)
+    # 모든 항목의 사용 시각을 갱신 간격 이전으로 되돌린 뒤 첫 항목만 다시 사용
+    with persistence.transaction(llm_cache.CACHE_DB_PATH) as conn:
+        conn.executemany("UPDATE llm_cache SET last_accessed = ? WHERE key = ?",
+                         [(time.time() - llm_cache.CACHE_TOUCH_INTERVAL_SECONDS - 100 + n, key) for n, key in enumerate(keys)])
+    assert llm_cache.get_cached_response(keys[0]) is not None
+    stored = persistence.get_connection(llm_cache.CACHE_DB_PATH).execute(
+        "SELECT last_accessed FROM llm_cache WHERE key = ?", (keys[0],)).fetchone()[0]
+    assert time.time() - stored > llm_cache.CACHE_TOUCH_INTERVAL_SECONDS, "조회가 바로 DB에 썼음"
+    # 항목 2개 분량만큼 용량을 줄이고 새 항목을 저장 → 가장 오래 사용되지 않은 keys[1], keys[2]가 제거되어야 함
+    entry = len(("응" * size).encode("utf-8"))
+    llm_cache.CACHE_MAX_BYTES = entry * 9
+    llm_cache.store_response(llm_cache.make_cache_key("bench", "새 항목"), "bench", "응" * size)
+    remaining = {row[0] for row in persistence.get_connection(llm_cache.CACHE_DB_PATH).execute("SELECT key FROM llm_cache")}
+    assert keys[0] in remaining, "다시 사용한 항목이 제거됨"
+    assert keys[1] not in remaining and keys[2] not in remaining, "오래된 항목이 남음"
+    print(f"[lru] re-used entry kept, {11 - len(remaining)} least recently used entries evicted")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--hold-ms", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        keys = seed(args.keys)
+        count_write_transactions()
+        check_throughput(keys, args.threads, args.lookups)
+        check_lookup_during_write(keys, args.hold_ms)
+        check_lru(keys)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_pipeline.py
+#
+# 가짜 LLM 백엔드(llm_backends.FakeLLMBackend)로 프로젝트 하나의 전체 흐름
+#   문제정의 → 모델 설계 → 테스트 케이스 → 성능 리포트 → 거버넌스 리포트
+# 를 각 페이지와 같은 방식으로 생성하고 persistence.py에 저장하면서, 단계별 처리량과 p50/p95/p99 지연을 측정합니다.
+# 여러 프로젝트를 동시에 진행해 동시 사용자 부하를 흉내 냅니다.
+#
+# 실행: python benchmarks/bench_pipeline.py [--projects 100] [--concurrency 8] [--latency-ms 200] [--stream]
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yaml
+import gemini_agent
+import llm_cache
+import llm_telemetry
+import persistence
+from llm_backends import FakeLLMBackend
+
+STAGES = ["PROBLEM_DEF", "MODEL_DESIGN", "TEST_CASE", "PERF_REPORT", "GOV_REPORT"]
+METRICS = {"Accuracy": 0.93, "F1": 0.90}
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def generate(name, *args, stream=False):
+    """generate_X 또는 stream_X를 호출해 전체 텍스트를 돌려줍니다."""
+    if stream:
+        return "".join(getattr(gemini_agent, f"stream_{name}")(*args))
+    return getattr(gemini_agent, f"generate_{name}")(*args)
+
+def run_project(index, stream, timings):
+    """프로젝트 하나의 전체 흐름을 실행하며 단계별 소요 시간(생성 + 저장)을 timings에 기록합니다."""
+    def timed(stage, func):
+        started = time.perf_counter()
+        result = func()
+        timings[stage].append(time.perf_counter() - started)
+        return result
+
+    project_id = persistence.create_project(f"bench-{index}", "파이프라인 벤치마크")
+    mcp = {"mcp_context": {"project_name": f"bench-{index}", "risk_level": "High" if index % 3 == 0 else "Low",
+                           "responsible_party": "벤치마크 담당자"}}
+    persistence.save_artifact(project_id, "MCP", "MCP_YAML", yaml.dump(mcp, allow_unicode=True))
+
+    def problem_def():
+        text = generate("problem_definition", {"use_case": f"민원 분류 {index}", "background": "수작업 지연",
+                                               "expected_effect": "응답 시간 단축"}, stream=stream)
+        persistence.save_artifact(project_id, "REQUIREMENT", "PROBLEM_DEF", text)
+        return text
+    problem = timed("PROBLEM_DEF", problem_def)
+
+    def design():
+        text = generate("model_design_doc", problem, "텍스트 분류", stream=stream)
+        persistence.save_artifact(project_id, "DESIGN", "MODEL_DESIGN", text)
+        return text
+    design_doc = timed("MODEL_DESIGN", design)
+
+    def test_cases():
+        text = generate("test_cases_json", design_doc, "정상적인 입력값에 대한 기본 기능 검증", stream=stream)
+        df, _ = gemini_agent.parse_test_cases(text)
+        persistence.save_artifact(project_id, "IMPLEMENT", "TEST_CASE", df.to_markdown(index=False))
+    timed("TEST_CASE", test_cases)
+
+    def perf_report():
+        text = generate("performance_report", design_doc, METRICS, stream=stream)
+        metrics_md = "\n".join(f"- {name}: {value}" for name, value in METRICS.items())
+        persistence.save_artifact(project_id, "VERIFICATION", "PERF_REPORT",
+                                  f"# 성능 평가 리포트\n\n## 성능 지표\n{metrics_md}\n\n## 종합 분석\n\n{text}")
+    timed("PERF_REPORT", perf_report)
+
+    def governance():
+        # 6번 페이지와 같은 방식: 스냅샷 조회 → 규칙 점검 → 종합 리포트 생성 → 저장
+        snapshot = persistence.get_project_snapshot(project_id, ["MCP_YAML", "PROBLEM_DEF", "MODEL_DESIGN", "PERF_REPORT"])
+        mcp_data = yaml.safe_load(snapshot["MCP_YAML"]["content"]).get("mcp_context", {})
+        accuracy_match = re.search(r"Accuracy:\s*([0-9.]+)", snapshot["PERF_REPORT"]["content"])
+        checks = [
+            f"담당자 명시: {bool(mcp_data.get('responsible_party'))}",
+            f"Accuracy >= 0.9: {bool(accuracy_match) and float(accuracy_match.group(1)) >= 0.9}",
+            f"고위험: {mcp_data.get('risk_level', '').lower() == 'high'}",
+            f"개인정보 언급: {persistence.artifact_contains_any(snapshot['PROBLEM_DEF']['id'], ['개인정보', 'PII'])}",
+        ]
+        text = generate("governance_summary", mcp_data, checks, stream=stream)
+        persistence.save_artifact(project_id, "GOVERNANCE", "GOV_REPORT", text)
+    timed("GOV_REPORT", governance)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200, help="가짜 LLM 지연 중앙값")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="로그정규 지연 분포의 sigma")
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 주입 비율 (재시도로 흡수)")
+    parser.add_argument("--stream", action="store_true", help="stream_* 함수로 생성")
+    args = parser.parse_args()
+
+    gemini_agent.set_backend(FakeLLMBackend(latency_median=args.latency_ms / 1000, latency_sigma=args.latency_sigma,
+                                            output_tokens=args.output_tokens, error_rate=args.error_rate, seed=42))
+    gemini_agent.GEMINI_BACKOFF_BASE_SECONDS = 0.05
+    timings = defaultdict(list)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence.DB_PATH = os.path.join(tmp, "bench.db")
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        llm_telemetry.TELEMETRY_DB_PATH = os.path.join(tmp, "llm_telemetry.db")
+        persistence.init_db()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda i: run_project(i, args.stream, timings), range(args.projects)))
+        elapsed = time.perf_counter() - started
+        # 같은 호출을 telemetry 기록으로도 집계 (대시보드 페이지와 같은 계산)
+        by_function = llm_telemetry.summarize_calls(llm_telemetry.load_calls(), "function")
+        persistence.close_all_connections()
+
+    print(f"{args.projects} projects, concurrency {args.concurrency}, fake latency median {args.latency_ms:.0f} ms, "
+          f"stream={args.stream}, wall {elapsed:.2f}s, LLM calls {gemini_agent.get_backend().calls}")
+    print(f"{'stage':<14}{'n':>6}{'ops/s':>9}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for stage in STAGES:
+        values = timings[stage]
+        print(f"{stage:<14}{len(values):>6}{len(values) / elapsed:>9.1f}{statistics.mean(values) * 1000:>10.1f}"
+              f"{percentile(values, 0.50) * 1000:>10.1f}{percentile(values, 0.95) * 1000:>10.1f}"
+              f"{percentile(values, 0.99) * 1000:>10.1f}")
+    print(f"pipeline throughput: {args.projects / elapsed:.2f} projects/s")
+    print("\nLLM calls by function (llm_telemetry):")
+    print(by_function[["calls", "error_rate", "cache_hit_rate", "p50_ms", "p95_ms", "p99_ms", "total_tokens"]].to_string(float_format="{:.2f}".format))
+
+if __name__ == "__main__":
+    main()
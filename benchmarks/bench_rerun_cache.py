@@ -0,0 +1,101 @@
+# benchmarks/bench_rerun_cache.py
+#
+# 페이지 rerun마다 실행되는 메인 DB의 SQL 문 수를 셉니다. (Streamlit AppTest로 페이지를 실제로 실행)
+#   1) 첫 실행 → 조회 SQL 실행
+#   2) 데이터가 바뀌지 않은 rerun → SQL 0건 (스키마 초기화도 프로세스당 한 번만 실행됨)
+#   3) save_artifact 후 rerun → 해당 프로젝트 조회만 다시 실행되고 새 버전이 화면에 반영됨
+# 다른 DB 파일(작업 큐, 호출 기록)의 SQL은 세지 않습니다. 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/bench_rerun_cache.py [--versions 30]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.environ.setdefault("LLM_BACKEND", "fake")
+import persistence
+import generation_jobs
+import llm_cache
+import llm_telemetry
+from streamlit.testing.v1 import AppTest
+
+PAGES = {
+    "app": "app.py",
+    "3_모델_설계": "pages/3_모델_설계.py",
+    "4_모델_구현": "pages/4_모델_구현.py",
+    "5_성능_검증": "pages/5_성능_검증.py",
+}
+
+statements = Counter()
+_statements_lock = threading.Lock()
+
+def trace_main_db():
+    """메인 DB 커넥션이 실행하는 SQL 문을 첫 단어(SELECT, WITH, PRAGMA ...) 기준으로 셉니다."""
+    apply_pragmas = persistence._apply_pragmas
+    def traced_pragmas(conn):
+        apply_pragmas(conn)
+        path = conn.execute("PRAGMA database_list").fetchone()["file"]
+        if os.path.abspath(path) == os.path.abspath(persistence.DB_PATH):
+            def trace(sql):
+                with _statements_lock:
+                    statements[sql.split(None, 1)[0].upper()] += 1
+            conn.set_trace_callback(trace)
+    persistence._apply_pragmas = traced_pragmas
+
+def run_page(at):
+    statements.clear()
+    at.run(timeout=30)
+    assert not at.exception, at.exception
+    return sum(statements.values()), dict(statements)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--versions", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence.DB_PATH = os.path.join(tmp, "mcp.db")
+        persistence.ARCHIVE_PATH = os.path.join(tmp, "archive.jsonl.gz")
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        llm_telemetry.TELEMETRY_DB_PATH = os.path.join(tmp, "llm_telemetry.db")
+        generation_jobs.JOBS_DB_PATH = os.path.join(tmp, "generation_jobs.db")
+        trace_main_db()
+        persistence.init_db()
+        for name in ("rerun", "other"):
+            persistence.create_project(name, "rerun 캐시 측정")
+        project_id = {p["name"]: p["id"] for p in persistence.get_all_projects()}["rerun"]
+        for i in range(args.versions):
+            for type in ("PROBLEM_DEF", "MODEL_DESIGN", "TEST_CASE", "PERF_REPORT"):
+                persistence.save_artifact(project_id, "bench", type, f"# {type} 버전 {i}\n\n" + "본문 " * 200)
+
+        for name, path in PAGES.items():
+            at = AppTest.from_file(os.path.join(ROOT, path), default_timeout=30)
+            at.session_state["selected_project_id"] = project_id
+            at.session_state["selected_project_name"] = "rerun"
+            first, _ = run_page(at)
+            rerun, detail = run_page(at)
+            # 다른 프로젝트의 쓰기는 이 프로젝트 조회를 무효화하지 않음 (대시보드는 전체 범위라 다시 조회)
+            other_id = {p["name"]: p["id"] for p in persistence.get_all_projects()}["other"]
+            persistence.save_artifact(other_id, "bench", "PROBLEM_DEF", "다른 프로젝트")
+            after_other, _ = run_page(at)
+            persistence.save_artifact(project_id, "bench", "PROBLEM_DEF", "# 새 문제정의서 버전")
+            persistence.save_artifact(project_id, "bench", "MODEL_DESIGN", "# 새 모델 설계서 버전")
+            after_write, _ = run_page(at)
+            print(f"[{name}] first {first}, rerun {rerun} {detail or ''}, "
+                  f"after other project's write {after_other}, after own write {after_write}")
+            assert rerun == 0, detail
+            if name != "app":
+                assert after_other == 0 and after_write > 0, (after_other, after_write)
+                shown = " ".join(md.value for md in at.markdown) + " ".join(c.value for c in at.code)
+                assert "새 문제정의서 버전" in shown or "새 모델 설계서 버전" in shown, name
+            else:
+                assert after_other > 0
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_resilience.py
+#
+# 로컬 가짜 Gemini 엔드포인트(fake_gemini_server.py)에 gemini_agent를 연결해
+# 1) 429(Retry-After) 주입 시 재시도로 흡수되는지, 2) 분당 요청 한도가 지켜지는지,
+# 3) 업스트림 장애 시 서킷 브레이커가 열려 바로 실패하는지 확인합니다.
+#
+# 실행: python benchmarks/bench_resilience.py [--requests 40] [--concurrency 8]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import google.generativeai as genai
+import gemini_agent
+import llm_cache
+import llm_telemetry
+from llm_backends import GeminiBackend
+from llm_resilience import RateLimiter, CircuitBreaker
+from fake_gemini_server import start_fake_server
+
+def run_batch(num_requests, concurrency, tag):
+    """서로 다른 프롬프트를 동시에 보내고 (성공 수, 실패 메시지 목록, 소요 시간, 요청별 지연)을 돌려줍니다."""
+    def one(i):
+        started = time.perf_counter()
+        try:
+            gemini_agent._generate_text(f"{tag} 요청 {i}", timeout_seconds=10, use_cache=False)
+            return None, time.perf_counter() - started
+        except Exception as e:
+            return gemini_agent._describe_error(e, 10), time.perf_counter() - started
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(num_requests)))
+    elapsed = time.perf_counter() - started
+    errors = [error for error, _ in outcomes if error]
+    return num_requests - len(errors), errors, elapsed, [latency for _, latency in outcomes]
+
+def reset_guards(requests_per_minute=6000, tokens_per_minute=10_000_000):
+    gemini_agent._rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    gemini_agent._circuit_breaker = CircuitBreaker(gemini_agent.GEMINI_CIRCUIT_FAILURE_THRESHOLD, gemini_agent.GEMINI_CIRCUIT_RESET_SECONDS)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_fake_server(latency=0.05, seed=1)
+    genai.configure(api_key="fake-key", transport="rest", client_options={"api_endpoint": server.endpoint})
+    gemini_agent.set_backend(GeminiBackend(gemini_agent.GEMINI_MODEL_NAME))
+    gemini_agent.GEMINI_BACKOFF_BASE_SECONDS = 0.2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        llm_telemetry.TELEMETRY_DB_PATH = os.path.join(tmp, "llm_telemetry.db")
+
+        # 1) 30% 요청이 429 + Retry-After: 1 → 재시도로 모두 성공해야 함
+        reset_guards()
+        server.rate_limit_ratio, server.retry_after = 0.3, 1
+        ok, errors, elapsed, _ = run_batch(args.requests, args.concurrency, "quota")
+        print(f"[429 주입] 성공 {ok}/{args.requests}, 실패 {len(errors)}, {elapsed:.2f}s, 서버 통계 {server.stats}")
+        server.rate_limit_ratio = 0.0
+
+        # 2) 분당 60회 제한(버킷 용량 60): 용량을 넘는 요청은 초당 1회씩 흘려보냄
+        reset_guards(requests_per_minute=60)
+        burst = 60 + 5
+        ok, errors, elapsed, _ = run_batch(burst, args.concurrency, "rpm")
+        print(f"[RPM 60] {burst}건 처리 {elapsed:.2f}s (용량 초과 5건 → 약 5초 기대), 성공 {ok}")
+
+        # 3) 업스트림 장애: 임계치만큼 실패한 뒤에는 서버에 요청하지 않고 즉시 실패
+        reset_guards()
+        server.error_ratio = 1.0
+        before = server.stats["requests"]
+        ok, errors, elapsed, latencies = run_batch(args.requests, 1, "outage")
+        fast = sorted(latencies)[: args.requests // 2]
+        print(f"[503 장애] 성공 {ok}, 서버 도달 요청 {server.stats['requests'] - before}/{args.requests}, "
+              f"차단된 요청 지연 중앙값 {fast[len(fast) // 2] * 1000:.2f} ms, 서킷 상태 {gemini_agent._circuit_breaker.state}")
+        print(f"  예시 오류: {errors[-1]}")
+        server.error_ratio = 0.0
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_single_flight.py
+#
+# 동시에 들어온 같은 요청이 하나의 백엔드 호출로 합쳐지는지 가짜 백엔드로 확인합니다.
+#   1) 일반 호출 N개 동시 → 백엔드 호출 1회, 모두 같은 응답
+#   2) 스트리밍 호출 N개 동시 (일부는 중간에 스트림을 닫음) → 백엔드 호출 1회, 끝까지 읽은 호출자는 모두 같은 응답
+#   3) 일반 호출과 스트리밍 호출이 섞여도 1회
+#   4) 업스트림 오류 → 백엔드 호출 1회, 모든 호출자가 같은 오류를 받음
+#   5) 호출을 실행하던 스레드가 BaseException(Streamlit rerun/stop, KeyboardInterrupt)으로 중단 → 그 스레드만 원래 예외,
+#      합류한 호출자는 FlightAborted를 받고(멈추지 않음), key가 비워져 다음 요청은 새로 호출
+# 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/bench_single_flight.py [--callers 16] [--latency-ms 300]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gemini_agent
+import llm_cache
+import llm_telemetry
+from llm_backends import FakeLLMBackend
+from llm_resilience import FlightAborted
+
+class InterruptingBackend(FakeLLMBackend):
+    """첫 호출은 지연 후 KeyboardInterrupt로 중단되고, 이후 호출은 정상 응답합니다."""
+
+    def generate(self, prompt, timeout_seconds, response_schema=None):
+        if self.calls == 0:
+            self._draw()
+            self._sleep(self.latency_median)
+            raise KeyboardInterrupt
+        return super().generate(prompt, timeout_seconds, response_schema)
+
+def run_concurrently(callers, func):
+    """callers개의 스레드가 동시에 func(i)를 실행합니다. 반환값: (결과 또는 예외 목록, 소요 시간)"""
+    barrier = threading.Barrier(callers)
+    def one(i):
+        barrier.wait()
+        try:
+            return func(i)
+        except Exception as e:
+            return e
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(one, range(callers)))
+    return results, time.perf_counter() - started
+
+def use_backend(**kwargs):
+    backend = FakeLLMBackend(seed=7, **kwargs)
+    gemini_agent.set_backend(backend)
+    return backend
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+    gemini_agent.GEMINI_MAX_ATTEMPTS = 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        llm_telemetry.TELEMETRY_DB_PATH = os.path.join(tmp, "llm_telemetry.db")
+
+        # 1) 일반 호출
+        backend = use_backend(latency_median=latency, latency_sigma=0)
+        results, elapsed = run_concurrently(args.callers, lambda i: gemini_agent._generate_text("같은 요청 1", 30, True))
+        assert backend.calls == 1, backend.calls
+        assert len(set(results)) == 1 and isinstance(results[0], str), results[:2]
+        print(f"[generate] callers {args.callers}, backend calls {backend.calls}, {elapsed * 1000:.0f} ms")
+
+        # 2) 스트리밍 (짝수 번째 호출자는 첫 조각만 읽고 닫음)
+        backend = use_backend(latency_median=latency, latency_sigma=0, stream_chunks=8)
+        def stream(i):
+            chunks = gemini_agent._stream_gemini_with_timeout("같은 요청 2", 30, True)
+            if i % 2 == 0:
+                next(chunks)
+                chunks.close()
+                return None
+            return "".join(chunks)
+        results, elapsed = run_concurrently(args.callers, stream)
+        finished = [r for r in results if r is not None]
+        assert backend.calls == 1, backend.calls
+        assert len(set(finished)) == 1 and not isinstance(finished[0], Exception), finished[:2]
+        assert llm_cache.get_cached_response(llm_cache.make_cache_key(backend.model_name, "같은 요청 2")) == finished[0]
+        print(f"[stream] callers {args.callers} (절반은 중간에 닫음), backend calls {backend.calls}, {elapsed * 1000:.0f} ms")
+
+        # 3) 일반 호출과 스트리밍 호출 혼합
+        backend = use_backend(latency_median=latency, latency_sigma=0)
+        def mixed(i):
+            if i % 2:
+                return gemini_agent._generate_text("같은 요청 3", 30, True)
+            return "".join(gemini_agent._stream_gemini_with_timeout("같은 요청 3", 30, True))
+        results, elapsed = run_concurrently(args.callers, mixed)
+        assert backend.calls == 1, backend.calls
+        assert len(set(results)) == 1, results[:2]
+        print(f"[mixed] callers {args.callers}, backend calls {backend.calls}, {elapsed * 1000:.0f} ms")
+
+        # 4) 업스트림 오류는 모든 합류 호출자에게 전달
+        backend = use_backend(latency_median=latency, latency_sigma=0, error_rate=1.0)
+        results, elapsed = run_concurrently(args.callers, lambda i: gemini_agent._generate_text("같은 요청 4", 30, True))
+        assert backend.calls == 1, backend.calls
+        assert all(isinstance(r, Exception) for r in results), results[:2]
+        print(f"[error] callers {args.callers}, backend calls {backend.calls}, 모두 {type(results[0]).__name__}")
+
+        # 5) leader 스레드가 BaseException으로 중단
+        backend = InterruptingBackend(seed=7, latency_median=latency, latency_sigma=0)
+        gemini_agent.set_backend(backend)
+        def interrupted(i):
+            try:
+                return gemini_agent._generate_text("같은 요청 5", 30, True)
+            except BaseException as e:
+                return e
+        results, elapsed = run_concurrently(args.callers, interrupted)
+        kinds = {type(r).__name__ for r in results}
+        assert sum(isinstance(r, KeyboardInterrupt) for r in results) == 1, kinds
+        assert sum(isinstance(r, FlightAborted) for r in results) == args.callers - 1, kinds
+        assert gemini_agent._single_flight.in_flight() == 0
+        assert isinstance(gemini_agent._generate_text("같은 요청 5", 30, True), str) and backend.calls == 2, backend.calls
+        print(f"[interrupted] callers {args.callers}: {sorted(kinds)}, {elapsed * 1000:.0f} ms, next call made a new request")
+
+        # 합쳐진 호출도 호출자별로 기록됨
+        calls = llm_telemetry.load_calls()
+        print(f"telemetry: {len(calls)} rows, coalesced {int(calls['coalesced'].sum())}, "
+              f"outcomes {calls['outcome'].value_counts().to_dict()}")
+        assert gemini_agent._single_flight.in_flight() == 0
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_storage.py
+#
+# 합성 이력(기본 10,000 버전)으로 본문을 평문 그대로 저장하던 기존 방식과
+# 해시 기반 blob + 델타 저장소의 DB 크기, 쓰기/읽기 지연을 비교합니다.
+#
+# 실행: python benchmarks/bench_storage.py [--versions 10000] [--streams 50]
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import persistence
+
+METRICS_BLOCK = "## 성능 지표\n- Accuracy: 0.95\n- F1: 0.91\n- Precision: 0.93\n- Recall: 0.90\n"
+
+def synthetic_history(num_versions, num_streams, seed=42):
+    """(stream 번호, 본문) 목록. 스트림마다 조금씩 수정되는 문서와 가끔 동일한 재저장을 흉내냅니다."""
+    rng = random.Random(seed)
+    docs = []
+    for s in range(num_streams):
+        lines = [f"### {i // 10 + 1}. 섹션 {s}-{i}: " + "설계 내용 " * rng.randint(3, 15) + "\n" for i in range(80)]
+        docs.append(lines)
+    history = []
+    for v in range(num_versions):
+        s = rng.randrange(num_streams)
+        lines = docs[s]
+        if rng.random() > 0.1:  # 10%는 직전 버전과 동일한 본문 재저장
+            for _ in range(rng.randint(1, 3)):
+                lines[rng.randrange(len(lines))] = f"수정된 문단 {v}: " + "보완 " * rng.randint(2, 10) + "\n"
+            if rng.random() < 0.2:
+                lines.insert(rng.randrange(len(lines)), f"추가 문단 {v}\n")
+        history.append((s, "".join(lines) + METRICS_BLOCK))
+    return history
+
+def db_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def report(label, path, write_times, read_times):
+    print(f"[{label}] db={db_size(path) / 1024 / 1024:.2f} MB | "
+          f"write mean={statistics.mean(write_times) * 1000:.3f} ms p95={percentile(write_times, 0.95) * 1000:.3f} ms | "
+          f"read mean={statistics.mean(read_times) * 1000:.3f} ms p95={percentile(read_times, 0.95) * 1000:.3f} ms")
+
+def bench_plain(path, history, num_streams, reads):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("CREATE TABLE artifacts (id INTEGER PRIMARY KEY, project_id INTEGER, type TEXT, content TEXT, created_at TEXT)")
+    conn.execute("CREATE INDEX idx ON artifacts (project_id, type, created_at)")
+    write_times = []
+    for s, content in history:
+        t = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO artifacts (project_id, type, content, created_at) VALUES (?, 'DOC', ?, ?)",
+                     (s + 1, content, datetime.now().isoformat()))
+        conn.execute("COMMIT")
+        write_times.append(time.perf_counter() - t)
+    ids = [r[0] for r in conn.execute("SELECT id FROM artifacts")]
+    read_times = []
+    for artifact_id in reads(ids):
+        t = time.perf_counter()
+        conn.execute("SELECT content FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+        read_times.append(time.perf_counter() - t)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    conn.close()
+    return write_times, read_times
+
+def bench_blob_store(path, history, num_streams, reads):
+    persistence.DB_PATH = path
+    persistence.init_db()
+    for s in range(num_streams):
+        persistence.create_project(f"bench-{s}", "")
+    write_times = []
+    for s, content in history:
+        t = time.perf_counter()
+        persistence.save_artifact(s + 1, "BENCH", "DOC", content)
+        write_times.append(time.perf_counter() - t)
+    conn = persistence.get_connection()
+    ids = [r[0] for r in conn.execute("SELECT id FROM artifacts")]
+    read_times = []
+    for artifact_id in reads(ids):
+        persistence._content_cache.clear()  # 캐시 없이 델타 체인 복원 비용을 측정
+        t = time.perf_counter()
+        persistence.get_artifact_content(artifact_id)
+        read_times.append(time.perf_counter() - t)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    persistence.close_all_connections()
+    return write_times, read_times
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--versions", type=int, default=10000)
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=1000)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.versions, args.streams)
+    raw = sum(len(c.encode("utf-8")) for _, c in history)
+    print(f"synthetic history: {args.versions} versions, {args.streams} streams, {raw / 1024 / 1024:.2f} MB raw")
+
+    def reads(ids):
+        rng = random.Random(7)
+        return [rng.choice(ids) for _ in range(args.reads)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = os.path.join(tmp, "plain.db")
+        report("plain text", plain_path, *bench_plain(plain_path, history, args.streams, reads))
+        blob_path = os.path.join(tmp, "blob.db")
+        report("blob+delta", blob_path, *bench_blob_store(blob_path, history, args.streams, reads))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_write_queue.py
+#
+# 동시에 저장하는 여러 호출자 기준으로, 호출마다 커밋하는 save_artifact와
+# 그룹 커밋 쓰기 큐(enqueue_artifact)의 초당 저장 건수를 비교합니다.
+#
+# 실행: python benchmarks/bench_write_queue.py [--callers 16] [--per-caller 200] [--synchronous FULL] [--dir PATH]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import persistence
+
+def make_content(caller, i):
+    return f"# 성능 평가 리포트 {caller}-{i}\n\n" + "## 종합 분석\n모델 성능이 기준을 충족합니다.\n" * 10
+
+def run(label, save_fn, callers, per_caller):
+    def caller(n):
+        for i in range(per_caller):
+            save_fn(n, i)
+
+    threads = [threading.Thread(target=caller, args=(n,)) for n in range(callers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = callers * per_caller
+    print(f"[{label}] {total} artifacts in {elapsed:.2f}s -> {total / elapsed:,.0f} artifacts/s")
+    return total / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=16)
+    parser.add_argument("--per-caller", type=int, default=200)
+    parser.add_argument("--synchronous", default="FULL", help="PRAGMA synchronous (FULL이면 커밋마다 fsync)")
+    parser.add_argument("--dir", default=None, help="DB를 만들 디렉터리 (fsync 비용은 디스크에 따라 크게 다름)")
+    args = parser.parse_args()
+
+    original_pragmas = persistence._apply_pragmas
+    def apply_pragmas(conn):
+        original_pragmas(conn)
+        conn.execute(f"PRAGMA synchronous = {args.synchronous};")
+    persistence._apply_pragmas = apply_pragmas
+
+    results = {}
+    for label in ("commit-per-call", "group-commit"):
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            persistence.DB_PATH = os.path.join(tmp, "bench.db")
+            persistence.init_db()
+            persistence.create_project("bench", "")
+            if label == "commit-per-call":
+                save = lambda n, i: persistence.save_artifact(1, "VERIFICATION", "PERF_REPORT", make_content(n, i))
+            else:
+                # 호출자는 자신의 행이 커밋될 때까지 기다림 (save_artifact와 동일한 보장)
+                save = lambda n, i: persistence.enqueue_artifact(1, "VERIFICATION", "PERF_REPORT", make_content(n, i)).result()
+            results[label] = run(label, save, args.callers, args.per_caller)
+            persistence.close_write_queue()
+            persistence.close_all_connections()
+
+    print(f"speedup: x{results['group-commit'] / results['commit-per-call']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/check_async_persistence.py
+#
+# async_persistence 래퍼로 저장과 조회를 동시에 던졌을 때의 동작을 확인합니다.
+# (동기 persistence를 쓰는 스레드들이 같은 DB에 동시에 쓰는 상황 포함)
+#   1) 쓰기 순서: asyncio.gather로 제출한 async_save_artifact는 제출 순서대로 커밋됨
+#      (반환된 id가 제출 순서대로 증가하고, 이력도 같은 순서)
+#   2) 읽기-쓰기 가시성: 저장 바로 뒤에 제출한 조회(저장 완료를 기다리지 않음)가 방금 저장한 버전을 돌려줌
+#      (조회 결과 캐시가 있어도 저장이 무효화함)
+#   3) 'database is locked' 오류 없음: 호출자에게 올라온 오류도, retry_on_locked가 삼킨 재시도도 0건
+# 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/check_async_persistence.py [--projects 8] [--versions 30] [--sync-writers 4]
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import persistence
+import async_persistence as ap
+
+lock_errors = []
+_lock_errors_lock = threading.Lock()
+
+def count_lock_errors():
+    """retry_on_locked가 재시도하는 잠금 오류까지 모두 기록합니다."""
+    is_lock_error = persistence._is_lock_error
+    def counted(e):
+        locked = is_lock_error(e)
+        if locked:
+            with _lock_errors_lock:
+                lock_errors.append(repr(e))
+        return locked
+    persistence._is_lock_error = counted
+
+def sync_writer(project_id, versions, errors):
+    """Streamlit 페이지처럼 동기 API로 같은 DB에 쓰는 스레드."""
+    try:
+        for i in range(versions):
+            persistence.save_artifact(project_id, "SYNC", "PERF_REPORT", f"동기 저장 {project_id}-{i}")
+            persistence.get_latest_artifact(project_id, "PERF_REPORT")
+    except Exception as e:
+        errors.append(repr(e))
+
+submitted = []   # DB 스레드에 제출된 순서대로의 (프로젝트 id, 버전)
+
+async def submit_save(project_id, version, content):
+    # 이 코루틴의 첫 단계에서 run_in_executor까지 바로 실행되므로, 기록 순서 = DB 스레드 제출 순서
+    submitted.append((project_id, version))
+    return await ap.async_save_artifact(project_id, "DESIGN", "MODEL_DESIGN", content)
+
+async def project_workload(project_id, versions):
+    """
+    저장과 조회를 번갈아 제출하고 한꺼번에 기다립니다. 반환값: [(저장 id, 저장한 본문, 바로 뒤 조회 결과 본문), ...]
+    """
+    calls = []
+    for i in range(versions):
+        content = f"# 모델 설계서 {project_id} 버전 {i}\n\n" + "본문 " * 50
+        calls.append(submit_save(project_id, i, content))
+        calls.append(ap.async_get_latest_artifact(project_id, "MODEL_DESIGN"))
+    results = await asyncio.gather(*calls)
+    return [(results[2 * i], f"# 모델 설계서 {project_id} 버전 {i}\n\n" + "본문 " * 50, (results[2 * i + 1] or {}).get("content"))
+            for i in range(versions)]
+
+async def run(args):
+    await ap.async_init_db()
+    for n in range(args.projects + args.sync_writers):
+        await ap.async_create_project(f"async-{n}", "비동기 저장 확인")
+    project_ids = sorted(p["id"] for p in await ap.async_get_all_projects())
+    async_ids, sync_ids = project_ids[:args.projects], project_ids[args.projects:]
+
+    sync_errors = []
+    threads = [threading.Thread(target=sync_writer, args=(pid, args.versions, sync_errors)) for pid in sync_ids]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    results = await asyncio.gather(*(project_workload(pid, args.versions) for pid in async_ids))
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    all_ids = []
+    for pid, rows in zip(async_ids, results):
+        ids = [artifact_id for artifact_id, _, _ in rows]
+        assert ids == sorted(ids) and len(set(ids)) == len(ids), f"프로젝트 {pid}: 제출 순서와 다른 커밋 순서 {ids}"
+        for artifact_id, written, read in rows:
+            assert read == written, f"프로젝트 {pid}: 저장 직후 조회가 이전 버전을 돌려줌 (id {artifact_id})"
+        history = await ap.async_get_artifacts_for_project(pid, "MODEL_DESIGN")
+        assert [a["content"] for a in reversed(history)] == [written for _, written, _ in rows], f"프로젝트 {pid}: 이력 순서"
+        all_ids.extend(ids)
+    # 프로젝트가 달라도 모두 같은 DB 스레드의 FIFO를 거치므로, 전체 제출 순서와 id 순서가 같음
+    id_of = {(pid, i): rows[i][0] for pid, rows in zip(async_ids, results) for i in range(args.versions)}
+    in_submit_order = [id_of[key] for key in submitted]
+    assert in_submit_order == sorted(in_submit_order), "프로젝트 간 제출 순서와 커밋 순서가 다름"
+
+    assert not sync_errors, sync_errors
+    assert not lock_errors, lock_errors[:3]
+    saved = len(all_ids) + len(sync_ids) * args.versions
+    print(f"async writes {len(all_ids)} + sync writes {len(sync_ids) * args.versions} in {elapsed * 1000:.0f} ms "
+          f"({saved / elapsed:.0f}/s), reads-after-write {len(all_ids)} all fresh, lock errors 0")
+    ap.shutdown_db_executor()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=8)
+    parser.add_argument("--versions", type=int, default=30)
+    parser.add_argument("--sync-writers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence.DB_PATH = os.path.join(tmp, "mcp.db")
+        persistence.ARCHIVE_PATH = os.path.join(tmp, "archive.jsonl.gz")
+        count_lock_errors()
+        asyncio.run(run(args))
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/check_generation_jobs.py
+#
+# 백그라운드 생성 작업 큐의 점유(lease)와 취소를 가짜 백엔드로 확인합니다.
+#   1) 여러 JobRunner(여러 프로세스/레플리카를 흉내)가 같은 작업 DB를 함께 써도 각 작업은 정확히 한 번만 실행됨.
+#      나중에 시작한 JobRunner가 다른 러너의 실행 중 작업을 대기열로 되돌리지 않음
+#   2) 점유 기한이 지난 작업(죽은 프로세스)만 대기열로 돌아가 다시 실행되고, 기한이 남은 작업은 건드리지 않음
+#   3) 실행 중 취소: 작업이 cancelled로 끝나고, 업스트림(백엔드) 스트림도 중간에 멈춤. 잘린 응답은 캐시에 저장되지 않음
+# 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/check_generation_jobs.py [--jobs 24] [--runners 3]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gemini_agent
+import generation_jobs
+import llm_cache
+import llm_telemetry
+from llm_backends import FakeLLMBackend
+from persistence import transaction
+
+class CountingBackend(FakeLLMBackend):
+    """백엔드가 실제로 내보낸 스트리밍 조각 수를 셉니다. (업스트림이 멈췄는지 확인용)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.yielded = 0
+        self._count_lock = threading.Lock()
+
+    def stream(self, prompt, timeout_seconds, response_schema=None):
+        for chunk in super().stream(prompt, timeout_seconds, response_schema):
+            with self._count_lock:
+                self.yielded += 1
+            yield chunk
+
+runs = Counter()
+_runs_lock = threading.Lock()
+
+def count_runs():
+    run_job = generation_jobs._run_job
+    def counted(job, owner):
+        with _runs_lock:
+            runs[job["id"]] += 1
+        return run_job(job, owner)
+    generation_jobs._run_job = counted
+
+def wait_for(predicate, timeout=30, message="시간 초과"):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(0.05)
+    raise AssertionError(message)
+
+def submit(n, user="check"):
+    return generation_jobs.submit_job(user, 1, "model_design_doc", {"problem_def": f"문제 정의 {n}", "model_type": "분류"})
+
+def check_single_execution(num_jobs, num_runners):
+    gemini_agent.set_backend(FakeLLMBackend(latency_median=0.05, latency_sigma=0, stream_chunks=4))
+    runners = [generation_jobs.JobRunner(workers=2).start() for _ in range(num_runners)]
+    job_ids = []
+    for n in range(num_jobs):
+        job_ids.append(submit(n, user=f"user-{n % 6}"))
+        for runner in runners:
+            runner.wake()
+    # 실행 도중에 새 러너가 시작되어도 실행 중인 작업을 가로채지 않음 (이전 구현은 여기서 모두 대기열로 되돌림)
+    generation_jobs.JobRunner(workers=1).start()
+    wait_for(lambda: all(generation_jobs.get_job(i)["status"] == "succeeded" for i in job_ids), message="작업이 끝나지 않음")
+    repeated = {job_id: count for job_id, count in runs.items() if job_id in job_ids and count != 1}
+    assert not repeated, f"두 번 이상 실행된 작업: {repeated}"
+    owners = {generation_jobs.get_job(i)["owner"] for i in job_ids}
+    print(f"[single execution] {num_jobs} jobs on {num_runners + 2} runners ({len(owners)} owners did work), each run once")
+
+def insert_running(owner, lease_expires_at):
+    with transaction(generation_jobs.JOBS_DB_PATH) as conn:
+        return conn.execute("""
+        INSERT INTO generation_jobs (user_id, project_id, kind, params, status, created_at, started_at, owner, lease_expires_at)
+        VALUES ('lease', 1, 'model_design_doc', ?, 'running', ?, ?, ?, ?)
+        """, ('{"problem_def": "점유 확인 %s", "model_type": "분류"}' % owner, time.time(), time.time(), owner,
+              lease_expires_at)).lastrowid
+
+def check_expired_lease():
+    dead = insert_running("dead-process", time.time() - 1)
+    alive = insert_running("other-process", time.time() + 3600)
+    for _ in range(3):
+        generation_jobs.start_job_runner().wake()
+    wait_for(lambda: generation_jobs.get_job(dead)["status"] == "succeeded", message="만료된 작업이 다시 실행되지 않음")
+    assert generation_jobs.get_job(alive)["status"] == "running" and runs[alive] == 0, generation_jobs.get_job(alive)
+    with transaction(generation_jobs.JOBS_DB_PATH) as conn:
+        conn.execute("UPDATE generation_jobs SET lease_expires_at = ? WHERE id = ?", (time.time() - 1, alive))
+    generation_jobs.start_job_runner().wake()
+    wait_for(lambda: generation_jobs.get_job(alive)["status"] == "succeeded", message="기한이 지난 작업이 다시 실행되지 않음")
+    print(f"[lease] expired job requeued and run once, job with a live lease left alone until it expired")
+
+def check_cancel():
+    backend = CountingBackend(latency_median=4.0, latency_sigma=0, stream_chunks=80, ttft_fraction=0.02, output_tokens=2000)
+    gemini_agent.set_backend(backend)
+    job_id = submit("취소")
+    wait_for(lambda: (generation_jobs.get_job(job_id)["result"] or "") != "", message="부분 결과가 저장되지 않음")
+    assert generation_jobs.cancel_job(job_id)
+    wait_for(lambda: generation_jobs.get_job(job_id)["status"] == "cancelled", message="취소되지 않음")
+    cancelled_at = backend.yielded
+    time.sleep(1.0)  # 조각 간격은 약 50ms이므로, 업스트림이 계속 진행 중이면 그 사이 20개 가까이 더 받음
+    # 취소 시점에 이미 받고 있던 조각 하나까지는 나올 수 있음
+    stopped_at = backend.yielded
+    assert stopped_at <= cancelled_at + 1, f"취소 후에도 업스트림에서 계속 받음 ({cancelled_at} → {stopped_at})"
+    assert stopped_at < backend.stream_chunks, f"업스트림이 끝까지 진행됨 ({stopped_at}/{backend.stream_chunks})"
+    job = generation_jobs.get_job(job_id)
+    cache_key = llm_cache.make_cache_key(backend.model_name, gemini_agent._model_design_doc_prompt("문제 정의 취소", "분류"))
+    assert llm_cache.get_cached_response(cache_key) is None, "잘린 응답이 캐시에 저장됨"
+    assert gemini_agent._single_flight.in_flight() == 0
+    print(f"[cancel] upstream stopped after {stopped_at}/{backend.stream_chunks} chunks, partial result {len(job['result'])} chars kept")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--runners", type=int, default=3)
+    args = parser.parse_args()
+    generation_jobs.JOB_PROGRESS_INTERVAL_SECONDS = 0.1
+    generation_jobs.JOB_POLL_SECONDS = 0.1
+    generation_jobs.JOB_MAX_PENDING_PER_USER = args.jobs
+    gemini_agent.GEMINI_MAX_ATTEMPTS = 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        llm_telemetry.TELEMETRY_DB_PATH = os.path.join(tmp, "llm_telemetry.db")
+        generation_jobs.JOBS_DB_PATH = os.path.join(tmp, "generation_jobs.db")
+        count_runs()
+        check_single_execution(args.jobs, args.runners)
+        check_expired_lease()
+        check_cancel()
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/check_prompt_budget.py
+#
+# 토큰 예산을 넘는 긴 문서로 스트리밍 생성기를 호출할 때의 동작을 가짜 백엔드로 확인합니다.
+#   1) stream_*는 바로 돌아오고, 긴 문서의 map-reduce 요약은 스트림을 소비할 때 실행됨
+#      (st.write_stream(...)의 인자를 만드는 동안 LLM을 호출하지 않음). 요약 호출 기록도 해당 프로젝트로 남음
+#   2) 백엔드가 없으면 요약을 시도하지 않고(잘라서 쓰지도 않음) NO_BACKEND_MESSAGE를 돌려줌.
+#      _summarize_chunk / stream_job은 LLMCallError를 올림
+# 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/check_prompt_budget.py
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gemini_agent
+import llm_cache
+import llm_telemetry
+import persistence
+import prompt_budget
+from llm_backends import FakeLLMBackend
+
+class CountingBackend(FakeLLMBackend):
+    """generate/stream 호출 수를 셉니다."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def generate(self, prompt, timeout_seconds, response_schema=None):
+        self.calls += 1
+        return super().generate(prompt, timeout_seconds, response_schema)
+
+    def stream(self, prompt, timeout_seconds, response_schema=None):
+        self.calls += 1
+        return super().stream(prompt, timeout_seconds, response_schema)
+
+def long_document():
+    paragraphs = [f"### {n}. 섹션 {n}\n" + f"섹션 {n}의 요구사항과 수치 {n * 7}을 설명하는 문단입니다. " * 80 for n in range(1, 13)]
+    document = "\n\n".join(paragraphs)
+    assert prompt_budget.count_tokens(document) > prompt_budget.DOCUMENT_TOKEN_BUDGET
+    return document
+
+def check_deferred(document):
+    backend = CountingBackend(latency_median=0.2, latency_sigma=0, stream_chunks=4)
+    gemini_agent.set_backend(backend)
+    llm_telemetry.set_current_project(7)
+    started = time.perf_counter()
+    chunks = gemini_agent.stream_model_design_doc(document, "분류", use_cache=False)
+    returned_ms = (time.perf_counter() - started) * 1000
+    assert backend.calls == 0, f"스트림을 소비하기 전에 LLM을 {backend.calls}번 호출함"
+    text = "".join(chunks)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    summaries = backend.calls - 1
+    assert summaries >= 1 and text, (backend.calls, text[:80])
+    assert persistence.get_content_summary(document, prompt_budget.DOCUMENT_TOKEN_BUDGET) is not None, "요약이 저장되지 않음"
+    llm_telemetry.flush()
+    rows = llm_telemetry.get_connection(llm_telemetry.TELEMETRY_DB_PATH).execute(
+        "SELECT function, project_id FROM llm_calls").fetchall()
+    recorded = {tuple(row) for row in rows}
+    assert recorded == {("_summarize_chunk", 7), ("stream_model_design_doc", 7)}, recorded
+    print(f"[deferred] stream_model_design_doc returned in {returned_ms:.1f} ms with 0 calls; "
+          f"{summaries} summary calls + 1 generation ran while consuming ({elapsed_ms:.0f} ms)")
+
+def check_no_backend(document):
+    gemini_agent.set_backend(None)
+    printed = io.StringIO()
+    with contextlib.redirect_stdout(printed):
+        streamed = "".join(gemini_agent.stream_test_cases(document + " 변형", "정상 입력", use_cache=False))
+        generated = gemini_agent.generate_performance_report(document + " 변형", {"f1": 0.9}, use_cache=False)
+        reports = gemini_agent.generate_verification_reports(document, {"f1": 0.9}, document, "", "", "")
+    assert streamed == generated == gemini_agent.NO_BACKEND_MESSAGE, (streamed, generated)
+    assert {r["error"] for r in reports.values()} == {gemini_agent.NO_BACKEND_MESSAGE}, reports
+    assert "요약 실패" not in printed.getvalue(), printed.getvalue()
+    for call in (lambda: gemini_agent._summarize_chunk(document, 200),
+                 lambda: gemini_agent.stream_job("model_design_doc", {"problem_def": document, "model_type": "분류"})):
+        try:
+            call()
+        except gemini_agent.LLMCallError as e:
+            assert str(e) == gemini_agent.NO_BACKEND_MESSAGE
+        else:
+            raise AssertionError("백엔드가 없는데 오류가 나지 않음")
+    print("[no backend] no summarize attempt, no truncation; NO_BACKEND_MESSAGE / LLMCallError returned")
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence.DB_PATH = os.path.join(tmp, "mcp.db")
+        persistence.ARCHIVE_PATH = os.path.join(tmp, "archive.jsonl.gz")
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        llm_telemetry.TELEMETRY_DB_PATH = os.path.join(tmp, "llm_telemetry.db")
+        persistence.init_db()
+        document = long_document()
+        check_deferred(document)
+        check_no_backend(document)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# benchmarks/check_scoped_refine.py
+#
+# 부분 편집이 엉뚱한 섹션을 고치거나 행을 잃지 않는지, 정해진 응답을 돌려주는 백엔드로 확인합니다.
+#   0) 머리말이 있는 문서: 개요 번호가 제목 있는 섹션만 1부터 매겨지고, 분류 응답 "2"가 두 번째 제목 섹션을 가리킴
+#   1) 마크다운 왕복: 칸 안의 '|', 빈 칸, 줄바꿈이 있어도 test_cases_to_markdown → convert_markdown_to_df가 같은 표를 돌려줌.
+#      칸 수가 맞지 않는 행은 버리지 않고 ValueError
+#   2) TC_ID를 언급한 편집: 대상 행 자리에 결과 행이 들어가고, '|'가 든 다른 행과 빈 칸 행도 그대로 남음
+#   3) TC_ID 없는 표 전체 편집: 응답을 TC_ID 기준으로 끼워 넣어, 응답에서 빠진 행도 그대로 남음
+#   4) 검증에 실패한 응답: 오류를 돌려주고 표는 바꾸지 않음
+#   5) 섹션 편집 중 LLM 호출 실패: 오류 문구가 섹션 본문으로 끼워 넣어지지 않음
+#      (스트리밍은 LLMCallError, refine_content_scoped는 원문을 그대로 돌려줌. 모델 설계 페이지도 원문 유지)
+# 조건이 어긋나면 AssertionError로 종료합니다.
+#
+# 실행: python benchmarks/check_scoped_refine.py
+
+import json
+import os
+import sys
+import tempfile
+
+from google.api_core import exceptions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+import gemini_agent
+import generation_jobs
+from markdown_sections import split_sections, section_outline
+import llm_cache
+import llm_telemetry
+import persistence
+from llm_backends import LLMBackend, LLMResponse
+
+class ScriptedBackend(LLMBackend):
+    """프롬프트를 respond(prompt)에 넘겨 받은 텍스트를 그대로 돌려주는 백엔드."""
+
+    model_name = "scripted"
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.prompts = []
+
+    def generate(self, prompt, timeout_seconds, response_schema=None):
+        self.prompts.append(prompt)
+        return LLMResponse(self.respond(prompt))
+
+    def stream(self, prompt, timeout_seconds, response_schema=None):
+        yield self.generate(prompt, timeout_seconds, response_schema).text
+
+def case(tc_id, description, input, expected_output):
+    return {"tc_id": tc_id, "description": description, "input": input, "expected_output": expected_output}
+
+ORIGINAL = [
+    case("TC-001", "구분자 a|b 처리", '{"text": "a|b"}', '{"tokens": ["a", "b"]}'),
+    case("TC-002", "빈 입력", '{"text": ""}', '{"label": "없음"}'),
+    case("TC-003", "", '{"text": "설명 없는 행"}', '{"label": "x"}'),
+]
+
+PREAMBLE_DOC = """# 모델 설계서
+
+머리말입니다.
+
+### 1. 개요
+개요 본문
+
+### 2. 입력 및 출력 데이터 명세
+명세 본문
+
+### 3. 평가 지표
+지표 본문
+"""
+
+def check_preamble_outline():
+    sections = split_sections(PREAMBLE_DOC)
+    assert sections[0]["title"] is None, sections[0]
+    outline = section_outline(sections)
+    assert outline.splitlines()[0] == "1. 1. 개요", outline
+    gemini_agent.set_backend(ScriptedBackend(lambda prompt: "2"))
+    index = gemini_agent._classify_section(sections, "데이터 형식을 더 자세히 적어줘")
+    assert sections[index]["title"] == "2. 입력 및 출력 데이터 명세", sections[index]["title"]
+    # 지시문의 섹션 번호도 같은 기준 (제목 번호가 없는 문서에서도 머리말은 세지 않음)
+    plain = split_sections(PREAMBLE_DOC.replace("### 1. ", "### ").replace("### 2. ", "### ").replace("### 3. ", "### "))
+    matches = gemini_agent._match_sections(plain, "섹션 2의 표현을 다듬어줘")
+    assert [plain[i]["title"] for i in matches] == ["입력 및 출력 데이터 명세"], matches
+    print(f"[preamble] outline numbers titled sections only, answer 2 → '{sections[index]['title']}'")
+
+def check_markdown_round_trip():
+    df = gemini_agent.test_cases_to_df(ORIGINAL + [case("TC-004", "여러 줄\n설명", "{}", "{}")])
+    parsed = gemini_agent.convert_markdown_to_df(gemini_agent.test_cases_to_markdown(df))
+    assert len(parsed) == len(df), (len(parsed), len(df))
+    assert parsed.iloc[0]["입력값 (JSON)"] == '{"text": "a|b"}', parsed.iloc[0].tolist()
+    assert parsed.iloc[2]["테스트 설명"] == "", parsed.iloc[2].tolist()
+    assert parsed.iloc[3]["테스트 설명"] == "여러 줄<br>설명", parsed.iloc[3].tolist()
+    try:
+        gemini_agent.convert_markdown_to_df("| a | b |\n|---|---|\n| 1 | 2 | 3 |")
+    except ValueError as e:
+        print(f"[markdown] round trip OK, bad row → {e}")
+    else:
+        raise AssertionError("칸 수가 맞지 않는 행이 조용히 처리됨")
+
+def check_targeted_refine():
+    edited = case("TC-002", "빈 입력 (공백 포함)", '{"text": " | "}', '{"label": "없음"}')
+    added = case("TC-005", "빈 입력 변형", '{"text": "\\t"}', '{"label": "없음"}')
+    backend = ScriptedBackend(lambda prompt: json.dumps([edited, added], ensure_ascii=False))
+    gemini_agent.set_backend(backend)
+    df, errors, scope = gemini_agent.refine_test_cases(gemini_agent.test_cases_to_df(ORIGINAL), "TC-002에 공백 케이스를 추가해줘",
+                                                      use_cache=False)
+    assert not errors, errors
+    assert '"tc_id": "TC-001"' not in backend.prompts[0], "대상이 아닌 행을 보냄"
+    records = gemini_agent.df_to_test_cases(df)
+    assert [r["tc_id"] for r in records] == ["TC-001", "TC-002", "TC-005", "TC-003"], [r["tc_id"] for r in records]
+    assert records[0] == ORIGINAL[0] and records[3] == ORIGINAL[2], records
+    assert records[1] == edited and records[2] == added, records
+    print(f"[targeted] {scope}: {len(ORIGINAL)} → {len(records)} rows, untouched rows unchanged")
+
+def check_whole_table_refine():
+    # 모델이 TC-001, TC-003을 빠뜨리고 TC-002만 고친 뒤 새 행 하나를 붙인 응답
+    edited = case("TC-002", "빈 입력 처리", '{"text": ""}', '{"label": "없음", "score": 0}')
+    added = case("TC-006", "공백만 있는 입력", '{"text": "   "}', '{"label": "없음"}')
+    gemini_agent.set_backend(ScriptedBackend(lambda prompt: json.dumps([edited, added], ensure_ascii=False)))
+    df, errors, scope = gemini_agent.refine_test_cases(gemini_agent.test_cases_to_df(ORIGINAL), "예상 출력에 score를 추가해줘",
+                                                      use_cache=False)
+    assert not errors, errors
+    records = gemini_agent.df_to_test_cases(df)
+    assert [r["tc_id"] for r in records] == ["TC-001", "TC-002", "TC-006", "TC-003"], [r["tc_id"] for r in records]
+    assert records[0] == ORIGINAL[0] and records[3] == ORIGINAL[2], records
+    assert records[1] == edited and records[2] == added, records
+    print(f"[whole] {scope}: {len(ORIGINAL)} → {len(records)} rows")
+
+def check_invalid_response():
+    broken = [case("TC-001", "설명", "not json", "{}")]
+    gemini_agent.set_backend(ScriptedBackend(lambda prompt: json.dumps(broken, ensure_ascii=False)))
+    original = gemini_agent.test_cases_to_df(ORIGINAL)
+    df, errors, scope = gemini_agent.refine_test_cases(original, "설명을 다듬어줘", use_cache=False)
+    assert errors, "검증 실패가 보고되지 않음"
+    assert df.equals(original), "검증에 실패했는데 표가 바뀜"
+    print(f"[invalid] {scope}: table kept, errors: {errors}")
+
+def unavailable(prompt):
+    raise exceptions.ServiceUnavailable("백엔드 점검 중")
+
+def check_refine_failure():
+    gemini_agent.set_backend(ScriptedBackend(unavailable))
+    instruction = "평가 지표 섹션을 더 자세히 써줘"
+    scope, chunks, splice = gemini_agent.stream_refine_content_scoped(PREAMBLE_DOC, instruction, use_cache=False)
+    try:
+        "".join(chunks)
+    except gemini_agent.LLMCallError as e:
+        message = str(e)
+    else:
+        raise AssertionError("스트리밍 편집 실패가 응답 조각으로 섞여 나옴")
+    document, failed_scope = gemini_agent.refine_content_scoped(PREAMBLE_DOC, instruction, use_cache=False)
+    assert document == PREAMBLE_DOC, document
+    gemini_agent.set_backend(None)
+    _, chunks, _ = gemini_agent.stream_refine_content_scoped(PREAMBLE_DOC, instruction)
+    try:
+        list(chunks)
+    except gemini_agent.LLMCallError as e:
+        assert str(e) == gemini_agent.NO_BACKEND_MESSAGE, e
+    else:
+        raise AssertionError("백엔드가 없는데 오류가 나지 않음")
+    print(f"[failure] {scope}: stream raised '{message}', refine_content_scoped → {failed_scope}")
+
+def check_refine_failure_page(tmp):
+    from streamlit.testing.v1 import AppTest
+    persistence.DB_PATH = os.path.join(tmp, "mcp.db")
+    persistence.ARCHIVE_PATH = os.path.join(tmp, "archive.jsonl.gz")
+    persistence.init_db()
+    persistence.create_project("편집 실패", "섹션 편집 실패 확인")
+    project_id = persistence.get_all_projects()[0]["id"]
+    persistence.save_artifact(project_id, "PLANNING", "PROBLEM_DEF", "문제 정의")
+    gemini_agent.set_backend(ScriptedBackend(unavailable))
+    at = AppTest.from_file(os.path.join(ROOT, "pages", "3_모델_설계.py"))
+    at.session_state["selected_project_id"] = project_id
+    at.session_state["generated_design_doc"] = PREAMBLE_DOC
+    at.run(timeout=60)
+    at.text_input[0].input("평가 지표 섹션을 더 자세히 써줘").run(timeout=60)
+    at.button(key="custom_design").click()
+    at.run(timeout=60)
+    assert not at.exception, at.exception
+    assert at.session_state["generated_design_doc"] == PREAMBLE_DOC, at.session_state["generated_design_doc"]
+    assert any("원문을 그대로" in e.value for e in at.error), [e.value for e in at.error]
+    print("[failure page] model design page kept the document and showed st.error")
+
+def main():
+    gemini_agent.GEMINI_MAX_ATTEMPTS = 1
+    with tempfile.TemporaryDirectory() as tmp:
+        llm_cache.CACHE_DB_PATH = os.path.join(tmp, "llm_cache.db")
+        llm_telemetry.TELEMETRY_DB_PATH = os.path.join(tmp, "llm_telemetry.db")
+        generation_jobs.JOBS_DB_PATH = os.path.join(tmp, "generation_jobs.db")   # 페이지가 작업 실행기를 시작함
+        check_preamble_outline()
+        check_markdown_round_trip()
+        check_targeted_refine()
+        check_whole_table_refine()
+        check_invalid_response()
+        check_refine_failure()
+        check_refine_failure_page(tmp)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/fake_gemini_server.py
+#
+# Gemini REST API(generateContent / streamGenerateContent)를 흉내 내는 로컬 가짜 엔드포인트.
+# 지연, 429(Retry-After 포함), 503 장애를 비율로 주입할 수 있어 속도 제한/재시도/서킷 브레이커를
+# 실제 쿼터를 쓰지 않고 확인할 수 있습니다.
+#
+# 단독 실행: python benchmarks/fake_gemini_server.py --port 8765 --rate-limit-ratio 0.3
+# 앱 연결:   GEMINI_API_ENDPOINT=http://127.0.0.1:8765 streamlit run app.py  (secrets의 API 키는 아무 값이나)
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    """주입할 장애 설정과 요청 통계를 들고 있는 서버. 속성은 실행 중에도 바꿀 수 있습니다."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, rate_limit_ratio=0.0, retry_after=1, error_ratio=0.0, seed=None):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.error_ratio = error_ratio
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def endpoint(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+def _response_body(prompt):
+    text = f"가짜 응답입니다. (프롬프트 {len(prompt)}자)"
+    tokens = max(1, len(prompt) // 2)
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": tokens, "candidatesTokenCount": 16, "totalTokenCount": tokens + 16},
+    }
+
+class _Handler(BaseHTTPRequestHandler):
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server._count("requests")
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            roll = server.rng.random()
+        if roll < server.error_ratio:
+            server._count("errors")
+            self._send_json(503, {"error": {"code": 503, "message": "fake upstream outage", "status": "UNAVAILABLE"}})
+            return
+        if roll < server.error_ratio + server.rate_limit_ratio:
+            server._count("rate_limited")
+            self._send_json(429, {"error": {"code": 429, "message": "fake quota exceeded", "status": "RESOURCE_EXHAUSTED"}},
+                            headers={"Retry-After": str(server.retry_after)})
+            return
+        server._count("ok")
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        payload = _response_body(prompt)
+        # streamGenerateContent(REST)는 응답 조각들의 JSON 배열을 돌려줌
+        self._send_json(200, [payload] if ":streamGenerateContent" in self.path else payload)
+
+    def log_message(self, *args):
+        pass
+
+def start_fake_server(port=0, **options):
+    """백그라운드 스레드에서 가짜 서버를 띄우고 서버 객체를 반환합니다. 종료는 server.shutdown()."""
+    server = FakeGeminiServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-gemini", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeGeminiServer(("127.0.0.1", args.port), latency=args.latency, rate_limit_ratio=args.rate_limit_ratio,
+                              retry_after=args.retry_after, error_ratio=args.error_ratio)
+    print(f"fake Gemini endpoint listening on {server.endpoint}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(server.stats)
+
+if __name__ == "__main__":
+    main()
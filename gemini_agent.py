@@ -1,43 +1,366 @@
 # gemini_agent.py (타임아웃 설정 및 에러 핸들링 최종 버전)
 
+# google.generativeai, pandas, streamlit.secrets는 불러오는 데 시간이 오래 걸리므로 처음 사용할 때 불러옵니다.
+# (이 모듈을 임포트하는 모든 페이지의 첫 로딩이 빨라짐)
 import streamlit as st
-import google.generativeai as genai
 from google.api_core import exceptions
+import contextvars
+import hashlib
+import json
+import os
 import re
-import pandas as pd
+import threading
+import time
+import yaml
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import chain
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Union
+from llm_cache import make_cache_key, get_cached_response, store_response
+from llm_telemetry import traced, capture_context, record_call, set_current_function, reset_current_function
+from prompt_budget import build_prompt, count_tokens
+from llm_resilience import RateLimiter, CircuitBreaker, CircuitOpenError, RateLimitTimeout, SingleFlight, call_with_resilience
+from llm_backends import LLMBackend, GeminiBackend, FakeLLMBackend
+from markdown_sections import split_sections, join_sections, section_outline, titled_indexes, table_cells, escape_cell, TABLE_SEPARATOR
 
-# --- API 설정 ---
-try:
-    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-    GEMINI_ENABLED = True
-except (KeyError, AttributeError):
-    GEMINI_ENABLED = False
+if TYPE_CHECKING:
+    import pandas as pd
+
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+GENERATE_MANY_MAX_WORKERS = 4  # generate_many가 동시에 실행하는 최대 API 호출 수
+
+# --- 호출 보호 설정 (프로세스 전체 공유) ---
+GEMINI_REQUESTS_PER_MINUTE = 15
+GEMINI_TOKENS_PER_MINUTE = 1_000_000
+GEMINI_MAX_ATTEMPTS = 4           # 429/5xx 재시도 포함 최대 시도 횟수
+GEMINI_BACKOFF_BASE_SECONDS = 1.0
+GEMINI_BACKOFF_MAX_SECONDS = 30.0
+GEMINI_MAX_RETRY_AFTER_SECONDS = 60.0   # 서버가 이보다 오래 기다리라고 하면 재시도하지 않음
+GEMINI_RATE_LIMIT_WAIT_SECONDS = 60.0   # 속도 제한으로 기다리는 최대 시간
+GEMINI_CIRCUIT_FAILURE_THRESHOLD = 5
+GEMINI_CIRCUIT_RESET_SECONDS = 30.0
+
+_rate_limiter = None
+_circuit_breaker = None
+_single_flight = SingleFlight()   # 진행 중인 동일 요청(캐시 키 기준)을 하나의 호출로 합침
+
+# --- LLM 백엔드 ---
+NO_BACKEND_MESSAGE = "오류: Gemini API 키가 설정되지 않았습니다. Streamlit Cloud의 'Secrets'에서 API 키를 설정해주세요."
+_backend = None
+_backend_configured = False   # set_backend 호출 또는 기본 백엔드 생성 여부
+_backend_lock = threading.Lock()
+
+class LLMCallError(Exception):
+    """LLM 호출 실패. 메시지는 화면에 그대로 보여줄 수 있는 설명입니다. (결과를 원문에 반영하면 안 되는 호출에서 사용)"""
+
+def _create_default_backend():
+    """
+    환경에 맞는 기본 백엔드를 만듭니다. 처음 LLM을 호출할 때 한 번만 실행됩니다.
+    LLM_BACKEND=fake이면 API 키 없이 로컬 가짜 백엔드, secrets에 API 키가 없으면 None.
+    """
+    if os.environ.get("LLM_BACKEND") == "fake":
+        return FakeLLMBackend()
+    try:
+        api_key = st.secrets["GEMINI_API_KEY"]
+        # GEMINI_API_ENDPOINT를 지정하면 해당 주소(예: 로컬 가짜 엔드포인트)로 REST 요청을 보냅니다.
+        api_endpoint = os.environ.get("GEMINI_API_ENDPOINT") or st.secrets.get("GEMINI_API_ENDPOINT")
+    except (KeyError, AttributeError, FileNotFoundError):
+        # FileNotFoundError: secrets.toml 자체가 없는 경우 (StreamlitSecretNotFoundError)
+        return None
+    return GeminiBackend(GEMINI_MODEL_NAME, api_key=api_key, api_endpoint=api_endpoint)
+
+def get_backend():
+    """현재 LLM 백엔드를 반환합니다. 설정되지 않았으면 None. (처음 호출할 때 기본 백엔드를 만듦)"""
+    if not _backend_configured:
+        with _backend_lock:
+            if not _backend_configured:
+                set_backend(_create_default_backend())
+    return _backend
+
+def set_backend(backend):
+    """
+    LLM 백엔드를 교체합니다. (None이면 모든 호출이 설정 오류 메시지를 돌려줌)
+    서킷 브레이커는 새로 시작하고, 속도 제한은 backend.rate_limited인 경우에만 적용합니다.
+    LLMBackend가 아닌 객체는 첫 호출 때가 아니라 여기서 TypeError로 거부합니다.
+    """
+    global _backend, _backend_configured, _rate_limiter, _circuit_breaker
+    if backend is not None and not isinstance(backend, LLMBackend):
+        raise TypeError(f"LLMBackend 구현이 아닙니다: {type(backend).__name__}")
+    _backend = backend
+    _backend_configured = True
+    _rate_limiter = RateLimiter(GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE) if backend is not None and backend.rate_limited else None
+    _circuit_breaker = CircuitBreaker(GEMINI_CIRCUIT_FAILURE_THRESHOLD, GEMINI_CIRCUIT_RESET_SECONDS)
 
 # --- 내부 헬퍼 함수 ---
-def _call_gemini_with_timeout(prompt: str, timeout_seconds: int = 120) -> str:
+def _estimate_tokens(prompt: str) -> int:
+    return max(1, count_tokens(prompt))
+
+def _call_with_resilience(func, prompt: str):
+    """속도 제한, 429/5xx 재시도, 서킷 브레이커를 거쳐 func()를 실행합니다."""
+    return call_with_resilience(
+        func,
+        estimated_tokens=_estimate_tokens(prompt),
+        limiter=_rate_limiter,
+        breaker=_circuit_breaker,
+        max_attempts=GEMINI_MAX_ATTEMPTS,
+        backoff_base=GEMINI_BACKOFF_BASE_SECONDS,
+        backoff_max=GEMINI_BACKOFF_MAX_SECONDS,
+        max_retry_after=GEMINI_MAX_RETRY_AFTER_SECONDS,
+        limiter_timeout=GEMINI_RATE_LIMIT_WAIT_SECONDS,
+    )
+
+def _describe_error(e: Exception, timeout_seconds: int) -> str:
+    """호출 실패를 사용자에게 보여줄 메시지로 바꿉니다."""
+    if isinstance(e, exceptions.DeadlineExceeded):
+        return f"오류: API 요청 시간({timeout_seconds}초)이 초과되었습니다. 더 간단한 요청으로 다시 시도하거나, 네트워크 상태를 확인해주세요."
+    if isinstance(e, exceptions.TooManyRequests):
+        return "오류: Gemini API 요청 한도(쿼터)를 초과했습니다. 잠시 후 다시 시도해주세요."
+    if isinstance(e, (CircuitOpenError, RateLimitTimeout)):
+        return f"오류: {e}"
+    return f"LLM 호출 중 예상치 못한 오류가 발생했습니다: {e}"
+
+def _cache_params(response_schema: dict = None) -> dict:
+    return {"response_schema": response_schema} if response_schema is not None else None
+
+def _call_outcome(e: Exception) -> str:
+    """호출 기록(llm_telemetry)에 남길 실패 분류."""
+    if isinstance(e, exceptions.DeadlineExceeded):
+        return "timeout"
+    if isinstance(e, (exceptions.TooManyRequests, RateLimitTimeout)):
+        return "rate_limited"
+    if isinstance(e, CircuitOpenError):
+        return "circuit_open"
+    return "error"
+
+def _record_call(context: tuple, model: str, prompt: str, response_text: str, started: float, outcome: str, **fields):
+    """LLM 호출 하나를 기록합니다. 토큰 수는 count_tokens 추정치입니다(캐시 히트와 스트리밍에도 같은 기준)."""
+    function, project_id = context
+    elapsed = time.perf_counter() - started
+    record_call(function, project_id, model, _estimate_tokens(prompt), count_tokens(response_text or ""),
+                elapsed * 1000, outcome, started_at=time.time() - elapsed, **fields)
+
+def _generate_text(prompt: str, timeout_seconds: int, use_cache: bool, response_schema: dict = None) -> str:
+    """캐시 조회 후 LLM 백엔드를 호출하고 응답을 캐시에 저장합니다. 예외는 호출자에게 그대로 전달합니다."""
+    backend = get_backend()
+    if backend is None:
+        raise LLMCallError(NO_BACKEND_MESSAGE)
+    context = capture_context()
+    started = time.perf_counter()
+    cache_key = make_cache_key(backend.model_name, prompt, _cache_params(response_schema))
+    if use_cache:
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            _record_call(context, backend.model_name, prompt, cached, started, "ok", cache_hit=True)
+            return cached
+
+    # 같은 요청이 이미 진행 중이면 그 호출의 결과를 함께 받음 (스트리밍 호출에도 합류)
+    flight, leader = _single_flight.join(cache_key)
+    try:
+        if leader:
+            def produce(publish):
+                response = _call_with_resilience(lambda: backend.generate(prompt, timeout_seconds, response_schema), prompt)
+                # 성공한 응답만 캐시 (오류 문자열은 저장하지 않음)
+                store_response(cache_key, backend.model_name, response.text)
+                publish(response.text)
+            _single_flight.run(cache_key, flight, produce)
+        text = flight.result()
+    except Exception as e:
+        _record_call(context, backend.model_name, prompt, None, started, _call_outcome(e), error=e, coalesced=not leader)
+        raise
+    finally:
+        _single_flight.leave(cache_key, flight)
+    _record_call(context, backend.model_name, prompt, text, started, "ok", coalesced=not leader)
+    return text
+
+def _call_gemini_with_timeout(prompt: Union[str, Callable[[], str]], timeout_seconds: int = 120, use_cache: bool = True,
+                              response_schema: dict = None) -> str:
     """
     Gemini API 호출을 타임아웃과 함께 실행하고 예외를 처리하는 중앙 함수.
+    동일한 (모델, 프롬프트, 파라미터) 요청은 디스크 캐시에서 바로 응답하며, use_cache=False로 우회할 수 있습니다.
+    response_schema를 주면 그 스키마를 따르는 JSON 텍스트를 요청합니다(구조화 출력).
+    prompt가 함수이면 백엔드를 확인한 뒤에 호출해 프롬프트를 만듭니다. (긴 문서 요약을 백엔드 없이 시도하지 않도록)
     """
-    if not GEMINI_ENABLED:
-        return "오류: Gemini API 키가 설정되지 않았습니다. Streamlit Cloud의 'Secrets'에서 API 키를 설정해주세요."
-    
+    if get_backend() is None:
+        return NO_BACKEND_MESSAGE
+
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        # request_options를 사용하여 타임아웃 설정
-        response = model.generate_content(prompt, request_options={"timeout": timeout_seconds})
-        return response.text
-    except exceptions.DeadlineExceeded:
-        st.error(f"오류: API 요청 시간({timeout_seconds}초)이 초과되었습니다. 더 간단한 요청으로 다시 시도하거나, 네트워크 상태를 확인해주세요.")
+        if callable(prompt):
+            prompt = prompt()
+        return _generate_text(prompt, timeout_seconds, use_cache, response_schema)
+    except exceptions.DeadlineExceeded as e:
+        st.error(_describe_error(e, timeout_seconds))
         return "타임아웃 오류가 발생했습니다."
     except Exception as e:
-        # 그 외 모든 API 관련 예외 처리
-        st.error(f"LLM 호출 중 예상치 못한 오류가 발생했습니다: {e}")
+        # 그 외 모든 API 관련 예외 처리 (재시도 후에도 실패한 429/5xx, 서킷 차단 포함)
+        st.error(_describe_error(e, timeout_seconds))
         return f"오류 발생: {e}"
 
+def _stream_gemini_with_timeout(prompt: Union[str, Callable[[], str]], timeout_seconds: int = 120, use_cache: bool = True,
+                                response_schema: dict = None) -> Iterator[str]:
+    """
+    _call_gemini_with_timeout의 스트리밍 버전. 응답 조각을 도착하는 대로 yield합니다.
+    캐시 히트 시에는 저장된 전체 응답을 한 번에 돌려주고, 끝까지 성공한 응답만 캐시에 저장합니다.
+    prompt가 함수이면 프롬프트 조립(긴 문서의 map-reduce 요약 포함)도 스트림을 소비할 때 실행합니다.
+    """
+    # 제너레이터 본문은 소비될 때(st.write_stream 등) 실행되므로, 호출 맥락은 지금 잡아서 넘김
+    if callable(prompt):
+        return _stream_deferred(prompt, timeout_seconds, use_cache, response_schema, contextvars.copy_context())
+    return _stream_generate(prompt, timeout_seconds, use_cache, response_schema, capture_context())
+
+def _stream_deferred(make_prompt: Callable[[], str], timeout_seconds: int, use_cache: bool, response_schema: dict,
+                     ctx: contextvars.Context) -> Iterator[str]:
+    """
+    프롬프트를 첫 조각을 요청받을 때 만듭니다. 요약이 필요한 긴 문서도 st.write_stream(...)의 인자를 만드는 동안
+    화면을 막지 않고, 요약하는 동안에는 진행 표시를 보여줍니다. (짧은 문서는 spinner 표시 지연 안에 끝남)
+    """
+    if get_backend() is None:
+        yield NO_BACKEND_MESSAGE
+        return
+    with st.spinner("긴 문서를 요약해 프롬프트를 준비하는 중입니다..."):
+        prompt = ctx.run(make_prompt)
+    yield from _stream_generate(prompt, timeout_seconds, use_cache, response_schema, ctx.run(capture_context))
+
+def _stream_generate(prompt: str, timeout_seconds: int, use_cache: bool, response_schema: dict, context: tuple,
+                     raise_errors: bool = False, cancel: threading.Event = None) -> Iterator[str]:
+    """
+    raise_errors=True이면 오류를 화면에 표시하지 않고 예외로 올립니다. (화면이 없는 백그라운드 작업용)
+    cancel이 set된 상태에서 스트림을 닫으면, 같은 요청을 함께 받는 다른 호출자가 없을 때 업스트림 스트림도 중단합니다.
+    (cancel 없이 닫으면 업스트림은 끝까지 받아 캐시에 저장)
+    """
+    backend = get_backend()
+    if backend is None:
+        if raise_errors:
+            raise LLMCallError(NO_BACKEND_MESSAGE)
+        yield NO_BACKEND_MESSAGE
+        return
+
+    started = time.perf_counter()
+    cache_key = make_cache_key(backend.model_name, prompt, _cache_params(response_schema))
+    if use_cache:
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            _record_call(context, backend.model_name, prompt, cached, started, "ok", cache_hit=True, streamed=True)
+            yield cached
+            return
+
+    def open_stream():
+        # 첫 조각까지 받아야 연결 오류가 드러나므로, 재시도는 첫 조각을 받기 전까지만 적용
+        response = iter(backend.stream(prompt, timeout_seconds, response_schema))
+        return next(response, None), response
+
+    def produce(publish):
+        first, response = _call_with_resilience(open_stream, prompt)
+        parts = []
+        try:
+            for text in chain([first] if first is not None else [], response):
+                parts.append(text)
+                publish(text)
+        finally:
+            # 취소(FlightCancelled)나 오류로 멈추면 업스트림 스트림을 바로 닫아 더 받지 않음
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+        store_response(cache_key, backend.model_name, "".join(parts))
+
+    # 업스트림 스트림은 백그라운드 스레드가 끝까지 읽어 캐시에 저장하고, 호출자들은 그 조각을 구독함
+    # (같은 요청이 진행 중이면 처음부터 다시 받으며 합류, 중간에 페이지를 떠나도 응답은 캐시에 남음.
+    #  cancel로 취소하고 떠난 호출자가 마지막이면 업스트림도 중단)
+    flight, leader = _single_flight.join(cache_key)
+    if leader:
+        _single_flight.start(cache_key, flight, produce)
+    coalesced = not leader
+
+    chunks = []
+    first_chunk_ms = None
+    try:
+        for text in flight.subscribe():
+            if first_chunk_ms is None:
+                first_chunk_ms = (time.perf_counter() - started) * 1000
+            chunks.append(text)
+            yield text
+        _record_call(context, backend.model_name, prompt, "".join(chunks), started, "ok", streamed=True, first_chunk_ms=first_chunk_ms, coalesced=coalesced)
+    except GeneratorExit:
+        # 소비자가 스트림을 끝까지 읽지 않고 닫음 (페이지 이동 등)
+        _record_call(context, backend.model_name, prompt, "".join(chunks), started, "cancelled", streamed=True, first_chunk_ms=first_chunk_ms, coalesced=coalesced)
+        raise
+    except exceptions.DeadlineExceeded as e:
+        _record_call(context, backend.model_name, prompt, "".join(chunks), started, "timeout", streamed=True, first_chunk_ms=first_chunk_ms, error=e, coalesced=coalesced)
+        if raise_errors:
+            raise
+        st.error(_describe_error(e, timeout_seconds))
+        yield "\n\n타임아웃 오류가 발생했습니다."
+    except Exception as e:
+        _record_call(context, backend.model_name, prompt, "".join(chunks), started, _call_outcome(e), streamed=True, first_chunk_ms=first_chunk_ms, error=e, coalesced=coalesced)
+        if raise_errors:
+            raise
+        st.error(_describe_error(e, timeout_seconds))
+        yield f"\n\n오류 발생: {e}"
+    finally:
+        # 취소 플래그가 set된 채 떠나는 마지막 호출자이면 업스트림 호출도 중단
+        _single_flight.leave(cache_key, flight, cancel=cancel is not None and cancel.is_set())
+
+def _timed_generate(prompt: str, timeout_seconds: int, use_cache: bool, response_schema: dict = None) -> tuple:
+    started = time.perf_counter()
+    text = _generate_text(prompt, timeout_seconds, use_cache, response_schema)
+    return text, time.perf_counter() - started
+
+def _no_backend_results(names) -> dict:
+    return {name: {"text": None, "error": NO_BACKEND_MESSAGE, "elapsed": None} for name in names}
+
+def generate_many(prompts: dict, max_workers: int = GENERATE_MANY_MAX_WORKERS, timeout_seconds: int = 120, use_cache: bool = True,
+                  response_schema: dict = None) -> dict:
+    """
+    서로 독립적인 여러 생성 요청을 제한된 크기의 스레드 풀에서 동시에 실행합니다.
+    prompts는 {이름: 프롬프트}이고, 결과는 {이름: {"text": str|None, "error": str|None, "elapsed": float|None}}입니다.
+    일부 요청이 실패하거나 시간을 넘겨도 나머지 결과는 그대로 돌려주므로, 호출자는 error가 있는 항목만 다시 시도하면 됩니다.
+    작업 스레드에서는 st.* 를 호출하지 않으므로 오류 표시는 호출한 페이지가 담당합니다.
+    response_schema를 주면 모든 요청에 같은 구조화 출력 스키마를 적용합니다.
+    """
+    if not prompts:
+        return {}
+    if get_backend() is None:
+        return _no_backend_results(prompts)
+
+    workers = max(1, min(max_workers, len(prompts)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini")
+    # 작업마다 호출 맥락(contextvars)을 복사해 실행 → 호출 기록에 함수/프로젝트가 남음
+    futures = {executor.submit(contextvars.copy_context().run, _timed_generate, prompt, timeout_seconds, use_cache, response_schema): name
+               for name, prompt in prompts.items()}
+    # 각 호출은 request_options로 timeout_seconds에 묶이지만, 응답이 없는 연결에 대비해 전체 대기 시간도 제한
+    # (재시도와 속도 제한 대기를 감안한 상한)
+    rounds = -(-len(prompts) // workers)
+    task_budget = timeout_seconds * GEMINI_MAX_ATTEMPTS + GEMINI_RATE_LIMIT_WAIT_SECONDS
+    done, not_done = wait(futures, timeout=task_budget * rounds + 5)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for future, name in futures.items():
+        if future in not_done:
+            results[name] = {"text": None, "error": f"API 요청 시간({timeout_seconds}초)이 초과되었습니다.", "elapsed": None}
+            continue
+        try:
+            text, elapsed = future.result()
+            results[name] = {"text": text, "error": None, "elapsed": elapsed}
+        except Exception as e:
+            results[name] = {"text": None, "error": _describe_error(e, timeout_seconds), "elapsed": None}
+    return results
+
+@traced
+def _summarize_chunk(text: str, target_tokens: int) -> str:
+    """긴 문서의 한 조각을 target_tokens 안팎으로 요약합니다. (prompt_budget의 map 단계, 실패 시 예외 전달)"""
+    prompt = f"""
+    당신은 기술 문서 요약 전문가입니다.
+    아래 문서 조각을 약 {target_tokens} 토큰 이내로 요약해주세요. 제목 구조(###)와 수치, 고유명사, 요구사항은 빠뜨리지 말고,
+    요약문만 마크다운 형식으로 응답해주세요.
+
+    ---
+    {text}
+    ---
+    """
+    return _generate_text(prompt, timeout_seconds=120, use_cache=True)
+
 # --- 각 기능별 에이전트 함수 ---
 
-def generate_problem_definition(prompt_input: dict) -> str:
-    """사용자 입력을 바탕으로 문제정의서 내용을 생성합니다."""
+def _problem_definition_prompt(prompt_input: dict) -> str:
     use_case = prompt_input.get("use_case", "정의되지 않음")
     background = prompt_input.get("background", "정의되지 않음")
     expected_effect = prompt_input.get("expected_effect", "정의되지 않음")
@@ -64,11 +387,21 @@ def generate_problem_definition(prompt_input: dict) -> str:
     ### 4. 기대 효과
     (기대 효과를 정성적/정량적 관점에서 상세하게 기술)
     """
-    return _call_gemini_with_timeout(prompt)
+    return prompt
 
-def generate_model_design_doc(problem_def: str, model_type: str) -> str:
-    """문제정의서 내용과 모델 유형을 바탕으로 모델 설계서 초안을 생성합니다."""
-    prompt = f"""
+@traced
+def generate_problem_definition(prompt_input: dict, use_cache: bool = True) -> str:
+    """사용자 입력을 바탕으로 문제정의서 내용을 생성합니다."""
+    return _call_gemini_with_timeout(_problem_definition_prompt(prompt_input), use_cache=use_cache)
+
+@traced
+def stream_problem_definition(prompt_input: dict, use_cache: bool = True) -> Iterator[str]:
+    """generate_problem_definition의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(_problem_definition_prompt(prompt_input), use_cache=use_cache)
+
+def _model_design_doc_prompt(problem_def: str, model_type: str) -> str:
+    def render(problem_def: str) -> str:
+        return f"""
     당신은 머신러닝 모델을 설계하는 시니어 AI 아키텍트입니다.
     아래 주어진 '문제 정의'와 '모델 유형'을 바탕으로, 상세하고 전문적인 '모델 설계서'를 마크다운 형식으로 작성해주세요.
 
@@ -97,11 +430,22 @@ def generate_model_design_doc(problem_def: str, model_type: str) -> str:
     
     (이하 생략)
     """
-    return _call_gemini_with_timeout(prompt)
+    # 문서가 토큰 예산을 넘으면 요약본(산출물 버전별 캐시)을 넣음
+    return build_prompt(render, {"problem_def": problem_def}, _summarize_chunk)
 
-def generate_test_cases(design_doc: str, scenario: str, num_cases: int = 5) -> str:
-    """모델 설계서와 시나리오를 바탕으로 단위 테스트 케이스를 생성합니다."""
-    prompt = f"""
+@traced
+def generate_model_design_doc(problem_def: str, model_type: str, use_cache: bool = True) -> str:
+    """문제정의서 내용과 모델 유형을 바탕으로 모델 설계서 초안을 생성합니다."""
+    return _call_gemini_with_timeout(lambda: _model_design_doc_prompt(problem_def, model_type), use_cache=use_cache)
+
+@traced
+def stream_model_design_doc(problem_def: str, model_type: str, use_cache: bool = True) -> Iterator[str]:
+    """generate_model_design_doc의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(lambda: _model_design_doc_prompt(problem_def, model_type), use_cache=use_cache)
+
+def _test_cases_prompt(design_doc: str, scenario: str, num_cases: int = 5) -> str:
+    def render(design_doc: str) -> str:
+        return f"""
     당신은 QA(Quality Assurance) 전문가입니다.
     아래 주어진 '모델 설계서' 내용과 '테스트 시나리오'를 바탕으로, 모델의 기능을 검증하기 위한 구체적인 단위 테스트 케이스 {num_cases}개를 생성해주세요.
     결과는 반드시 마크다운 테이블 형식으로, "TC_ID", "테스트 설명", "입력값 (JSON)", "예상 출력값 (JSON)" 컬럼을 포함해야 합니다.
@@ -115,12 +459,271 @@ def generate_test_cases(design_doc: str, scenario: str, num_cases: int = 5) -> s
     ---
     (이하 생략)
     """
-    return _call_gemini_with_timeout(prompt)
+    return build_prompt(render, {"design_doc": design_doc}, _summarize_chunk)
 
-def generate_performance_report(design_doc: str, metrics: dict) -> str:
-    """모델 설계서와 성능 지표를 바탕으로 성능 평가 리포트를 생성합니다."""
-    metrics_str = "\n".join([f"- {key}: {value}" for key, value in metrics.items()])
+@traced
+def generate_test_cases(design_doc: str, scenario: str, num_cases: int = 5, use_cache: bool = True) -> str:
+    """모델 설계서와 시나리오를 바탕으로 단위 테스트 케이스를 생성합니다."""
+    return _call_gemini_with_timeout(lambda: _test_cases_prompt(design_doc, scenario, num_cases), use_cache=use_cache)
+
+@traced
+def stream_test_cases(design_doc: str, scenario: str, num_cases: int = 5, use_cache: bool = True) -> Iterator[str]:
+    """generate_test_cases의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(lambda: _test_cases_prompt(design_doc, scenario, num_cases), use_cache=use_cache)
+
+# --- 테스트 케이스 구조화 출력 (JSON 스키마 → 타입이 지정된 DataFrame) ---
+# JSON 필드 이름 → 화면/저장에 쓰는 컬럼 이름 (마크다운 표 방식과 같은 컬럼)
+TEST_CASE_COLUMNS = {
+    "tc_id": "TC_ID",
+    "description": "테스트 설명",
+    "input": "입력값 (JSON)",
+    "expected_output": "예상 출력값 (JSON)",
+}
+TEST_CASE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "tc_id": {"type": "string", "description": "TC-001 형식의 고유 ID"},
+            "description": {"type": "string", "description": "테스트 설명"},
+            "input": {"type": "string", "description": "모델 입력값 (JSON 문자열)"},
+            "expected_output": {"type": "string", "description": "예상 출력값 (JSON 문자열)"},
+        },
+        "required": list(TEST_CASE_COLUMNS),
+    },
+}
+TEST_CASE_MAX_REASKS = 1   # 검증에 실패한 항목만 골라 다시 요청하는 최대 횟수
+
+def _test_cases_json_prompt(design_doc: str, scenario: str, num_cases: int = 5, extra_instruction: str = "") -> str:
+    def render(design_doc: str) -> str:
+        return f"""
+    당신은 QA(Quality Assurance) 전문가입니다.
+    아래 주어진 '모델 설계서' 내용과 '테스트 시나리오'를 바탕으로, 모델의 기능을 검증하기 위한 구체적인 단위 테스트 케이스 {num_cases}개를 생성해주세요.
+    결과는 JSON 배열로만 응답하고, 각 항목은 tc_id(TC-001 형식), description, input, expected_output 필드를 가져야 합니다.
+    input과 expected_output은 모델의 입력/출력을 나타내는 JSON 문자열입니다.
+    {extra_instruction}
+
+    ---
+    **[모델 설계서]**
+    {design_doc}
+    ---
+    **[테스트 시나리오]**
+    {scenario}
+    ---
+    """
+    return build_prompt(render, {"design_doc": design_doc}, _summarize_chunk)
+
+@traced
+def generate_test_cases_json(design_doc: str, scenario: str, num_cases: int = 5, use_cache: bool = True) -> str:
+    """테스트 케이스를 TEST_CASE_SCHEMA를 따르는 JSON 텍스트로 생성합니다. parse_test_cases로 DataFrame을 만듭니다."""
+    return _call_gemini_with_timeout(lambda: _test_cases_json_prompt(design_doc, scenario, num_cases), use_cache=use_cache,
+                                     response_schema=TEST_CASE_SCHEMA)
+
+@traced
+def stream_test_cases_json(design_doc: str, scenario: str, num_cases: int = 5, use_cache: bool = True) -> Iterator[str]:
+    """generate_test_cases_json의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(lambda: _test_cases_json_prompt(design_doc, scenario, num_cases), use_cache=use_cache,
+                                       response_schema=TEST_CASE_SCHEMA)
+
+def _load_json_array(text: str):
+    """응답 텍스트에서 JSON 배열을 읽습니다. 코드 블록(```json)으로 감싼 응답도 허용합니다. 실패 시 ValueError."""
+    body = text.strip()
+    if body.startswith("```"):
+        body = body.split("\n", 1)[1] if "\n" in body else ""
+        body = body.rsplit("```", 1)[0]
+    data = json.loads(body)
+    if isinstance(data, dict) and isinstance(data.get("test_cases"), list):
+        data = data["test_cases"]
+    if not isinstance(data, list):
+        raise ValueError("응답이 JSON 배열이 아닙니다.")
+    return data
+
+def _validate_test_case(item) -> tuple:
+    """항목 하나를 검증합니다. 반환값: (정규화된 dict 또는 None, 오류 메시지 목록)"""
+    if not isinstance(item, dict):
+        return None, ["객체가 아닙니다."]
+    record, errors = {}, []
+    for field in TEST_CASE_COLUMNS:
+        value = item.get(field)
+        # 스키마 없이 생성된 응답은 input/expected_output을 객체로 줄 수 있으므로 JSON 문자열로 정규화
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            errors.append(f"'{field}' 필드가 비어 있습니다.")
+            continue
+        record[field] = str(value).strip()
+    for field in ("input", "expected_output"):
+        if field in record:
+            try:
+                json.loads(record[field])
+            except ValueError:
+                errors.append(f"'{field}'가 올바른 JSON 문자열이 아닙니다: {record[field][:80]}")
+    return (record if not errors else None), errors
+
+def _reask_test_cases_prompt(items: list, errors: dict) -> str:
+    problems = "\n".join(f"- {index + 1}번 항목: {' '.join(messages)}" for index, messages in errors.items())
     prompt = f"""
+    아래 테스트 케이스 JSON 항목들이 검증에 실패했습니다. 지적된 문제만 고쳐서, 같은 순서의 JSON 배열로 같은 개수만큼 응답해주세요.
+    각 항목은 tc_id, description, input, expected_output 필드를 가지며 input과 expected_output은 JSON 문자열입니다.
+
+    [검증 오류]
+    {problems}
+
+    [문제 항목]
+    {json.dumps(items, ensure_ascii=False, indent=2)}
+    """
+    return prompt
+
+def _reask_json_prompt(raw: str, error: Exception) -> str:
+    return f"""
+    아래 테스트 케이스 응답은 JSON으로 해석되지 않습니다 ({error}).
+    내용은 유지하고 올바른 JSON 배열(tc_id, description, input, expected_output)로만 다시 응답해주세요.
+
+    {raw}
+    """
+
+def test_cases_to_df(records: list) -> "pd.DataFrame":
+    """검증된 항목들을 문자열 타입 컬럼의 DataFrame으로 만듭니다."""
+    import pandas as pd
+    df = pd.DataFrame(records, columns=list(TEST_CASE_COLUMNS)).rename(columns=TEST_CASE_COLUMNS)
+    return df.astype("string")
+
+@traced
+def parse_test_cases(raw: str, use_cache: bool = True) -> tuple:
+    """
+    JSON 응답을 한 번에 검증해 DataFrame으로 만듭니다. 행을 조용히 버리지 않고, 검증에 실패한 항목만
+    오류 내용과 함께 다시 요청해(최대 TEST_CASE_MAX_REASKS회) 제자리에 채워 넣습니다.
+    반환값: (DataFrame, 끝내 해결되지 않은 오류 메시지 목록)
+    """
+    try:
+        items = _load_json_array(raw)
+    except ValueError as e:
+        # 잘린/깨진 JSON이면 전체를 한 번 고쳐 받음. JSON처럼 보이지도 않으면(오류 메시지 등) 재요청하지 않음
+        if not raw.strip().lstrip("`json \n").startswith(("[", "{")):
+            return test_cases_to_df([]), [f"응답을 JSON으로 해석할 수 없습니다: {e}"]
+        try:
+            items = _load_json_array(_generate_text(_reask_json_prompt(raw, e), timeout_seconds=120,
+                                                    use_cache=use_cache, response_schema=TEST_CASE_SCHEMA))
+        except Exception as retry_error:
+            return test_cases_to_df([]), [f"응답을 JSON으로 해석할 수 없습니다: {retry_error}"]
+
+    records = [None] * len(items)
+    errors = {}
+    for index, item in enumerate(items):
+        records[index], messages = _validate_test_case(item)
+        if messages:
+            errors[index] = messages
+
+    for _ in range(TEST_CASE_MAX_REASKS):
+        if not errors:
+            break
+        indexes = list(errors)
+        try:
+            fixed = _load_json_array(_generate_text(_reask_test_cases_prompt([items[i] for i in indexes], errors),
+                                                    timeout_seconds=120, use_cache=use_cache,
+                                                    response_schema=TEST_CASE_SCHEMA))
+        except Exception as e:
+            print(f"테스트 케이스 재요청 실패: {e}")
+            break
+        for index, item in zip(indexes, fixed):
+            items[index] = item
+            records[index], messages = _validate_test_case(item)
+            if messages:
+                errors[index] = messages
+            else:
+                del errors[index]
+
+    # 중복 TC_ID는 뒤에 나온 항목에 접미사를 붙여 구분 (행은 버리지 않음)
+    seen = set()
+    for record in records:
+        if record is None:
+            continue
+        base, suffix = record["tc_id"], 2
+        while record["tc_id"] in seen:
+            record["tc_id"] = f"{base}-{suffix}"
+            suffix += 1
+        seen.add(record["tc_id"])
+
+    unresolved = [f"{index + 1}번 항목: {' '.join(messages)}" for index, messages in errors.items()]
+    return test_cases_to_df([record for record in records if record is not None]), unresolved
+
+# --- 대량 테스트 케이스 생성 (시나리오 × 샤드 병렬 생성 → 중복 제거 → 병합) ---
+TEST_CASE_SCENARIOS = ("정상적인 입력값에 대한 기본 기능 검증", "일반적인 예외 상황 처리 검증", "부적절한 입력에 대한 방어 능력 검증")
+TEST_CASE_SHARD_SIZE = 25   # 호출 1회에 요청하는 최대 케이스 수 (이보다 크면 응답이 잘리거나 시간이 초과되기 쉬움)
+
+def _plan_test_case_shards(scenarios: list, num_cases: int, shard_size: int) -> list:
+    """num_cases를 시나리오별로 고르게 나누고, 각 시나리오를 shard_size 이하의 샤드로 쪼갭니다. 반환값: [(시나리오, 샤드 번호, 샤드 수, 케이스 수)]"""
+    plan = []
+    base, remainder = divmod(num_cases, len(scenarios))
+    for position, scenario in enumerate(scenarios):
+        count = base + (1 if position < remainder else 0)
+        shard_count = -(-count // shard_size)
+        for shard in range(shard_count):
+            size = count // shard_count + (1 if shard < count % shard_count else 0)
+            plan.append((scenario, shard + 1, shard_count, size))
+    return plan
+
+def _normalize_test_input(value: str) -> str:
+    """중복 판정용 입력값 정규화: JSON이면 키를 정렬하고, 연속된 공백은 하나로 줄이며, 대소문자는 구분하지 않습니다."""
+    try:
+        value = json.dumps(json.loads(value), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        pass
+    return " ".join(value.split()).lower()
+
+@traced
+def generate_test_case_suite(design_doc: str, scenarios: list, num_cases: int, shard_size: int = TEST_CASE_SHARD_SIZE,
+                             max_workers: int = GENERATE_MANY_MAX_WORKERS, use_cache: bool = True) -> tuple:
+    """
+    수백 개 규모의 회귀 테스트 스위트를 한 번에 만듭니다. 요청을 시나리오 × 샤드로 나눠 generate_many로 동시에 생성하고,
+    정규화한 입력값의 해시가 같은 케이스는 처음 나온 것만 남긴 뒤 하나의 DataFrame으로 합칩니다.
+    TC_ID는 (시나리오 순서, 샤드 순서, 응답 내 순서)대로 TC-001부터 다시 매기므로, 같은 요청(캐시 히트 포함)에는 항상 같은 ID가 붙습니다.
+    반환값: (DataFrame, {"requested", "generated", "duplicates", "errors"})
+    """
+    plan = _plan_test_case_shards(list(scenarios), num_cases, shard_size)
+    if get_backend() is None:
+        # 프롬프트를 만들기 전에 확인 (백엔드 없이 긴 설계서 요약을 시도하지 않도록)
+        return test_cases_to_df([]), {"requested": num_cases, "generated": 0, "duplicates": 0, "errors": [NO_BACKEND_MESSAGE]}
+    # 프롬프트는 메인 스레드에서 순서대로 만들므로, 긴 설계서 요약은 첫 샤드에서 한 번만 생성되고 이후 캐시에서 재사용됨
+    prompts, sizes = {}, {}
+    for scenario, shard, shard_count, size in plan:
+        extra = "" if shard_count == 1 else (
+            f"이 요청은 같은 시나리오를 {shard_count}개로 나눈 것 중 {shard}번째 묶음입니다. "
+            f"다른 묶음과 겹치지 않도록 {shard}번째 관점(입력 유형, 경계값, 데이터 분포 등)의 케이스를 만들어주세요.")
+        prompts[(scenario, shard)] = _test_cases_json_prompt(design_doc, scenario, size, extra)
+        sizes[(scenario, shard)] = size
+
+    results = generate_many(prompts, max_workers=max_workers, use_cache=use_cache, response_schema=TEST_CASE_SCHEMA)
+
+    records, errors, seen, duplicates = [], [], set(), 0
+    for (scenario, shard), result in results.items():
+        label = f"[{scenario} #{shard}]"
+        if result["error"]:
+            errors.append(f"{label} {result['error']}")
+            continue
+        df, shard_errors = parse_test_cases(result["text"], use_cache=use_cache)
+        errors.extend(f"{label} {message}" for message in shard_errors)
+        # 요청보다 많이 생성한 샤드는 앞에서부터 요청한 개수만 사용 (시나리오 간 비율 유지)
+        for row in df.head(sizes[(scenario, shard)]).itertuples(index=False):
+            record = dict(zip(TEST_CASE_COLUMNS, row))
+            digest = hashlib.sha256(_normalize_test_input(record["input"]).encode("utf-8")).hexdigest()
+            if digest in seen:
+                duplicates += 1
+                continue
+            seen.add(digest)
+            records.append(record)
+
+    width = max(3, len(str(len(records))))
+    for number, record in enumerate(records, start=1):
+        record["tc_id"] = f"TC-{number:0{width}d}"
+    report = {"requested": num_cases, "generated": len(records), "duplicates": duplicates, "errors": errors}
+    return test_cases_to_df(records), report
+
+def _performance_report_prompt(design_doc: str, metrics: dict) -> str:
+    metrics_str = "\n".join([f"- {key}: {value}" for key, value in metrics.items()])
+
+    def render(design_doc: str) -> str:
+        return f"""
     당신은 데이터 과학자이자 성능 분석 전문가입니다.
     아래 주어진 '모델 설계서'의 내용과 실제 '성능 평가 결과'를 종합하여, 상세하고 전문적인 '성능 평가 리포트'를 마크다운 형식으로 작성해주세요.
     
@@ -133,11 +736,21 @@ def generate_performance_report(design_doc: str, metrics: dict) -> str:
     ---
     (이하 생략)
     """
-    return _call_gemini_with_timeout(prompt)
+    return build_prompt(render, {"design_doc": design_doc}, _summarize_chunk)
 
-def generate_trustworthy_report(problem_def: str, fairness_input: str, explainability_input: str, robustness_input: str) -> str:
-    """Trustworthy AI 검증 항목들을 바탕으로 종합 리스크 분석 리포트를 생성합니다."""
-    prompt = f"""
+@traced
+def generate_performance_report(design_doc: str, metrics: dict, use_cache: bool = True) -> str:
+    """모델 설계서와 성능 지표를 바탕으로 성능 평가 리포트를 생성합니다."""
+    return _call_gemini_with_timeout(lambda: _performance_report_prompt(design_doc, metrics), use_cache=use_cache)
+
+@traced
+def stream_performance_report(design_doc: str, metrics: dict, use_cache: bool = True) -> Iterator[str]:
+    """generate_performance_report의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(lambda: _performance_report_prompt(design_doc, metrics), use_cache=use_cache)
+
+def _trustworthy_report_prompt(problem_def: str, fairness_input: str, explainability_input: str, robustness_input: str) -> str:
+    def render(problem_def: str) -> str:
+        return f"""
     당신은 AI 거버넌스 및 윤리 리스크 전문 컨설턴트입니다.
     아래 주어진 '프로젝트 개요'와 '신뢰성 검증 결과'를 종합하여, 이 AI 모델의 잠재적 리스크와 규정 준수 관련 사항을 분석하는 'Trustworthy AI 검증 리포트'를 마크다운 형식으로 작성해주세요.
     
@@ -152,10 +765,29 @@ def generate_trustworthy_report(problem_def: str, fairness_input: str, explainab
     ---
     (이하 생략)
     """
-    return _call_gemini_with_timeout(prompt)
+    return build_prompt(render, {"problem_def": problem_def}, _summarize_chunk)
 
-def refine_content(original_text: str, instruction: str) -> str:
-    """원본 텍스트를 주어진 지시에 따라 수정(Refine)합니다."""
+@traced
+def generate_trustworthy_report(problem_def: str, fairness_input: str, explainability_input: str, robustness_input: str, use_cache: bool = True) -> str:
+    """Trustworthy AI 검증 항목들을 바탕으로 종합 리스크 분석 리포트를 생성합니다."""
+    return _call_gemini_with_timeout(lambda: _trustworthy_report_prompt(problem_def, fairness_input, explainability_input, robustness_input), use_cache=use_cache)
+
+@traced
+def stream_trustworthy_report(problem_def: str, fairness_input: str, explainability_input: str, robustness_input: str, use_cache: bool = True) -> Iterator[str]:
+    """generate_trustworthy_report의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(lambda: _trustworthy_report_prompt(problem_def, fairness_input, explainability_input, robustness_input), use_cache=use_cache)
+
+@traced
+def generate_verification_reports(design_doc: str, metrics: dict, problem_def: str, fairness_input: str, explainability_input: str, robustness_input: str, use_cache: bool = True) -> dict:
+    """성능 평가 리포트(PERF_REPORT)와 Trustworthy AI 검증 리포트(TRUST_REPORT)를 동시에 생성합니다. 결과 형식은 generate_many와 같습니다."""
+    if get_backend() is None:
+        return _no_backend_results(["PERF_REPORT", "TRUST_REPORT"])
+    return generate_many({
+        "PERF_REPORT": _performance_report_prompt(design_doc, metrics),
+        "TRUST_REPORT": _trustworthy_report_prompt(problem_def, fairness_input, explainability_input, robustness_input),
+    }, use_cache=use_cache)
+
+def _refine_prompt(original_text: str, instruction: str) -> str:
     prompt = f"""
     당신은 뛰어난 문서 편집 전문가(Expert Editor)입니다.
     아래에 주어진 "원본 텍스트"를 "편집 지시"에 따라 수정하여, 완성된 결과물만 응답해주세요.
@@ -168,39 +800,264 @@ def refine_content(original_text: str, instruction: str) -> str:
     {original_text}
     ---
     """
-    return _call_gemini_with_timeout(prompt)
+    return prompt
+
+@traced
+def refine_content(original_text: str, instruction: str, use_cache: bool = True) -> str:
+    """원본 텍스트를 주어진 지시에 따라 수정(Refine)합니다."""
+    return _call_gemini_with_timeout(_refine_prompt(original_text, instruction), use_cache=use_cache)
+
+@traced
+def stream_refine_content(original_text: str, instruction: str, use_cache: bool = True) -> Iterator[str]:
+    """refine_content의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(_refine_prompt(original_text, instruction), use_cache=use_cache)
+
+# --- 부분 편집: 지시가 가리키는 ### 섹션이나 표 행만 보내고 결과를 원문에 다시 끼워 넣음 ---
+SECTION_REFERENCE = re.compile(r"(?:섹션|항목|파트)\s*(\d+)|(\d+)\s*(?:번|장|절)")
 
-def convert_markdown_to_df(markdown_table: str) -> pd.DataFrame:
-    """마크다운 테이블 형식의 문자열을 Pandas DataFrame으로 변환합니다."""
+def _core_title(title: str) -> str:
+    """'3. 입력 및 출력 데이터 명세' → '입력 및 출력 데이터 명세'"""
+    return re.sub(r"^\s*\d+(?:\.\d+)*\.?\s*", "", title).strip()
+
+def _match_sections(sections: list, instruction: str) -> set:
+    """지시문에 번호("3번", "섹션 3")나 제목으로 언급된 섹션의 인덱스들."""
+    titled = titled_indexes(sections)
+    matches = set()
+    for match in SECTION_REFERENCE.finditer(instruction):
+        number = match.group(1) or match.group(2)
+        numbered = [i for i in titled if re.match(rf"\s*{number}\.", sections[i]["title"])]
+        if numbered:
+            matches.update(numbered)
+        elif 1 <= int(number) <= len(titled):
+            matches.add(titled[int(number) - 1])
+    for i in titled:
+        core = _core_title(sections[i]["title"])
+        if len(core) >= 2 and core in instruction:
+            matches.add(i)
+    return matches
+
+@traced
+def _classify_section(sections: list, instruction: str) -> Optional[int]:
+    """제목만으로 특정할 수 없을 때, 개요만 보내 대상 섹션 번호 하나를 고르게 합니다. (응답은 숫자 하나)"""
+    titled = titled_indexes(sections)
+    prompt = f"""
+    아래는 마크다운 문서의 섹션 목록과 편집 지시입니다.
+    편집 지시가 수정하려는 섹션의 번호 하나만 숫자로 답하세요. 문서 전체에 해당하거나 하나로 정할 수 없으면 0이라고 답하세요.
+
+    [섹션 목록]
+    {section_outline(sections)}
+
+    [편집 지시]
+    {instruction}
+    """
     try:
-        lines = markdown_table.strip().split('\n')
-        # 테이블의 헤더와 데이터를 분리 (구분선 라인 제거)
-        header_line = lines[0]
-        data_lines = lines[2:]
-
-        # 헤더 파싱
-        headers = [h.strip() for h in header_line.split('|') if h.strip()]
-        
-        # 데이터 파싱
-        data = []
-        for line in data_lines:
-            row = [d.strip() for d in line.split('|') if d.strip()]
-            if len(row) == len(headers):
-                data.append(row)
-        
-        df = pd.DataFrame(data, columns=headers)
-        return df
+        answer = _generate_text(prompt, timeout_seconds=30, use_cache=True)
     except Exception as e:
-        print(f"DataFrame 변환 오류: {e}")
-        return pd.DataFrame()
+        print(f"편집 대상 섹션 판별 실패, 문서 전체를 편집합니다: {e}")
+        return None
+    match = re.search(r"\d+", answer)
+    number = int(match.group(0)) if match else 0
+    return titled[number - 1] if 1 <= number <= len(titled) else None
+
+def _section_refine_prompt(sections: list, index: int, instruction: str) -> str:
+    prompt = f"""
+    당신은 뛰어난 문서 편집 전문가(Expert Editor)입니다.
+    아래는 긴 문서 중 한 섹션입니다. "문서 개요"를 참고하여 "편집 지시"에 따라 "대상 섹션"만 수정하고,
+    수정된 섹션만 응답해주세요. 제목 줄(###)은 그대로 유지하고, 다른 섹션의 내용은 쓰지 마세요.
 
-def generate_governance_summary(mcp_context: dict, check_results: list) -> str:
+    ---
+    **[문서 개요]**
+    {section_outline(sections)}
+    ---
+    **[편집 지시]**
+    {instruction}
+    ---
+    **[대상 섹션]**
+    {sections[index]["text"]}
+    ---
     """
-    MCP 컨텍스트와 자동 점검 결과를 바탕으로 종합 거버넌스 리포트를 생성합니다.
+    return prompt
+
+def _splice_section(sections: list, index: int, generated: str) -> str:
+    """생성된 섹션을 원래 자리에 끼워 넣습니다. 섹션 뒤 빈 줄은 원문 그대로 유지합니다."""
+    original = sections[index]["text"]
+    body = generated.strip("\n")
+    heading = original.splitlines()[0]
+    if sections[index]["title"] and not body.lstrip().startswith("###"):
+        body = f"{heading}\n{body}"
+    trailing = original[len(original.rstrip("\n")):]
+    updated = list(sections)
+    updated[index] = {"title": sections[index]["title"], "text": body + (trailing or "\n")}
+    return join_sections(updated)
+
+def _plan_scoped_refine(original_text: str, instruction: str) -> tuple:
+    """(편집 범위 설명, 프롬프트, 결과를 전체 문서로 되돌리는 함수)를 정합니다."""
+    sections = split_sections(original_text)
+    if sum(1 for s in sections if s["title"]) >= 2:
+        matches = _match_sections(sections, instruction)
+        index = matches.pop() if len(matches) == 1 else _classify_section(sections, instruction)
+        if index is not None:
+            return (f"섹션 '{sections[index]['title']}'",
+                    _section_refine_prompt(sections, index, instruction),
+                    lambda generated: _splice_section(sections, index, generated))
+    return "문서 전체", _refine_prompt(original_text, instruction), lambda generated: generated
+
+@traced
+def refine_content_scoped(original_text: str, instruction: str, use_cache: bool = True) -> tuple:
+    """
+    지시가 가리키는 ### 섹션만 다시 생성해 원문에 끼워 넣습니다. 대상을 정할 수 없으면 문서 전체를 수정합니다.
+    반환값: (수정된 전체 문서, 편집 범위 설명)
+    """
+    scope, prompt, splice = _plan_scoped_refine(original_text, instruction)
+    # 실패 시 오류 문구가 섹션 본문으로 끼워 넣어지지 않도록, 오류 문자열을 돌려주는 _call_gemini_with_timeout 대신 직접 호출
+    if get_backend() is None:
+        st.error(NO_BACKEND_MESSAGE)
+        return original_text, f"{scope} (편집 실패, 원문 유지)"
+    try:
+        generated = _generate_text(prompt, timeout_seconds=120, use_cache=use_cache)
+    except Exception as e:
+        st.error(_describe_error(e, 120))
+        return original_text, f"{scope} (편집 실패, 원문 유지)"
+    return splice(generated), scope
+
+def _stream_or_raise(prompt: str, timeout_seconds: int, use_cache: bool, context: tuple) -> Iterator[str]:
+    """_stream_gemini_with_timeout과 같지만 오류를 응답 조각으로 섞지 않고 LLMCallError로 올립니다."""
+    if get_backend() is None:
+        raise LLMCallError(NO_BACKEND_MESSAGE)
+    try:
+        yield from _stream_generate(prompt, timeout_seconds, use_cache, None, context, raise_errors=True)
+    except Exception as e:
+        raise LLMCallError(_describe_error(e, timeout_seconds)) from e
+
+@traced
+def stream_refine_content_scoped(original_text: str, instruction: str, use_cache: bool = True) -> tuple:
+    """
+    refine_content_scoped의 스트리밍 버전. 반환값: (편집 범위 설명, 대상 부분의 텍스트 조각 iterator, splice 함수)
+    스트리밍이 끝나면 splice(생성된 텍스트)로 수정된 전체 문서를 얻습니다.
+    호출이 실패하면 iterator가 LLMCallError를 올리므로, 이때는 splice하지 말고 원문을 그대로 두어야 합니다.
+    """
+    scope, prompt, splice = _plan_scoped_refine(original_text, instruction)
+    return scope, _stream_or_raise(prompt, 120, use_cache, capture_context()), splice
+
+def _test_case_refine_prompt(records: list, all_ids: list, instruction: str, whole: bool) -> str:
+    if whole:
+        task = """아래는 테스트 케이스 목록 전체입니다. "편집 지시"를 수행한 '수정된 전체 테스트 케이스 목록'을 JSON 배열로 응답해주세요."""
+    else:
+        task = """아래는 테스트 케이스 목록 중 편집 대상 항목들입니다. "편집 지시"를 수행한 결과 항목들만 JSON 배열로 응답해주세요.
+    편집 대상 항목은 수정하지 않더라도 빠짐없이 포함하고, 새로 추가하는 항목은 그 뒤에 붙여주세요."""
+    prompt = f"""
+    당신은 QA(Quality Assurance) 전문가입니다.
+    {task}
+    각 항목은 tc_id, description, input, expected_output 필드를 가지며 input과 expected_output은 JSON 문자열입니다.
+    새 항목의 tc_id는 "전체 TC_ID 목록"과 겹치지 않게 정해주세요.
+
+    ---
+    **[전체 TC_ID 목록]**
+    {", ".join(all_ids)}
+    ---
+    **[편집 지시]**
+    {instruction}
+    ---
+    **[{"테스트 케이스 목록" if whole else "편집 대상 항목"}]**
+    {json.dumps(records, ensure_ascii=False, indent=2)}
+    ---
+    """
+    return prompt
+
+def _mentions_id(instruction: str, row_id: str) -> bool:
+    # 'TC-01'이 'TC-010'에 걸리지 않도록 앞뒤 영숫자 경계를 확인 (한글 조사는 허용: 'TC-001과')
+    return re.search(rf"(?<![0-9A-Za-z]){re.escape(row_id)}(?![0-9A-Za-z])", instruction) is not None
+
+def df_to_test_cases(df: "pd.DataFrame") -> list:
+    """화면의 테스트 케이스 DataFrame을 JSON 필드 이름의 dict 목록으로 바꿉니다. 빈 칸(NA)은 빈 문자열."""
+    fields = {column: field for field, column in TEST_CASE_COLUMNS.items()}
+    return [{fields.get(column, column): value for column, value in row.items()}
+            for row in df.astype("string").fillna("").to_dict("records")]
+
+def _splice_by_id(records: list, refined: list) -> tuple:
+    """
+    표 전체 편집 결과를 TC_ID 기준으로 원래 표에 끼워 넣습니다. 응답에 있는 기존 ID의 행은 제자리에서 교체하고,
+    새 ID의 행은 응답에서 바로 앞에 있던 기존 행 뒤에(앞에 기존 행이 없으면 표 끝에) 붙입니다.
+    응답에서 빠진 기존 행은 지우지 않고 그대로 둡니다. 반환값: (행 목록, 그대로 둔 기존 행 수)
+    """
+    original_ids = {record["tc_id"] for record in records}
+    updates = {record["tc_id"]: record for record in refined if record["tc_id"] in original_ids}
+    added_after, anchor = {}, None
+    for record in refined:
+        if record["tc_id"] in original_ids:
+            anchor = record["tc_id"]
+        else:
+            added_after.setdefault(anchor, []).append(record)
+    spliced = []
+    for record in records:
+        spliced.append(updates.get(record["tc_id"], record))
+        spliced.extend(added_after.pop(record["tc_id"], []))
+    spliced.extend(added_after.pop(None, []))
+    omitted = sum(1 for record in records if record["tc_id"] not in updates)
+    return spliced, omitted
+
+@traced
+def refine_test_cases(df: "pd.DataFrame", instruction: str, use_cache: bool = True) -> tuple:
+    """
+    테스트 케이스 표를 수정합니다. 행을 JSON 레코드로 보내고 TEST_CASE_SCHEMA 구조화 출력으로 받아
+    parse_test_cases로 검증하므로, 칸 안의 '|'나 빈 칸 때문에 행이 사라지지 않습니다.
+    지시에 TC_ID가 언급되면 해당 행만 보내고, 돌아온 행들로 그 자리를 교체합니다. 언급이 없으면 표 전체를 보내되,
+    결과는 TC_ID 기준으로 끼워 넣어 응답에서 빠진 행도 잃지 않습니다. (_splice_by_id)
+    반환값: (수정된 DataFrame, 오류 메시지 목록, 편집 범위 설명). 오류가 있으면 원래 표를 그대로 돌려줍니다.
+    """
+    records = df_to_test_cases(df)
+    all_ids = [record.get("tc_id", "") for record in records]
+    targets = [i for i, record in enumerate(records) if record.get("tc_id") and _mentions_id(instruction, record["tc_id"])]
+    whole = not targets
+    scope = "표 전체" if whole else f"행 {', '.join(records[i]['tc_id'] for i in targets)}"
+    sent = records if whole else [records[i] for i in targets]
+    prompt = _test_case_refine_prompt(sent, all_ids, instruction, whole)
+    try:
+        raw = _call_gemini_with_timeout(prompt, use_cache=use_cache, response_schema=TEST_CASE_SCHEMA)
+    except Exception as e:
+        return df, [f"편집 요청 실패: {e}"], scope
+    refined_df, errors = parse_test_cases(raw, use_cache=use_cache)
+    if errors:
+        # 검증에 실패한 항목이 하나라도 있으면 일부 행만 바뀌거나 사라지지 않도록 표 전체를 그대로 둠
+        return df, errors, scope
+    refined = [dict(zip(TEST_CASE_COLUMNS, row)) for row in refined_df.itertuples(index=False)]
+    if whole:
+        spliced, omitted = _splice_by_id(records, refined)
+        if omitted:
+            scope += f" (응답에 없던 기존 행 {omitted}개는 그대로 유지, 행 삭제는 표에서 직접)"
+        return test_cases_to_df(spliced), [], scope
+    # 첫 번째 대상 행 자리에 결과 행들을 넣고, 나머지 대상 행은 제거
+    kept = [record for i, record in enumerate(records) if i not in targets]
+    insert_at = targets[0]
+    return test_cases_to_df(kept[:insert_at] + refined + kept[insert_at:]), [], scope
+
+def test_cases_to_markdown(df: "pd.DataFrame") -> str:
+    """DataFrame을 마크다운 표로 만듭니다. 칸 안의 '|'와 줄바꿈은 이스케이프해 표가 깨지지 않게 합니다."""
+    return df.astype("string").fillna("").map(escape_cell).to_markdown(index=False)
+
+def convert_markdown_to_df(markdown_table: str) -> "pd.DataFrame":
+    """
+    마크다운 테이블 형식의 문자열을 Pandas DataFrame으로 변환합니다. 이스케이프되지 않은 '|'로만 칸을 나누고
+    빈 칸도 유지합니다. 칸 수가 헤더와 다른 행이 있으면 행을 버리지 않고 ValueError를 올립니다.
     """
-    if not GEMINI_ENABLED:
-        return "오류: Gemini API 키가 설정되지 않았습니다."
+    import pandas as pd
+    lines = [line for line in markdown_table.strip().split('\n') if line.strip()]
+    if len(lines) < 2 or not TABLE_SEPARATOR.match(lines[1]):
+        raise ValueError("마크다운 표가 아닙니다.")
+    # 테이블의 헤더와 데이터를 분리 (구분선 라인 제거)
+    headers = table_cells(lines[0])
+    data, bad_lines = [], []
+    for number, line in enumerate(lines[2:], start=3):
+        row = table_cells(line)
+        if len(row) == len(headers):
+            data.append(row)
+        else:
+            bad_lines.append(f"{number}번째 줄: 칸 {len(row)}개 (헤더 {len(headers)}개)")
+    if bad_lines:
+        raise ValueError("표를 해석할 수 없는 행이 있습니다. " + ", ".join(bad_lines))
+    return pd.DataFrame(data, columns=headers)
 
+def _governance_summary_prompt(mcp_context: dict, check_results: list) -> str:
     # 분석에 필요한 정보들을 문자열로 변환
     mcp_str = yaml.dump(mcp_context, allow_unicode=True, default_flow_style=False)
     check_str = "\n".join(check_results)
@@ -225,6 +1082,46 @@ def generate_governance_summary(mcp_context: dict, check_results: list) -> str:
     2.  **주요 리스크 분석:** '자동 점검 결과'에서 "미흡" 또는 "주의"로 표시된 항목들을 중심으로, 이것이 비즈니스, 법률, 윤리적 관점에서 어떤 구체적인 위험을 초래할 수 있는지 심층적으로 분석해주세요.
     3.  **실행 가능한 권고안 (Actionable Recommendations):** 식별된 리스크를 해결하기 위해 개발팀이나 현업 부서가 즉시 수행해야 할 구체적인 조치들을 3~5가지 항목으로 제시해주세요.
     """
-    
-    # _call_gemini_with_timeout 함수를 사용하여 안정적으로 호출
-    return _call_gemini_with_timeout(prompt)
+    return prompt
+
+@traced
+def generate_governance_summary(mcp_context: dict, check_results: list, use_cache: bool = True) -> str:
+    """
+    MCP 컨텍스트와 자동 점검 결과를 바탕으로 종합 거버넌스 리포트를 생성합니다.
+    """
+    return _call_gemini_with_timeout(_governance_summary_prompt(mcp_context, check_results), use_cache=use_cache)
+
+@traced
+def stream_governance_summary(mcp_context: dict, check_results: list, use_cache: bool = True) -> Iterator[str]:
+    """generate_governance_summary의 스트리밍 버전. 생성되는 텍스트 조각을 도착하는 대로 돌려줍니다."""
+    return _stream_gemini_with_timeout(_governance_summary_prompt(mcp_context, check_results), use_cache=use_cache)
+
+# --- 백그라운드 작업용 생성 (generation_jobs에서 사용) ---
+# 작업 종류 → 응답 스키마. 프롬프트는 _{종류}_prompt(**params)로 만들며, params는 generate_{종류}의 인자와 같습니다.
+JOB_KINDS = {
+    "problem_definition": None,
+    "model_design_doc": None,
+    "test_cases_json": TEST_CASE_SCHEMA,
+    "performance_report": None,
+    "trustworthy_report": None,
+    "governance_summary": None,
+}
+
+def stream_job(kind: str, params: dict, timeout_seconds: int = 120, use_cache: bool = True,
+               cancel: threading.Event = None) -> Iterator[str]:
+    """
+    generate_{kind}(**params)와 같은 내용을 스트리밍으로 생성합니다. 화면 없이 실행되므로 오류는 예외로 올립니다.
+    호출 기록에는 generate_{kind}로 남습니다. cancel을 set한 뒤 스트림을 닫으면 업스트림 호출도 중단됩니다.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"지원하지 않는 작업 종류입니다: {kind}")
+    if get_backend() is None:
+        raise LLMCallError(NO_BACKEND_MESSAGE)
+    token = set_current_function(f"generate_{kind}")
+    try:
+        prompt = globals()[f"_{kind}_prompt"](**params)
+        context = capture_context()
+    finally:
+        reset_current_function(token)
+    return _stream_generate(prompt, timeout_seconds, use_cache, JOB_KINDS[kind], context, raise_errors=True, cancel=cancel)
+
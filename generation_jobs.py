@@ -0,0 +1,319 @@
+# generation_jobs.py (백그라운드 생성 작업 큐)
+#
+# 페이지는 생성 요청을 작업으로 등록만 하고, 실제 LLM 호출은 스크립트 스레드 밖의 작업 스레드들이 실행합니다.
+# 작업 상태와 결과(진행 중에는 지금까지 받은 부분 결과)는 SQLite에 저장되므로, rerun·페이지 이동·연결 끊김과
+# 관계없이 작업이 계속되고 나중에 결과를 가져갈 수 있습니다.
+#   - 상태: queued → running → succeeded / failed / cancelled
+#   - 사용자별 동시 실행 수는 JOB_MAX_RUNNING_PER_USER로 제한 (초과분은 대기열에서 차례를 기다림)
+#   - 실행 중 취소는 다음 응답 조각을 받을 때 반영되며, 업스트림 LLM 스트림도 함께 닫습니다.
+#   - 작업은 조건부 UPDATE(status = 'queued')로 한 작업 스레드만 가져가고, 가져간 스레드(owner)가 점유 기한(lease)을
+#     하트비트로 연장합니다. 프로세스가 죽어 기한이 지난 작업만 대기열로 돌아가 다른 작업 스레드가 다시 실행합니다.
+# 작업 스레드는 프로세스당 한 번 시작되며, 여러 프로세스(레플리카)가 같은 작업 DB를 함께 써도 같은 작업을 중복 실행하지 않습니다.
+
+import contextvars
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+from persistence import get_connection, transaction, retry_on_locked
+from llm_telemetry import set_current_project
+from gemini_agent import JOB_KINDS, stream_job
+
+JOBS_DB_PATH = "database/generation_jobs.db"
+JOB_WORKERS = 4                       # 프로세스 전체 작업 스레드 수
+JOB_MAX_RUNNING_PER_USER = 2          # 사용자별 동시 실행 작업 수
+JOB_MAX_PENDING_PER_USER = 10         # 사용자별 대기 + 실행 중 작업 수 상한
+JOB_PROGRESS_INTERVAL_SECONDS = 1.0   # 부분 결과 저장 및 취소 요청 확인 주기
+JOB_POLL_SECONDS = 1.0                # 새 작업이 없을 때 대기열을 다시 확인하는 주기
+JOB_RETENTION_DAYS = 7                # 끝난 작업은 이 기간이 지나면 삭제
+JOB_LEASE_SECONDS = 60                # 실행 중인 작업의 점유 기한. 이 기간 동안 하트비트가 없으면 다른 작업 스레드가 다시 실행
+JOB_HEARTBEAT_SECONDS = 15            # 점유 기한 연장 주기 (JOB_LEASE_SECONDS보다 충분히 짧게)
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+class JobLimitError(Exception):
+    """사용자의 대기/실행 중 작업 수가 상한에 도달해 새 작업을 등록할 수 없을 때 발생합니다."""
+
+class JobLeaseLost(Exception):
+    """점유 기한이 지나 작업이 다른 작업 스레드로 넘어갔을 때 발생합니다. 원래 스레드는 결과를 기록하지 않고 중단합니다."""
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+def _ensure_schema():
+    if JOBS_DB_PATH in _initialized_paths:
+        return
+    with _init_lock:
+        if JOBS_DB_PATH in _initialized_paths:
+            return
+        jobs_dir = os.path.dirname(JOBS_DB_PATH)
+        if jobs_dir:
+            os.makedirs(jobs_dir, exist_ok=True)
+        with transaction(JOBS_DB_PATH) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS generation_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                project_id INTEGER,
+                kind TEXT NOT NULL,
+                label TEXT,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                lease_expires_at REAL
+            )
+            """)
+            # 점유 컬럼이 없던 작업 DB에 컬럼 추가
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(generation_jobs)")}
+            for column, definition in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE generation_jobs ADD COLUMN {column} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs (status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_generation_jobs_project ON generation_jobs (project_id, kind, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_generation_jobs_user ON generation_jobs (user_id, status)")
+            conn.execute(f"DELETE FROM generation_jobs WHERE status IN {FINISHED_STATUSES} AND finished_at < ?",
+                         (time.time() - JOB_RETENTION_DAYS * 86400,))
+        _initialized_paths.add(JOBS_DB_PATH)
+
+# --- 작업 등록, 취소, 조회 ---
+@retry_on_locked
+def submit_job(user_id, project_id, kind, params, label=None):
+    """
+    생성 작업을 대기열에 넣고 작업 id를 반환합니다. params는 gemini_agent.generate_{kind}의 인자(use_cache 제외)입니다.
+    사용자의 대기/실행 중 작업이 JOB_MAX_PENDING_PER_USER개 이상이면 JobLimitError.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"지원하지 않는 작업 종류입니다: {kind}")
+    _ensure_schema()
+    with transaction(JOBS_DB_PATH) as conn:
+        pending = conn.execute(
+            f"SELECT COUNT(*) FROM generation_jobs WHERE user_id = ? AND status IN {ACTIVE_STATUSES}", (user_id,)
+        ).fetchone()[0]
+        if pending >= JOB_MAX_PENDING_PER_USER:
+            raise JobLimitError(f"대기 중이거나 실행 중인 작업이 {pending}개입니다. 작업이 끝난 뒤 다시 등록해주세요.")
+        cursor = conn.execute("""
+        INSERT INTO generation_jobs (user_id, project_id, kind, label, params, status, created_at)
+        VALUES (?, ?, ?, ?, ?, 'queued', ?)
+        """, (user_id, project_id, kind, label, json.dumps(params, ensure_ascii=False), time.time()))
+        job_id = cursor.lastrowid
+    start_job_runner().wake()
+    return job_id
+
+@retry_on_locked
+def cancel_job(job_id):
+    """
+    작업을 취소합니다. 대기 중이면 바로 취소되고, 실행 중이면 다음 응답 조각에서 업스트림 호출과 함께 중단됩니다.
+    이미 끝났으면 False.
+    """
+    _ensure_schema()
+    with transaction(JOBS_DB_PATH) as conn:
+        cancelled = conn.execute(
+            "UPDATE generation_jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        ).rowcount
+        if cancelled:
+            return True
+        return conn.execute(
+            "UPDATE generation_jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,)
+        ).rowcount > 0
+
+def _job_row(row):
+    job = dict(row)
+    if "params" in job:
+        job["params"] = json.loads(job["params"])
+    return job
+
+@retry_on_locked
+def get_job(job_id):
+    """작업 하나를 결과 본문까지 포함해 반환합니다. 없으면 None."""
+    _ensure_schema()
+    row = get_connection(JOBS_DB_PATH).execute("SELECT * FROM generation_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_row(row) if row else None
+
+@retry_on_locked
+def list_jobs(project_id=None, kind=None, user_id=None, limit=20):
+    """작업 목록(최신순). 본문 대신 지금까지 받은 결과 길이(result_chars)만 담습니다."""
+    _ensure_schema()
+    conditions, params = [], []
+    for column, value in (("project_id", project_id), ("kind", kind), ("user_id", user_id)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = get_connection(JOBS_DB_PATH).execute(f"""
+    SELECT id, user_id, project_id, kind, label, status, error, cancel_requested, created_at, started_at, finished_at,
+           COALESCE(length(result), 0) AS result_chars
+    FROM generation_jobs {where}
+    ORDER BY id DESC LIMIT ?
+    """, (*params, limit)).fetchall()
+    return [dict(row) for row in rows]
+
+# --- 작업 실행 ---
+def _requeue_expired_jobs(conn, now):
+    """점유 기한이 지난 실행 중 작업(작업 스레드가 있던 프로세스가 죽음)을 대기열로 되돌립니다. 취소 요청된 작업은 취소로 끝냅니다."""
+    expired = "status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+    conn.execute(f"""
+    UPDATE generation_jobs SET status = 'cancelled', finished_at = ?, owner = NULL, lease_expires_at = NULL
+    WHERE {expired} AND cancel_requested = 1
+    """, (now, now))
+    conn.execute(f"""
+    UPDATE generation_jobs SET status = 'queued', started_at = NULL, result = NULL, owner = NULL, lease_expires_at = NULL
+    WHERE {expired}
+    """, (now,))
+
+@retry_on_locked
+def _claim_next_job(owner):
+    """
+    실행할 수 있는 가장 오래된 대기 작업을 owner의 점유로 running으로 바꾸고 반환합니다. 사용자별 동시 실행 수 제한을 지킵니다.
+    상태 변경은 status = 'queued'일 때만 적용되는 조건부 UPDATE이므로, 다른 프로세스가 먼저 가져간 작업은 가져가지 않습니다.
+    """
+    with transaction(JOBS_DB_PATH) as conn:
+        now = time.time()
+        _requeue_expired_jobs(conn, now)
+        row = conn.execute("""
+        SELECT j.* FROM generation_jobs j
+        WHERE j.status = 'queued'
+          AND (SELECT COUNT(*) FROM generation_jobs r WHERE r.user_id = j.user_id AND r.status = 'running') < ?
+        ORDER BY j.id LIMIT 1
+        """, (JOB_MAX_RUNNING_PER_USER,)).fetchone()
+        if row is None:
+            return None
+        claimed = conn.execute("""
+        UPDATE generation_jobs SET status = 'running', owner = ?, lease_expires_at = ?, started_at = ?
+        WHERE id = ? AND status = 'queued'
+        """, (owner, now + JOB_LEASE_SECONDS, now, row["id"])).rowcount
+        return _job_row(row) if claimed else None
+
+@retry_on_locked
+def _renew_leases(owner):
+    """owner가 실행 중인 작업들의 점유 기한을 연장합니다."""
+    with transaction(JOBS_DB_PATH) as conn:
+        conn.execute("UPDATE generation_jobs SET lease_expires_at = ? WHERE owner = ? AND status = 'running'",
+                     (time.time() + JOB_LEASE_SECONDS, owner))
+
+@retry_on_locked
+def _save_progress(job_id, owner, partial_result):
+    """부분 결과를 저장하고, 취소 요청 여부를 반환합니다. 작업이 더 이상 owner의 점유가 아니면 JobLeaseLost."""
+    with transaction(JOBS_DB_PATH) as conn:
+        updated = conn.execute(
+            "UPDATE generation_jobs SET result = ? WHERE id = ? AND owner = ? AND status = 'running'", (partial_result, job_id, owner)
+        ).rowcount
+        if not updated:
+            raise JobLeaseLost(f"작업 {job_id}의 점유가 만료되었습니다.")
+        return bool(conn.execute("SELECT cancel_requested FROM generation_jobs WHERE id = ?", (job_id,)).fetchone()[0])
+
+@retry_on_locked
+def _finish_job(job_id, owner, status, result, error=None):
+    """작업 결과를 기록합니다. 점유가 만료되어 다른 스레드로 넘어간 작업은 덮어쓰지 않습니다."""
+    with transaction(JOBS_DB_PATH) as conn:
+        conn.execute("""
+        UPDATE generation_jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL
+        WHERE id = ? AND owner = ? AND status = 'running'
+        """, (status, result, error, time.time(), job_id, owner))
+
+def _run_job(job, owner):
+    """
+    작업 하나를 실행합니다. 응답 조각을 받는 동안 JOB_PROGRESS_INTERVAL_SECONDS마다 부분 결과 저장과 취소 확인을 합니다.
+    취소되거나 점유를 잃으면 취소 플래그를 세우고 스트림을 닫아, 업스트림 LLM 호출도 더 받지 않게 합니다.
+    """
+    set_current_project(job["project_id"])  # 호출 기록에 작업의 프로젝트를 남김
+    chunks = []
+    cancel = threading.Event()
+    try:
+        stream = stream_job(job["kind"], job["params"], cancel=cancel)
+        next_progress = time.monotonic() + JOB_PROGRESS_INTERVAL_SECONDS
+        for chunk in stream:
+            chunks.append(chunk)
+            if time.monotonic() >= next_progress:
+                next_progress = time.monotonic() + JOB_PROGRESS_INTERVAL_SECONDS
+                if _save_progress(job["id"], owner, "".join(chunks)):
+                    cancel.set()
+                    stream.close()
+                    _finish_job(job["id"], owner, "cancelled", "".join(chunks))
+                    return
+    except JobLeaseLost:
+        # 다른 작업 스레드가 처음부터 다시 실행 중이므로 결과를 기록하지 않음
+        cancel.set()
+        stream.close()
+        return
+    except Exception as e:
+        _finish_job(job["id"], owner, "failed", "".join(chunks) or None, f"{type(e).__name__}: {e}")
+        return
+    _finish_job(job["id"], owner, "succeeded", "".join(chunks))
+
+class JobRunner:
+    """대기열에서 작업을 꺼내 실행하는 작업 스레드 묶음. submit_job이 wake()로 깨우고, 그 외에는 주기적으로 확인합니다."""
+
+    def __init__(self, workers=JOB_WORKERS):
+        # 작업 점유자 id: 프로세스(레플리카)마다, 같은 프로세스에서도 JobRunner마다 다름
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Condition()
+        self._pending_wakeups = 0
+        self._threads = [threading.Thread(target=self._loop, name=f"generation-job-{i}", daemon=True) for i in range(workers)]
+        self._threads.append(threading.Thread(target=self._heartbeat, name="generation-job-heartbeat", daemon=True))
+
+    def start(self):
+        # 이전 프로세스에서 실행 중이던 작업은 점유 기한이 지나면 _claim_next_job이 대기열로 되돌림
+        # (다른 프로세스가 아직 실행 중인 작업은 건드리지 않음)
+        _ensure_schema()
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                _renew_leases(self.owner)
+            except Exception as e:
+                print(f"생성 작업 점유 연장 오류: {e}")
+
+    def wake(self):
+        with self._wakeup:
+            self._pending_wakeups += 1
+            self._wakeup.notify()
+
+    def _wait(self):
+        with self._wakeup:
+            if not self._pending_wakeups:
+                self._wakeup.wait(JOB_POLL_SECONDS)
+            self._pending_wakeups = max(0, self._pending_wakeups - 1)
+
+    def _loop(self):
+        while True:
+            try:
+                job = _claim_next_job(self.owner)
+            except Exception as e:
+                print(f"생성 작업 대기열 조회 오류: {e}")
+                job = None
+            if job is None:
+                self._wait()
+                continue
+            # 작업마다 새 맥락에서 실행 (프로젝트 등 호출 기록용 맥락이 다른 작업으로 새지 않도록)
+            try:
+                contextvars.Context().run(_run_job, job, self.owner)
+            except Exception as e:
+                print(f"생성 작업 {job['id']} 상태 저장 오류: {e}")
+            # 끝난 작업 때문에 사용자별 제한에 걸려 있던 작업이 실행될 수 있으므로 다른 스레드도 깨움
+            self.wake()
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def start_job_runner():
+    """작업 스레드들을 (프로세스당 한 번) 시작하고 JobRunner를 반환합니다."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner().start()
+        return _runner
@@ -0,0 +1,54 @@
+# history_view.py (각 페이지의 "저장된 ... 이력" 섹션 공통 렌더러)
+
+import streamlit as st
+from persistence import get_artifact_history, get_artifact_content, count_artifacts, HISTORY_PAGE_SIZE
+
+def _format_size(size):
+    if size is None:
+        return "-"
+    if size < 1024:
+        return f"{size} B"
+    return f"{size / 1024:.1f} KB"
+
+def render_artifact_history(project_id, type, empty_message, language=None):
+    """
+    산출물 이력을 페이지 단위로 그립니다.
+    목록은 메타데이터(id, 생성일, 크기)만 조회하고, 본문은 expander를 연 버전에 대해서만 불러옵니다.
+    language를 지정하면 st.code로, 지정하지 않으면 st.markdown으로 본문을 표시합니다.
+    """
+    total = count_artifacts(project_id, type)
+    if total == 0:
+        st.info(empty_message)
+        return
+
+    # 페이지별 keyset 커서 스택 (첫 페이지는 None)
+    state_key = f"history_cursors_{project_id}_{type}"
+    cursors = st.session_state.setdefault(state_key, [None])
+    page_index = len(cursors) - 1
+    items, next_cursor = get_artifact_history(project_id, type, limit=HISTORY_PAGE_SIZE, cursor=cursors[-1])
+    # 버전 번호는 전체 버전 수와 현재 페이지 위치로 계산
+    offset = page_index * HISTORY_PAGE_SIZE
+
+    for i, item in enumerate(items):
+        version = total - (offset + i)
+        expander = st.expander(
+            f"버전 {version} ({item['created_at']}, {_format_size(item['size'])})",
+            key=f"history_{item['id']}",
+            on_change="rerun",
+        )
+        if expander.open:
+            with expander:
+                content = get_artifact_content(item['id'])
+                if language:
+                    st.code(content, language=language)
+                else:
+                    st.markdown(content)
+
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    if col_prev.button("◀ 최신 버전", key=f"{state_key}_prev", disabled=page_index == 0, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    col_info.caption(f"전체 {total}개 버전 중 {offset + 1}–{offset + len(items)}")
+    if col_next.button("이전 버전 ▶", key=f"{state_key}_next", disabled=next_cursor is None, use_container_width=True):
+        cursors.append(next_cursor)
+        st.rerun()
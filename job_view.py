@@ -0,0 +1,79 @@
+# job_view.py (각 페이지의 "백그라운드 생성 작업" 섹션 공통 렌더러)
+
+import uuid
+from datetime import datetime
+
+import streamlit as st
+from generation_jobs import submit_job, cancel_job, get_job, list_jobs, start_job_runner, JobLimitError, ACTIVE_STATUSES
+
+JOB_PANEL_SIZE = 5          # 패널에 보여줄 최근 작업 수
+JOB_REFRESH_SECONDS = 2     # 진행 중인 작업이 있을 때 패널을 다시 그리는 주기
+BACKGROUND_JOB_HELP = "페이지를 떠나도 생성이 계속되며, 아래 작업 목록에서 결과를 불러올 수 있습니다."
+
+STATUS_LABELS = {
+    "queued": "⏳ 대기 중",
+    "running": "🔄 생성 중",
+    "succeeded": "✅ 완료",
+    "failed": "❌ 실패",
+    "cancelled": "⛔ 취소됨",
+}
+
+def get_user_id():
+    """
+    작업 소유자 id. 로그인 사용자가 있으면 이메일, 없으면 브라우저 세션마다 만든 임의 id를 씁니다.
+    임의 id는 URL(?uid=)에도 남겨 두므로, 연결이 끊겨 세션이 새로 만들어져도 같은 사용자로 이어집니다.
+    """
+    if st.user.get("is_logged_in") and st.user.get("email"):
+        return st.user["email"]
+    if "job_user_id" not in st.session_state:
+        st.session_state.job_user_id = st.query_params.get("uid") or uuid.uuid4().hex[:12]
+    if st.query_params.get("uid") != st.session_state.job_user_id:
+        st.query_params["uid"] = st.session_state.job_user_id
+    return st.session_state.job_user_id
+
+def submit_generation_job(project_id, kind, params, label=None):
+    """작업을 등록하고 결과를 토스트로 알립니다. 사용자별 상한에 걸리면 경고를 표시합니다."""
+    try:
+        job_id = submit_job(get_user_id(), project_id, kind, params, label)
+    except JobLimitError as e:
+        st.warning(str(e))
+        return None
+    st.toast(f"작업 #{job_id}을(를) 등록했습니다. 다른 페이지로 이동해도 생성은 계속됩니다.")
+    return job_id
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%m-%d %H:%M:%S") if timestamp else "-"
+
+def render_job_panel(project_id, kind, on_load):
+    """
+    이 프로젝트의 kind 작업 목록을 그립니다. 진행 중인 작업이 있으면 JOB_REFRESH_SECONDS마다 패널만 다시 그립니다.
+    완료된 작업의 '결과 불러오기'를 누르면 on_load(job)을 호출한 뒤 페이지 전체를 다시 실행합니다.
+    """
+    start_job_runner()  # 재시작 후 남아 있던 대기 작업도 이어서 실행
+    jobs = list_jobs(project_id=project_id, kind=kind, limit=JOB_PANEL_SIZE)
+    if not jobs:
+        return
+    active = any(job["status"] in ACTIVE_STATUSES for job in jobs)
+
+    @st.fragment(run_every=JOB_REFRESH_SECONDS if active else None)
+    def panel():
+        with st.expander("🗂️ 백그라운드 생성 작업", expanded=True):
+            for job in list_jobs(project_id=project_id, kind=kind, limit=JOB_PANEL_SIZE):
+                col_info, col_action = st.columns([4, 1])
+                status = STATUS_LABELS.get(job["status"], job["status"])
+                if job["status"] == "running" and job["cancel_requested"]:
+                    status += " (취소 요청됨)"
+                col_info.markdown(f"**#{job['id']}** {status} · {job['label'] or ''} · 등록 {_format_time(job['created_at'])}"
+                                  f" · {job['result_chars']:,}자")
+                if job["error"]:
+                    col_info.caption(job["error"])
+                if job["status"] in ACTIVE_STATUSES:
+                    if col_action.button("취소", key=f"job_cancel_{job['id']}", disabled=bool(job["cancel_requested"]),
+                                         use_container_width=True):
+                        cancel_job(job["id"])
+                        st.rerun(scope="fragment")
+                elif job["result_chars"]:
+                    if col_action.button("결과 불러오기", key=f"job_load_{job['id']}", use_container_width=True):
+                        on_load(get_job(job["id"]))
+                        st.rerun()
+    panel()
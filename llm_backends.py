@@ -0,0 +1,190 @@
+# llm_backends.py (LLM 백엔드 인터페이스와 구현)
+#
+# gemini_agent는 LLMBackend 인터페이스만 사용하므로, 실제 Gemini 대신 로컬 가짜 백엔드를 끼워 넣어
+# API 키 없이 앱을 실행하거나 부하 테스트를 할 수 있습니다.
+#   - GeminiBackend: google.generativeai 클라이언트 (프로세스 전체에서 모델 객체 1개 재사용, SDK는 생성 시점에 불러옴)
+#   - FakeLLMBackend: 지연 분포, 출력 크기, 스트리밍 조각 수, 오류 비율을 설정할 수 있는 결정적 가짜 백엔드
+# 앱에서 가짜 백엔드 사용: LLM_BACKEND=fake streamlit run app.py
+
+import abc
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from typing import Iterator
+
+from google.api_core import exceptions
+
+class LLMResponse:
+    """생성 결과. total_token_count는 알 수 없으면 None (속도 제한 보정에 사용)."""
+
+    def __init__(self, text, total_token_count=None):
+        self.text = text
+        self.total_token_count = total_token_count
+
+class LLMBackend(abc.ABC):
+    """
+    백엔드 인터페이스. generate와 stream을 모두 구현해야 하며, 하나라도 빠지면 생성 시점에 TypeError가 납니다.
+    예외는 google.api_core.exceptions 계열로 올려야 재시도/서킷 브레이커가 동작합니다.
+    rate_limited가 True인 백엔드만 프로세스 공유 속도 제한을 거칩니다.
+    response_schema(OpenAPI 스키마 dict)를 주면 그 스키마를 따르는 JSON 텍스트를 돌려줘야 합니다.
+    """
+
+    model_name = None
+    rate_limited = False
+
+    @abc.abstractmethod
+    def generate(self, prompt: str, timeout_seconds: int, response_schema: dict = None) -> LLMResponse:
+        """응답 전체를 LLMResponse로 돌려줍니다."""
+
+    @abc.abstractmethod
+    def stream(self, prompt: str, timeout_seconds: int, response_schema: dict = None) -> Iterator[str]:
+        """응답 텍스트 조각을 도착하는 대로 yield합니다. 요청은 첫 조각을 꺼낼 때 시작됩니다."""
+
+class GeminiBackend(LLMBackend):
+    """
+    api_key를 주면 google.generativeai를 그 키로 설정합니다. (없으면 이미 genai.configure된 설정을 사용)
+    api_endpoint를 주면 해당 주소(예: 로컬 가짜 엔드포인트)로 REST 요청을 보냅니다.
+    """
+
+    rate_limited = True
+
+    def __init__(self, model_name, api_key=None, api_endpoint=None):
+        # SDK는 임포트에 1초 가까이 걸리므로 백엔드를 실제로 만들 때 불러옴
+        import google.generativeai as genai
+        if api_endpoint:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": api_endpoint})
+        elif api_key:
+            genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    @staticmethod
+    def _request_options(timeout_seconds):
+        # request_options를 사용하여 타임아웃 설정. 클라이언트 내장 재시도는 끄고 재시도는 gemini_agent가 전담
+        # (내장 재시도가 겹치면 대기 시간이 늘어나고 서킷 브레이커가 장애를 알아차리지 못함)
+        return {"timeout": timeout_seconds, "retry": None}
+
+    @staticmethod
+    def _generation_config(response_schema):
+        # Gemini 구조화 출력: 응답을 스키마에 맞는 JSON으로 강제
+        if response_schema is None:
+            return None
+        return {"response_mime_type": "application/json", "response_schema": response_schema}
+
+    def generate(self, prompt, timeout_seconds, response_schema=None):
+        response = self._model.generate_content(prompt, generation_config=self._generation_config(response_schema),
+                                                request_options=self._request_options(timeout_seconds))
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(response.text, getattr(usage, "total_token_count", None))
+
+    def stream(self, prompt, timeout_seconds, response_schema=None):
+        response = self._model.generate_content(prompt, stream=True, generation_config=self._generation_config(response_schema),
+                                                request_options=self._request_options(timeout_seconds))
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+class FakeLLMBackend(LLMBackend):
+    """
+    결정적 가짜 백엔드. 같은 프롬프트에는 항상 같은 본문을 돌려주고(캐시 동작 확인 가능),
+    지연과 오류 발생은 seed로 고정된 난수열을 따릅니다.
+      - 지연: 중앙값 latency_median초, 로그정규 분포(latency_sigma)
+      - 스트리밍: 전체 지연의 ttft_fraction 후 첫 조각, 나머지를 stream_chunks개 조각으로 나눠 전송
+      - 오류: error_rate 비율로 503(ServiceUnavailable), rate_limit_rate 비율로 429(TooManyRequests)
+    """
+
+    model_name = "fake-llm"
+
+    def __init__(self, latency_median=0.2, latency_sigma=0.5, output_tokens=400, stream_chunks=8, ttft_fraction=0.2,
+                 error_rate=0.0, rate_limit_rate=0.0, seed=0, sleep=time.sleep):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.output_tokens = output_tokens
+        self.stream_chunks = max(1, stream_chunks)
+        self.ttft_fraction = ttft_fraction
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._sleep = sleep
+        self.calls = 0
+
+    def _draw(self):
+        """(지연, 오류 여부)를 뽑습니다. 여러 스레드가 호출해도 난수열은 하나로 공유됩니다."""
+        with self._rng_lock:
+            self.calls += 1
+            latency = self.latency_median * math.exp(self._rng.gauss(0, self.latency_sigma)) if self.latency_median > 0 else 0.0
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            return latency, exceptions.ServiceUnavailable("fake backend: upstream unavailable")
+        if roll < self.error_rate + self.rate_limit_rate:
+            return latency, exceptions.TooManyRequests("fake backend: quota exceeded")
+        return latency, None
+
+    def _text(self, prompt):
+        """프롬프트에서 결정되는 가짜 본문. 테이블을 요구하는 프롬프트에는 마크다운 테이블을 돌려줍니다."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        filler = "가짜 응답 본문입니다. "
+        if "마크다운 테이블" in prompt:
+            rows = max(1, self.output_tokens // 40)
+            lines = ["| TC_ID | 테스트 설명 | 입력값 (JSON) | 예상 출력값 (JSON) |", "|---|---|---|---|"]
+            lines += [f'| TC-{i + 1:03d} | 가짜 테스트 {digest}-{i + 1} | {{"text": "입력 {i + 1}"}} | {{"label": "정답 {i + 1}"}} |'
+                      for i in range(rows)]
+            return "\n".join(lines)
+        sections = max(1, self.output_tokens // 100)
+        body_chars = max(1, self.output_tokens * 2 // sections)
+        return "\n\n".join(f"### {i + 1}. 섹션 ({digest})\n" + (filler * (body_chars // len(filler) + 1))[:body_chars]
+                           for i in range(sections))
+
+    def _json_value(self, schema, digest, index=0):
+        """스키마를 따르는 가짜 값. 배열은 output_tokens에 비례한 개수의 항목을 만듭니다."""
+        kind = schema.get("type", "string").lower()
+        if kind == "array":
+            count = max(1, self.output_tokens // 80)
+            return [self._json_value(schema.get("items", {}), digest, i + 1) for i in range(count)]
+        if kind == "object":
+            return {name: self._json_value(prop, f"{digest}-{name}", index) for name, prop in schema.get("properties", {}).items()}
+        if kind in ("integer", "number"):
+            return index
+        if kind == "boolean":
+            return index % 2 == 0
+        # 문자열: 설명에 JSON이라고 적힌 필드는 JSON 문자열로 채움
+        if "JSON" in schema.get("description", ""):
+            return json.dumps({"value": f"{digest}-{index}"}, ensure_ascii=False)
+        return f"{digest}-{index}"
+
+    def _wait(self, latency, timeout_seconds):
+        if latency > timeout_seconds:
+            self._sleep(timeout_seconds)
+            raise exceptions.DeadlineExceeded(f"fake backend: {latency:.1f}s > timeout {timeout_seconds}s")
+        self._sleep(latency)
+
+    def _response_text(self, prompt, response_schema):
+        if response_schema is None:
+            return self._text(prompt)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return json.dumps(self._json_value(response_schema, digest), ensure_ascii=False)
+
+    def generate(self, prompt, timeout_seconds, response_schema=None):
+        latency, error = self._draw()
+        self._wait(latency, timeout_seconds)
+        if error is not None:
+            raise error
+        text = self._response_text(prompt, response_schema)
+        return LLMResponse(text, len(prompt) // 2 + len(text) // 2)
+
+    def stream(self, prompt, timeout_seconds, response_schema=None):
+        latency, error = self._draw()
+        self._wait(latency * self.ttft_fraction, timeout_seconds)
+        if error is not None:
+            raise error
+        text = self._response_text(prompt, response_schema)
+        size = -(-len(text) // self.stream_chunks)
+        gap = latency * (1 - self.ttft_fraction) / self.stream_chunks
+        for i in range(0, len(text), size):
+            if i:
+                self._sleep(gap)
+            yield text[i:i + size]
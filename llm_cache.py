@@ -0,0 +1,168 @@
+# llm_cache.py (Gemini 응답 디스크 캐시)
+#
+# (모델 이름, 프롬프트, 생성 파라미터)의 해시를 키로 LLM 응답을 SQLite에 저장합니다.
+# 동일한 요청은 API를 호출하지 않고 저장된 응답을 돌려주며, 항목은 TTL이 지나면 만료되고
+# 전체 크기가 CACHE_MAX_BYTES를 넘으면 가장 오래 사용되지 않은 항목부터 제거됩니다(LRU).
+# 조회는 쓰기 트랜잭션 없이 읽기만 하고, 최근 사용 시각(last_accessed) 갱신은 모아 두었다가
+# 다음 저장(LRU 제거 직전) 때나 CACHE_TOUCH_BATCH개가 쌓였을 때 한 번에 반영합니다.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from persistence import get_connection, transaction, retry_on_locked
+
+CACHE_DB_PATH = "database/llm_cache.db"
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60   # 7일
+CACHE_MAX_BYTES = 50 * 1024 * 1024     # 50MB
+CACHE_TOUCH_INTERVAL_SECONDS = 10 * 60  # 최근 사용 시각이 이보다 가까우면 갱신하지 않음 (LRU 정밀도)
+CACHE_TOUCH_BATCH = 256                 # 모아 둔 최근 사용 시각 갱신이 이만큼 쌓이면 바로 반영
+
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+_initialized_paths = set()
+_init_lock = threading.Lock()
+_pending_touches = {}   # 캐시 DB 경로 → {키: 마지막 사용 시각}, 아직 DB에 반영하지 않은 갱신
+_touch_lock = threading.Lock()
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+def _ensure_schema():
+    if CACHE_DB_PATH in _initialized_paths:
+        return
+    with _init_lock:
+        if CACHE_DB_PATH in _initialized_paths:
+            return
+        cache_dir = os.path.dirname(CACHE_DB_PATH)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with transaction(CACHE_DB_PATH) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_cache (last_accessed)")
+        _initialized_paths.add(CACHE_DB_PATH)
+
+def make_cache_key(model_name, prompt, params=None):
+    """(모델 이름, 프롬프트, 생성 파라미터)로 캐시 키(sha256)를 만듭니다."""
+    payload = json.dumps([model_name, prompt, params or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _take_touches():
+    with _touch_lock:
+        return list(_pending_touches.pop(CACHE_DB_PATH, {}).items())
+
+def _apply_touches(conn, touches):
+    conn.executemany("UPDATE llm_cache SET last_accessed = MAX(last_accessed, ?) WHERE key = ?",
+                     [(accessed, key) for key, accessed in touches])
+
+@retry_on_locked
+def _flush_touches(touches):
+    with transaction(CACHE_DB_PATH) as conn:
+        _apply_touches(conn, touches)
+
+def _touch(key, last_accessed, now):
+    """최근 사용 시각 갱신을 모아 둡니다. 갱신한 지 얼마 안 됐으면 건너뜀. 쌓인 수가 CACHE_TOUCH_BATCH를 넘으면 반영."""
+    if now - last_accessed < CACHE_TOUCH_INTERVAL_SECONDS:
+        return
+    with _touch_lock:
+        pending = _pending_touches.setdefault(CACHE_DB_PATH, {})
+        pending[key] = now
+        if len(pending) < CACHE_TOUCH_BATCH:
+            return
+    try:
+        _flush_touches(_take_touches())
+    except sqlite3.Error as e:
+        print(f"LLM 캐시 사용 시각 갱신 오류: {e}")   # LRU 순서에만 쓰이므로 버려도 됨
+
+@retry_on_locked
+def _get(key):
+    _ensure_schema()
+    now = time.time()
+    # 쓰기 잠금 없이 읽기만 함 (만료된 항목은 미스로 처리하고, 다음 저장 때 지움)
+    row = get_connection(CACHE_DB_PATH).execute(
+        "SELECT response, created_at, last_accessed FROM llm_cache WHERE key = ?", (key,)).fetchone()
+    if row is None or now - row["created_at"] > CACHE_TTL_SECONDS:
+        return None
+    _touch(key, row["last_accessed"], now)
+    return row["response"]
+
+@retry_on_locked
+def _put(key, model_name, response, touches):
+    _ensure_schema()
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    with transaction(CACHE_DB_PATH) as conn:
+        # 모아 둔 사용 시각을 먼저 반영해야 LRU 제거 순서가 맞음
+        _apply_touches(conn, touches)
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - CACHE_TTL_SECONDS,))
+        conn.execute("""
+        INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_accessed)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, model_name, response, size, now, now))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        evicted = 0
+        if total > CACHE_MAX_BYTES:
+            # 오래 사용되지 않은 항목부터 초과분만큼 제거
+            for row in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_accessed").fetchall():
+                if total <= CACHE_MAX_BYTES:
+                    break
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (row["key"],))
+                total -= row["size"]
+                evicted += 1
+    return evicted
+
+def get_cached_response(key):
+    """캐시된 응답을 반환합니다. 없거나 만료되었으면 None. (캐시 DB 오류는 미스로 처리)"""
+    try:
+        response = _get(key)
+    except sqlite3.Error as e:
+        print(f"LLM 캐시 조회 오류: {e}")
+        response = None
+    _count("hits" if response is not None else "misses")
+    return response
+
+def store_response(key, model_name, response):
+    """응답을 캐시에 저장하고 필요하면 LRU 제거를 수행합니다. (캐시 DB 오류는 무시)"""
+    try:
+        evicted = _put(key, model_name, response, _take_touches())
+    except sqlite3.Error as e:
+        print(f"LLM 캐시 저장 오류: {e}")
+        return
+    _count("writes")
+    if evicted:
+        _count("evictions", evicted)
+
+def get_cache_stats():
+    """프로세스 기준 히트/미스 카운터와 현재 캐시 항목 수·크기를 반환합니다."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    try:
+        _ensure_schema()
+        row = get_connection(CACHE_DB_PATH).execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        stats["entries"], stats["bytes"] = row[0], row[1]
+    except sqlite3.Error:
+        stats["entries"], stats["bytes"] = None, None
+    return stats
+
+@retry_on_locked
+def clear_cache():
+    """캐시 항목을 모두 삭제합니다."""
+    _ensure_schema()
+    _take_touches()
+    with transaction(CACHE_DB_PATH) as conn:
+        conn.execute("DELETE FROM llm_cache")
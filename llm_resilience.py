@@ -0,0 +1,346 @@
+# llm_resilience.py (LLM 호출 보호 장치: 속도 제한, 재시도, 서킷 브레이커, 동일 요청 합치기)
+#
+# 프로세스 전체가 공유하는 토큰 버킷으로 분당 요청 수/토큰 수를 제한하고,
+# 일시적 오류(429/5xx)는 Retry-After를 존중하는 지터 지수 백오프로 재시도합니다.
+# 업스트림이 연속으로 실패하면 서킷 브레이커가 열려 일정 시간 동안 호출 없이 바로 실패합니다.
+# 동시에 들어온 같은 요청은 SingleFlight로 하나의 호출에 합쳐 결과를 함께 받습니다.
+# 시간 함수(clock, sleep)를 주입할 수 있어 실제 API 없이 가짜 엔드포인트나 가상 시계로 검증할 수 있습니다.
+
+import random
+import threading
+import time
+
+from google.api_core import exceptions
+
+# 재시도 대상: 요청 한도 초과(429/RESOURCE_EXHAUSTED)와 일시적인 서버 오류
+RETRYABLE_EXCEPTIONS = (
+    exceptions.TooManyRequests,
+    exceptions.ServiceUnavailable,
+    exceptions.InternalServerError,
+    exceptions.BadGateway,
+    exceptions.GatewayTimeout,
+)
+# 서킷 브레이커 실패로 집계하는 오류: 업스트림 장애를 뜻하는 것만 (잘못된 요청 등 4xx는 제외)
+UPSTREAM_FAILURE_EXCEPTIONS = (
+    exceptions.ServerError,
+    exceptions.DeadlineExceeded,
+    ConnectionError,
+)
+
+class RateLimitTimeout(Exception):
+    """속도 제한 때문에 허용된 대기 시간 안에 요청을 보낼 수 없을 때 발생합니다."""
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 호출하지 않고 바로 실패할 때 발생합니다."""
+
+    def __init__(self, retry_in):
+        super().__init__(f"업스트림 장애로 호출이 차단되었습니다. 약 {retry_in:.0f}초 후 다시 시도합니다.")
+        self.retry_in = retry_in
+
+# --- 토큰 버킷 ---
+class TokenBucket:
+    """
+    분당 rate_per_minute만큼 채워지는 토큰 버킷. capacity(기본값: 분당 허용량)까지 순간 사용을 허용합니다.
+    잔량은 음수가 될 수 있어, 예상보다 많이 쓴 요청의 초과분(charge)은 이후 요청이 기다려 갚습니다.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1, timeout=None):
+        """amount만큼 토큰을 확보할 때까지 기다립니다. timeout 안에 불가능하면 RateLimitTimeout."""
+        # 버킷보다 큰 요청은 가득 찬 버킷 하나를 통째로 쓰도록 제한 (영원히 대기하지 않게)
+        amount = min(float(amount), self.capacity)
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait_seconds = (amount - self._tokens) / self.rate
+            if deadline is not None and self._clock() + wait_seconds > deadline:
+                raise RateLimitTimeout(f"속도 제한으로 {timeout}초 안에 요청을 보낼 수 없습니다.")
+            self._sleep(wait_seconds)
+
+    def charge(self, amount):
+        """대기 없이 토큰을 차감합니다(음수면 환급). 실제 사용량이 예상과 다를 때 보정에 사용합니다."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+class RateLimiter:
+    """분당 요청 수와 분당 토큰 수를 함께 제한합니다."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(requests_per_minute, clock=clock, sleep=sleep)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock, sleep=sleep)
+
+    def acquire(self, estimated_tokens, timeout=None):
+        self.requests.acquire(1, timeout=timeout)
+        self.tokens.acquire(estimated_tokens, timeout=timeout)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """응답의 실제 토큰 사용량으로 예상치와의 차이를 보정합니다."""
+        if actual_tokens is not None:
+            self.tokens.charge(actual_tokens - estimated_tokens)
+
+# --- 서킷 브레이커 ---
+class CircuitBreaker:
+    """
+    연속 failure_threshold회 업스트림 실패 시 열림(open) 상태가 되어 reset_timeout초 동안 호출을 차단합니다.
+    이후 반열림(half-open) 상태에서 시험 호출 하나만 허용하고, 성공하면 닫히고 실패하면 다시 열립니다.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """호출 전에 불러 차단 여부를 확인합니다. 차단되면 CircuitOpenError."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+        raise CircuitOpenError(retry_in)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def record_neutral(self):
+        """업스트림 장애와 무관한 결과(잘못된 요청 등). 반열림 시험 슬롯만 반납합니다."""
+        with self._lock:
+            self._trial_in_flight = False
+
+# --- 재시도 ---
+def get_retry_after(exc):
+    """예외에서 서버가 알려준 재시도 대기 시간(초)을 꺼냅니다. 없으면 None."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass
+    # gRPC 전송은 google.rpc.RetryInfo를 details에 담아 보냅니다.
+    for detail in getattr(exc, "details", None) or []:
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+    return None
+
+def backoff_delay(attempt, base=1.0, maximum=30.0, retry_after=None, rng=random):
+    """attempt번째(0부터) 재시도 전 대기 시간. Full jitter 지수 백오프이며, Retry-After가 있으면 그 이상 기다립니다."""
+    delay = rng.uniform(0, min(maximum, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+def _total_tokens(result):
+    total = getattr(result, "total_token_count", None)
+    if total is None:
+        total = getattr(getattr(result, "usage_metadata", None), "total_token_count", None)
+    return total
+
+def call_with_resilience(func, estimated_tokens=1, limiter=None, breaker=None, max_attempts=4,
+                         backoff_base=1.0, backoff_max=30.0, max_retry_after=60.0, limiter_timeout=None,
+                         sleep=time.sleep):
+    """
+    func()를 서킷 브레이커 → 속도 제한 → 호출 순서로 실행하고, 재시도 가능한 오류는 백오프 후 다시 시도합니다.
+    Retry-After가 max_retry_after보다 길면 오래 붙잡지 않고 바로 원래 예외를 올립니다.
+    func의 반환값에 total_token_count(또는 usage_metadata.total_token_count)가 있으면 토큰 버킷을 실제 사용량으로 보정합니다.
+    """
+    for attempt in range(max_attempts):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            if limiter is not None:
+                limiter.acquire(estimated_tokens, timeout=limiter_timeout)
+            result = func()
+        except RateLimitTimeout:
+            if breaker is not None:
+                breaker.record_neutral()
+            raise
+        except Exception as e:
+            if breaker is not None:
+                if isinstance(e, UPSTREAM_FAILURE_EXCEPTIONS):
+                    breaker.record_failure()
+                else:
+                    breaker.record_neutral()
+            if not isinstance(e, RETRYABLE_EXCEPTIONS) or attempt == max_attempts - 1:
+                raise
+            retry_after = get_retry_after(e)
+            if retry_after is not None and retry_after > max_retry_after:
+                raise
+            sleep(backoff_delay(attempt, backoff_base, backoff_max, retry_after))
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        if limiter is not None:
+            limiter.record_usage(estimated_tokens, _total_tokens(result))
+        return result
+
+# --- 동일 요청 합치기 (single-flight) ---
+class FlightCancelled(Exception):
+    """함께 받던 호출자가 모두 취소하고 떠나 중단된 호출. 생산자의 publish에서 발생합니다."""
+
+class FlightAborted(Exception):
+    """호출을 실행하던 스레드가 중단되어(Streamlit rerun/stop, KeyboardInterrupt 등) 결과 없이 끝난 호출."""
+
+class Flight:
+    """진행 중인 호출 하나. 생산자가 publish한 응답 조각을 모든 구독자가 같은 순서로 받습니다."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._cancelled = False
+        self.members = 0   # join한 뒤 아직 leave하지 않은 호출자 수 (SingleFlight의 잠금 안에서만 변경)
+
+    def publish(self, chunk):
+        with self._cond:
+            if self._cancelled:
+                raise FlightCancelled("호출을 기다리는 곳이 없어 중단했습니다.")
+            self._chunks.append(chunk)
+            self._cond.notify_all()
+
+    def cancel(self):
+        """생산자가 다음 조각을 publish할 때 FlightCancelled로 멈추게 합니다."""
+        with self._cond:
+            self._cancelled = True
+
+    def finish(self, error=None):
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+
+    def subscribe(self):
+        """처음부터 지금까지의 조각을 돌려준 뒤, 새 조각이 올 때마다 yield합니다. 호출이 실패했으면 그 예외를 올립니다."""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._chunks) and not self._done:
+                    self._cond.wait()
+                new_chunks = self._chunks[index:]
+                index += len(new_chunks)
+                error = self._error
+            if not new_chunks:
+                if error is not None:
+                    raise error
+                return
+            yield from new_chunks
+
+    def result(self):
+        """호출이 끝날 때까지 기다려 전체 응답을 돌려줍니다."""
+        return "".join(self.subscribe())
+
+class SingleFlight:
+    """
+    같은 key의 호출이 진행 중이면 새로 호출하지 않고 그 호출에 합류시킵니다.
+    join()으로 먼저 들어온 호출자(leader)만 run()/start()로 실제 호출을 실행하고, 나머지는 Flight를 구독합니다.
+    호출이 끝나면 key가 비워지므로, 이후 요청은 (보통 응답 캐시에서) 새로 처리됩니다.
+    join한 호출자는 끝나거나 떠날 때 leave()를 부릅니다. 마지막 호출자가 취소하며 떠나면 업스트림 호출도 중단됩니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key):
+        """(Flight, leader 여부)를 돌려줍니다."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+            flight.members += 1
+            return flight, leader
+
+    def leave(self, key, flight, cancel=False):
+        """
+        join한 호출자가 결과를 다 받았거나 중간에 떠날 때 부릅니다. cancel=True로 떠난 호출자가 마지막이면
+        진행 중인 호출을 중단시키고(다음 publish에서 FlightCancelled) key를 비워, 이후 같은 요청은 새로 호출합니다.
+        cancel=False로 떠나면 호출은 끝까지 진행되어 응답이 캐시에 남습니다. (페이지 이동 등)
+        """
+        with self._lock:
+            flight.members -= 1
+            if not cancel or flight.members > 0:
+                return
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.cancel()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def run(self, key, flight, produce):
+        """
+        produce(publish)를 현재 스레드에서 실행합니다. 예외는 Flight에 담겨 모든 구독자에게 전달됩니다.
+        어떻게 끝나든(BaseException 포함) key를 비우고 Flight를 끝내므로, 구독자가 영원히 기다리거나 이후 요청이 끝난 호출에 합류하지 않습니다.
+        """
+        error = None
+        try:
+            produce(flight.publish)
+        except Exception as e:
+            error = e
+        except BaseException as e:
+            # 실행하던 스레드의 중단은 그 스레드에만 다시 올리고, 함께 기다리던 호출자에게는 일반 예외로 알림
+            error = FlightAborted(f"요청을 실행하던 호출이 중단되었습니다: {type(e).__name__}")
+            raise
+        finally:
+            with self._lock:
+                # 취소로 key가 이미 비워지고 같은 key의 새 호출이 등록됐을 수 있으므로 자기 Flight일 때만 제거
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(error)
+
+    def start(self, key, flight, produce):
+        """run을 백그라운드 스레드에서 실행합니다. 스트리밍처럼 구독자가 중간에 떠나도 호출은 끝까지 진행됩니다."""
+        threading.Thread(target=self.run, args=(key, flight, produce), name="single-flight", daemon=True).start()
@@ -0,0 +1,223 @@
+# llm_telemetry.py (LLM 호출 기록과 집계)
+#
+# gemini_agent의 모든 LLM 호출(캐시 히트 포함)을 함수 이름, 프로젝트, 토큰 수, 지연 시간, 결과와 함께
+# 별도의 SQLite 파일에 기록합니다. 기록은 백그라운드 스레드가 모아서 한 번에 저장하므로 호출 지연에 영향을 주지 않고,
+# 기록에 실패해도 LLM 호출 자체는 실패하지 않습니다.
+# 어떤 함수/프로젝트의 호출인지는 contextvars로 전달되므로, 작업 스레드에서는 copy_context()로 실행해야 합니다.
+
+import contextvars
+import functools
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from persistence import get_connection, transaction, retry_on_locked
+
+TELEMETRY_DB_PATH = "database/llm_telemetry.db"
+TELEMETRY_RETENTION_DAYS = 90     # 이보다 오래된 기록은 스키마 초기화 시 삭제
+TELEMETRY_MAX_BATCH = 256         # 한 트랜잭션에 묶는 최대 기록 수
+TELEMETRY_MAX_DELAY_MS = 50       # 첫 기록 이후 다른 기록을 모으기 위해 기다리는 최대 시간
+
+# 호출 결과 분류
+OUTCOMES = ("ok", "timeout", "rate_limited", "circuit_open", "error", "cancelled")
+
+_current_function = contextvars.ContextVar("llm_function", default=None)
+_current_project = contextvars.ContextVar("llm_project", default=None)
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+# --- 호출 맥락 (함수 이름, 프로젝트) ---
+def set_current_project(project_id):
+    """이후 현재 맥락(스크립트 실행)에서 일어나는 LLM 호출을 project_id의 호출로 기록합니다."""
+    _current_project.set(project_id)
+
+def set_current_function(name):
+    """이후의 LLM 호출을 name 함수의 호출로 기록합니다. 반환한 토큰을 reset_current_function에 넘겨 되돌립니다."""
+    return _current_function.set(name)
+
+def reset_current_function(token):
+    _current_function.reset(token)
+
+def traced(func):
+    """데코레이터. 함수가 실행되는 동안의 LLM 호출을 이 함수 이름으로 기록합니다. (중첩되면 가장 안쪽 함수 기준)"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = set_current_function(func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            reset_current_function(token)
+    return wrapper
+
+def capture_context():
+    """현재 맥락의 (함수 이름, 프로젝트 id). 스트리밍처럼 나중에 실행되는 호출은 생성 시점에 미리 잡아 둡니다."""
+    return _current_function.get(), _current_project.get()
+
+# --- 저장 ---
+def _ensure_schema():
+    if TELEMETRY_DB_PATH in _initialized_paths:
+        return
+    with _init_lock:
+        if TELEMETRY_DB_PATH in _initialized_paths:
+            return
+        telemetry_dir = os.path.dirname(TELEMETRY_DB_PATH)
+        if telemetry_dir:
+            os.makedirs(telemetry_dir, exist_ok=True)
+        with transaction(TELEMETRY_DB_PATH) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                function TEXT,
+                project_id INTEGER,
+                model TEXT,
+                prompt_tokens INTEGER NOT NULL,
+                response_tokens INTEGER NOT NULL,
+                latency_ms REAL NOT NULL,
+                first_chunk_ms REAL,
+                outcome TEXT NOT NULL,
+                cache_hit INTEGER NOT NULL,
+                streamed INTEGER NOT NULL,
+                coalesced INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            )
+            """)
+            # 이전 버전 DB 마이그레이션: 진행 중인 동일 요청에 합류한 호출 여부
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(llm_calls)")}
+            if "coalesced" not in columns:
+                conn.execute("ALTER TABLE llm_calls ADD COLUMN coalesced INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_started_at ON llm_calls (started_at)")
+            conn.execute("DELETE FROM llm_calls WHERE started_at < ?", (time.time() - TELEMETRY_RETENTION_DAYS * 86400,))
+        _initialized_paths.add(TELEMETRY_DB_PATH)
+
+_COLUMNS = ("started_at", "function", "project_id", "model", "prompt_tokens", "response_tokens", "latency_ms",
+            "first_chunk_ms", "outcome", "cache_hit", "streamed", "coalesced", "error")
+
+class _TelemetryWriter:
+    """record_call 요청을 모아 executemany 한 번으로 기록하는 백그라운드 기록기."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="llm-telemetry", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        self._queue.put(row)
+
+    def flush(self):
+        """지금까지 넣은 기록이 모두 저장될 때까지 기다립니다."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    @retry_on_locked
+    def _write(self, rows):
+        _ensure_schema()
+        with transaction(TELEMETRY_DB_PATH) as conn:
+            conn.executemany(f"INSERT INTO llm_calls ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", rows)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, events = [], []
+            deadline = time.monotonic() + TELEMETRY_MAX_DELAY_MS / 1000
+            while True:
+                if isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    batch.append(item)
+                remaining = deadline - time.monotonic()
+                if events or len(batch) >= TELEMETRY_MAX_BATCH or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                except sqlite3.Error as e:
+                    print(f"LLM 호출 기록 저장 오류: {e}")
+            for event in events:
+                event.set()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _TelemetryWriter()
+        return _writer
+
+def record_call(function, project_id, model, prompt_tokens, response_tokens, latency_ms, outcome,
+                cache_hit=False, streamed=False, coalesced=False, first_chunk_ms=None, error=None, started_at=None):
+    """LLM 호출 하나를 기록 큐에 넣습니다. (저장은 백그라운드에서 일어남) coalesced는 진행 중인 동일 요청에 합류한 호출입니다."""
+    row = (started_at if started_at is not None else time.time(), function, project_id, model, int(prompt_tokens),
+           int(response_tokens), float(latency_ms), first_chunk_ms, outcome, int(bool(cache_hit)), int(bool(streamed)),
+           int(bool(coalesced)), (error or None) and str(error)[:500])
+    _get_writer().submit(row)
+
+def flush():
+    """대기 중인 기록을 모두 저장합니다. (대시보드 조회 직전, 벤치마크 종료 시 사용)"""
+    if _writer is not None:
+        _writer.flush()
+
+# --- 조회와 집계 ---
+def load_calls(since=None, project_id=None):
+    """기록을 DataFrame으로 읽습니다. since는 epoch 초, started_at 컬럼은 datetime으로 변환됩니다."""
+    import pandas as pd  # 대시보드에서만 쓰므로 호출 기록만 하는 페이지는 pandas를 불러오지 않음
+    flush()
+    _ensure_schema()
+    query = f"SELECT {', '.join(_COLUMNS)} FROM llm_calls WHERE started_at >= ?"
+    params = [since or 0]
+    if project_id is not None:
+        query += " AND project_id = ?"
+        params.append(project_id)
+    df = pd.read_sql_query(query, get_connection(TELEMETRY_DB_PATH), params=params)
+    df["started_at"] = pd.to_datetime(df["started_at"], unit="s")
+    df["cache_hit"] = df["cache_hit"].astype(bool)
+    df["streamed"] = df["streamed"].astype(bool)
+    df["coalesced"] = df["coalesced"].astype(bool)
+    return df
+
+def summarize_calls(df, by):
+    """
+    by 컬럼(들)별 호출 수, 오류/타임아웃 비율(사용자가 중단한 스트림은 오류로 보지 않음), 캐시 히트율, 지연 p50/p95/p99(ms), 토큰 합계를 계산합니다.
+    지연 백분위는 캐시 히트를 제외한 호출 기준입니다. (합류한 호출은 기다린 시간이 지연으로 잡힘)
+    """
+    flags = df.assign(
+        is_error=~df["outcome"].isin(["ok", "cancelled"]),
+        is_timeout=df["outcome"] == "timeout",
+        total_tokens=df["prompt_tokens"] + df["response_tokens"],
+    )
+    summary = flags.groupby(by, dropna=False).agg(
+        calls=("outcome", "size"),
+        error_rate=("is_error", "mean"),
+        timeout_rate=("is_timeout", "mean"),
+        cache_hit_rate=("cache_hit", "mean"),
+        coalesced_rate=("coalesced", "mean"),
+        prompt_tokens=("prompt_tokens", "sum"),
+        response_tokens=("response_tokens", "sum"),
+        total_tokens=("total_tokens", "sum"),
+    )
+    live = flags.loc[~flags["cache_hit"]]
+    latency = live.groupby(by, dropna=False)["latency_ms"].quantile([0.5, 0.95, 0.99]).unstack()
+    latency = latency.reindex(columns=[0.5, 0.95, 0.99]).set_axis(["p50_ms", "p95_ms", "p99_ms"], axis=1)
+    return summary.join(latency).sort_values("calls", ascending=False)
+
+def usage_over_time(df, freq="D"):
+    """기간(freq)별 호출 수, 오류 수, 토큰 합계, 지연 p95(ms)."""
+    import pandas as pd
+    flags = df.assign(is_error=~df["outcome"].isin(["ok", "cancelled"]), total_tokens=df["prompt_tokens"] + df["response_tokens"])
+    grouped = flags.set_index("started_at").groupby(pd.Grouper(freq=freq))
+    return pd.DataFrame({
+        "calls": grouped["outcome"].size(),
+        "errors": grouped["is_error"].sum(),
+        "total_tokens": grouped["total_tokens"].sum(),
+        "p95_ms": grouped["latency_ms"].quantile(0.95),
+    })
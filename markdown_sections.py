@@ -0,0 +1,62 @@
+# markdown_sections.py (마크다운 문서를 ### 섹션 단위로 나누고 다시 합치는 도구, 표 칸 읽기/쓰기)
+#
+# 부분 편집(section-scoped refine)에서 사용합니다. 나눈 조각을 순서대로 이어 붙이면 원문과 정확히 같아지므로,
+# 편집한 조각만 바꿔 끼워도 나머지 부분은 한 글자도 바뀌지 않습니다.
+
+import re
+
+SECTION_HEADING = re.compile(r"^###\s+(.*\S)\s*$")
+TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+def split_sections(text):
+    """
+    text를 ### 제목 기준 섹션 목록으로 나눕니다. 각 섹션은 {"title": 제목 또는 None, "text": 원문 조각}이며,
+    첫 제목 앞의 머리말은 title이 None인 섹션이 됩니다. 코드 블록(```) 안의 ###는 제목으로 보지 않습니다.
+    """
+    sections = []
+    current = {"title": None, "lines": []}
+    in_code = False
+    for line in text.splitlines(keepends=True):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else SECTION_HEADING.match(line)
+        if match:
+            if current["lines"] or current["title"] is not None:
+                sections.append(current)
+            current = {"title": match.group(1), "lines": []}
+        current["lines"].append(line)
+    if current["lines"]:
+        sections.append(current)
+    return [{"title": s["title"], "text": "".join(s["lines"])} for s in sections]
+
+def join_sections(sections):
+    return "".join(s["text"] for s in sections)
+
+def section_outline(sections):
+    """
+    섹션 제목 목록(번호 매김)을 돌려줍니다. 부분 편집 프롬프트에 전체 구조를 짧게 알려줄 때 사용합니다.
+    번호는 제목 있는 섹션만 1부터 매기므로, n번은 titled_indexes(sections)[n - 1] 섹션입니다. (머리말은 번호 없음)
+    """
+    return "\n".join(f"{number}. {sections[i]['title']}" for number, i in enumerate(titled_indexes(sections), start=1))
+
+def titled_indexes(sections):
+    """제목 있는 섹션들의 인덱스. section_outline의 번호와 같은 순서입니다."""
+    return [i for i, s in enumerate(sections) if s["title"]]
+
+UNESCAPED_PIPE = re.compile(r"(?<!\\)\|")
+
+def table_cells(line):
+    """
+    표 한 줄을 칸 목록으로 나눕니다. 이스케이프된 파이프(\\|)는 칸 내용으로 보고 '|'로 되돌리며,
+    빈 칸도 빈 문자열로 유지하므로 칸 수가 줄어들지 않습니다.
+    """
+    cells = line.strip()
+    if cells.startswith("|"):
+        cells = cells[1:]
+    if cells.endswith("|") and not cells.endswith("\\|"):
+        cells = cells[:-1]
+    return [c.strip().replace("\\|", "|") for c in UNESCAPED_PIPE.split(cells)]
+
+def escape_cell(value):
+    """칸 내용의 '|'와 줄바꿈을 표가 깨지지 않는 형태로 바꿉니다. (table_cells로 읽으면 '|'는 원래대로 돌아옴)"""
+    return str(value).replace("|", "\\|").replace("\r\n", "<br>").replace("\n", "<br>")
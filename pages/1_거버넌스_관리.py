@@ -8,7 +8,8 @@ import sys
 
 # --- 경로 설정 ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from persistence import save_artifact, get_artifacts_for_project
+from persistence import save_artifact
+from history_view import render_artifact_history
 
 # --- 페이지 설정 (각 페이지마다 추가) ---
 st.set_page_config(page_title="MCP 관리", layout="wide")
@@ -63,10 +64,4 @@ if st.button("💾 MCP YAML 저장하기", type="primary", use_container_width=T
 # --- 저장된 MCP 이력 ---
 st.markdown("---")
 st.header("📜 저장된 MCP 이력")
-artifacts = get_artifacts_for_project(selected_id, "MCP_YAML")
-if artifacts:
-    for i, artifact in enumerate(artifacts):
-        with st.expander(f"버전 {len(artifacts) - i} ({artifact['created_at']})"):
-            st.code(artifact['content'], language='yaml')
-else:
-    st.info("이 프로젝트에 저장된 MCP 파일이 없습니다.")
+render_artifact_history(selected_id, "MCP_YAML", "이 프로젝트에 저장된 MCP 파일이 없습니다.", language="yaml")
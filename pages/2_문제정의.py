@@ -7,8 +7,11 @@ import os
 
 # --- 경로 설정 ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from persistence import save_artifact, get_artifacts_for_project
-from gemini_agent import generate_problem_definition, refine_content
+from persistence import save_artifact
+from history_view import render_artifact_history
+from gemini_agent import stream_problem_definition
+from llm_telemetry import set_current_project
+from job_view import submit_generation_job, render_job_panel, BACKGROUND_JOB_HELP
 
 # --- 페이지 제목 ---
 st.title("📋 문제정의")
@@ -19,6 +22,7 @@ selected_id = st.session_state.get('selected_project_id', None)
 if not selected_id:
     st.error("프로젝트를 선택해주세요. 메인 대시보드(app)로 돌아가 작업할 프로젝트를 먼저 선택해주세요.")
     st.stop()
+set_current_project(selected_id)  # 이 페이지의 LLM 호출을 프로젝트별로 기록
 project_name = st.session_state.get('selected_project_name', 'N/A')
 st.header(f"프로젝트: {project_name}")
 
@@ -32,12 +36,18 @@ with col2:
 with col3:
     expected_effect = st.text_area("기대 효과", "예: 응답 시간 20% 단축", height=150)
 
-if st.button("🤖 AI로 문제정의서 생성하기", type="primary", use_container_width=True):
-    with st.spinner("Gemini 에이전트가 문제정의서를 작성하고 있습니다..."):
-        prompt_input = {"use_case": use_case, "background": background, "expected_effect": expected_effect}
-        generated_text = generate_problem_definition(prompt_input)
-        st.session_state['generated_problem_def'] = generated_text
+prompt_input = {"use_case": use_case, "background": background, "expected_effect": expected_effect}
+col_now, col_background = st.columns([3, 1])
+if col_now.button("🤖 AI로 문제정의서 생성하기", type="primary", use_container_width=True):
+    # 응답 조각이 도착하는 대로 화면에 그리고, 완성된 전체 텍스트를 편집용으로 보관
+    generated_text = st.write_stream(stream_problem_definition(prompt_input))
+    st.session_state['generated_problem_def'] = generated_text
+    st.rerun()
+if col_background.button("⏳ 백그라운드로 생성", use_container_width=True, help=BACKGROUND_JOB_HELP):
+    if submit_generation_job(selected_id, "problem_definition", {"prompt_input": prompt_input}, label=use_case[:30]):
         st.rerun()
+render_job_panel(selected_id, "problem_definition",
+                 lambda job: st.session_state.update(generated_problem_def=job["result"]))
 
 # --- 생성 결과 확인, 발전 및 저장 ---
 if 'generated_problem_def' in st.session_state and st.session_state.get('generated_problem_def'):
@@ -65,10 +75,4 @@ if 'generated_problem_def' in st.session_state and st.session_state.get('generat
 # --- 저장된 이력 ---
 st.markdown("---")
 st.header("📜 저장된 문제정의서 이력")
-artifacts = get_artifacts_for_project(selected_id, "PROBLEM_DEF")
-if artifacts:
-    for i, artifact in enumerate(artifacts):
-        with st.expander(f"버전 {len(artifacts) - i} ({artifact['created_at']})"):
-            st.markdown(artifact['content'])
-else:
-    st.info("이 프로젝트에 저장된 문제정의서가 없습니다.")
+render_artifact_history(selected_id, "PROBLEM_DEF", "이 프로젝트에 저장된 문제정의서가 없습니다.")
@@ -7,8 +7,11 @@ import os
 
 # --- 경로 설정 ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from persistence import save_artifact, get_artifacts_for_project
-from gemini_agent import generate_model_design_doc, refine_content
+from persistence import save_artifact, get_latest_artifact
+from history_view import render_artifact_history
+from gemini_agent import stream_model_design_doc, stream_refine_content_scoped, LLMCallError
+from llm_telemetry import set_current_project
+from job_view import submit_generation_job, render_job_panel, BACKGROUND_JOB_HELP
 
 # --- 페이지 설정 ---
 st.set_page_config(page_title="모델 설계", layout="wide")
@@ -22,11 +25,12 @@ selected_id = st.session_state.get('selected_project_id', None)
 if not selected_id:
     st.error("프로젝트를 선택해주세요. 메인 대시보드(app)로 돌아가 작업할 프로젝트를 먼저 선택해주세요.")
     st.stop()
-problem_def_artifacts = get_artifacts_for_project(selected_id, "PROBLEM_DEF")
-if not problem_def_artifacts:
+set_current_project(selected_id)  # 이 페이지의 LLM 호출을 프로젝트별로 기록
+problem_def_artifact = get_latest_artifact(selected_id, "PROBLEM_DEF")
+if not problem_def_artifact:
     st.warning("이 프로젝트에 대한 '문제정의서'가 없습니다. '문제정의' 페이지에서 먼저 작성해주세요.")
     st.stop()
-latest_problem_def = problem_def_artifacts[0]['content']
+latest_problem_def = problem_def_artifact['content']
 
 st.header(f"프로젝트: {st.session_state.get('selected_project_name', 'N/A')}")
 with st.expander("참고: 이 프로젝트의 문제정의서 보기"):
@@ -38,11 +42,17 @@ model_type = st.selectbox(
     "설계할 모델의 주요 유형을 선택하세요.",
     ("텍스트 분류", "이미지 분류", "회귀", "객체 탐지", "자연어 생성", "기타")
 )
-if st.button("🤖 AI로 모델 설계서 초안 생성하기", type="primary", use_container_width=True):
-    with st.spinner("Gemini 에이전트가 문제정의서 기반으로 모델 설계를 하고 있습니다..."):
-        generated_text = generate_model_design_doc(latest_problem_def, model_type)
-        st.session_state['generated_design_doc'] = generated_text
+col_now, col_background = st.columns([3, 1])
+if col_now.button("🤖 AI로 모델 설계서 초안 생성하기", type="primary", use_container_width=True):
+    generated_text = st.write_stream(stream_model_design_doc(latest_problem_def, model_type))
+    st.session_state['generated_design_doc'] = generated_text
+    st.rerun()
+if col_background.button("⏳ 백그라운드로 생성", use_container_width=True, help=BACKGROUND_JOB_HELP):
+    params = {"problem_def": latest_problem_def, "model_type": model_type}
+    if submit_generation_job(selected_id, "model_design_doc", params, label=model_type):
         st.rerun()
+render_job_panel(selected_id, "model_design_doc",
+                 lambda job: st.session_state.update(generated_design_doc=job["result"]))
 
 # --- 생성 결과 확인, 발전 및 저장 ---
 if 'generated_design_doc' in st.session_state and st.session_state.get('generated_design_doc'):
@@ -58,9 +68,15 @@ if 'generated_design_doc' in st.session_state and st.session_state.get('generate
     current_text = st.session_state.design_doc_editor
     custom_instruction = st.text_input("직접 편집 지시하기 (예: 이 설계에 대한 대안으로 CNN 모델을 간략히 추가해줘)")
     if st.button("실행", disabled=not custom_instruction, key="custom_design"):
-        with st.spinner("AI가 당신의 지시를 수행하고 있습니다..."):
-            refined_text = refine_content(current_text, custom_instruction)
-            st.session_state.generated_design_doc = refined_text
+        # 지시가 가리키는 섹션만 다시 생성해 원문에 끼워 넣음
+        scope, chunks, splice = stream_refine_content_scoped(current_text, custom_instruction)
+        st.caption(f"편집 범위: {scope}")
+        try:
+            refined_part = st.write_stream(chunks)
+        except LLMCallError as e:
+            st.error(f"편집하지 못해 원문을 그대로 두었습니다. {e}")
+        else:
+            st.session_state.generated_design_doc = splice(refined_part)
             st.rerun()
     st.markdown("---")
     st.subheader("Step 3: 최종본 저장")
@@ -78,10 +94,4 @@ if 'generated_design_doc' in st.session_state and st.session_state.get('generate
 # --- 저장된 이력 ---
 st.markdown("---")
 st.header("📜 저장된 모델 설계서 이력")
-artifacts = get_artifacts_for_project(selected_id, "MODEL_DESIGN")
-if artifacts:
-    for i, artifact in enumerate(artifacts):
-        with st.expander(f"버전 {len(artifacts) - i} ({artifact['created_at']})"):
-            st.markdown(artifact['content'])
-else:
-    st.info("이 프로젝트에 저장된 모델 설계서가 없습니다.")
+render_artifact_history(selected_id, "MODEL_DESIGN", "이 프로젝트에 저장된 모델 설계서가 없습니다.")
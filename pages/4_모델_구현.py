@@ -5,13 +5,14 @@ from datetime import datetime
 import sys
 import os
 import io
-import re
-import pandas as pd
 
 # --- 경로 설정 ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from persistence import save_artifact, get_artifacts_for_project
-from gemini_agent import generate_test_cases, convert_markdown_to_df, refine_content
+from persistence import save_artifact, get_latest_artifact
+from history_view import render_artifact_history
+from gemini_agent import (stream_test_cases_json, parse_test_cases, generate_test_case_suite, test_cases_to_markdown,
+                          refine_test_cases, TEST_CASE_SCENARIOS)
+from llm_telemetry import set_current_project
 
 # --- 페이지 설정 ---
 st.set_page_config(page_title="모델 구현", layout="wide")
@@ -25,29 +26,54 @@ selected_id = st.session_state.get('selected_project_id', None)
 if not selected_id:
     st.error("프로젝트를 선택해주세요. 메인 대시보드(app)로 돌아가 작업할 프로젝트를 먼저 선택해주세요.")
     st.stop()
-design_doc_artifacts = get_artifacts_for_project(selected_id, "MODEL_DESIGN")
-if not design_doc_artifacts:
+set_current_project(selected_id)  # 이 페이지의 LLM 호출을 프로젝트별로 기록
+design_doc_artifact = get_latest_artifact(selected_id, "MODEL_DESIGN")
+if not design_doc_artifact:
     st.warning("이 프로젝트에 대한 '모델 설계서'가 없습니다. '모델 설계' 페이지에서 먼저 작성해주세요.")
     st.stop()
-latest_design_doc = design_doc_artifacts[0]['content']
+latest_design_doc = design_doc_artifact['content']
 st.header(f"프로젝트: {st.session_state.get('selected_project_name', 'N/A')}")
 with st.expander("참고: 이 프로젝트의 모델 설계서 보기"):
     st.markdown(latest_design_doc)
 
 # --- 단위 테스트 케이스 생성기 ---
 st.subheader("Step 1: 단위 테스트 케이스 생성")
-scenario = st.selectbox(
-    "어떤 시나리오에 대한 테스트 케이스를 생성할까요?",
-    ("정상적인 입력값에 대한 기본 기능 검증", "일반적인 예외 상황 처리 검증", "부적절한 입력에 대한 방어 능력 검증")
-)
+scenario = st.selectbox("어떤 시나리오에 대한 테스트 케이스를 생성할까요?", TEST_CASE_SCENARIOS)
 if st.button("🤖 AI로 테스트 케이스 생성하기", type="primary", use_container_width=True):
-    with st.spinner("Gemini 에이전트가 테스트 케이스를 작성하고 있습니다..."):
-        generated_text = generate_test_cases(latest_design_doc, scenario)
-        st.session_state['generated_test_cases_md'] = generated_text
-        df = convert_markdown_to_df(generated_text)
+    # 스키마를 따르는 JSON으로 받아 흘려 보여주고, 완료 후 한 번에 검증해 DataFrame으로 변환
+    # (검증에 실패한 항목만 오류 내용과 함께 다시 요청)
+    with st.expander("생성 중인 응답 (JSON)", expanded=True):
+        raw_json = st.write_stream(stream_test_cases_json(latest_design_doc, scenario))
+    with st.spinner("생성된 테스트 케이스를 검증하는 중..."):
+        df, errors = parse_test_cases(raw_json)
+    st.session_state['generated_test_cases_df'] = df
+    st.session_state['generated_test_cases_md'] = test_cases_to_markdown(df)
+    st.session_state['test_case_errors'] = errors
+    st.session_state.pop('test_case_suite_report', None)
+    st.session_state.pop('test_case_refine_errors', None)
+    st.rerun()
+
+# 대량 생성: 여러 시나리오 × 샤드로 나눠 동시에 생성하고, 입력값이 같은 케이스는 하나만 남겨 병합
+with st.expander("📦 회귀 테스트 스위트 대량 생성"):
+    suite_scenarios = st.multiselect("포함할 시나리오", TEST_CASE_SCENARIOS, default=list(TEST_CASE_SCENARIOS))
+    suite_size = st.number_input("생성할 테스트 케이스 수", min_value=10, max_value=1000, value=100, step=10)
+    if st.button("📦 대량 생성하기", disabled=not suite_scenarios, use_container_width=True):
+        with st.spinner(f"테스트 케이스 {suite_size}개를 나눠서 동시에 생성하는 중..."):
+            df, report = generate_test_case_suite(latest_design_doc, suite_scenarios, int(suite_size))
         st.session_state['generated_test_cases_df'] = df
+        st.session_state['generated_test_cases_md'] = test_cases_to_markdown(df)
+        st.session_state['test_case_errors'] = report["errors"]
+        st.session_state['test_case_suite_report'] = report
+        st.session_state.pop('test_case_refine_errors', None)
         st.rerun()
 
+if st.session_state.get('test_case_suite_report'):
+    report = st.session_state['test_case_suite_report']
+    st.info(f"요청 {report['requested']}개 → 생성 {report['generated']}개 (중복 제거 {report['duplicates']}개)")
+
+if st.session_state.get('test_case_errors'):
+    st.warning("일부 테스트 케이스를 검증하지 못해 제외했습니다:\n\n" + "\n".join(f"- {e}" for e in st.session_state['test_case_errors']))
+
 # --- 생성 결과 확인, 발전 및 저장 ---
 if 'generated_test_cases_df' in st.session_state and not st.session_state['generated_test_cases_df'].empty:
     st.subheader("Step 2: 생성된 테스트 케이스 발전시키기")
@@ -55,31 +81,39 @@ if 'generated_test_cases_df' in st.session_state and not st.session_state['gener
     st.session_state['generated_test_cases_df'] = edited_df
     st.markdown("---")
     st.write("🤖 **AI 편집 도구모음**")
-    current_md_table = edited_df.to_markdown(index=False)
     custom_instruction = st.text_input("직접 편집 지시하기 (예: TC-001과 유사한 테스트 케이스 2개 더 추가해줘)")
     if st.button("실행", disabled=not custom_instruction, key="custom_tc"):
         with st.spinner("AI가 당신의 지시를 수행하고 있습니다..."):
-            instruction = f"아래 마크다운 테이블 형식의 테스트 케이스 목록에 대해 다음 지시사항을 수행하고, '수정된 전체 테스트 케이스 목록'을 동일한 마크다운 테이블 형식으로 반환해주세요.\n\n[지시사항]\n{custom_instruction}\n\n[원본 테스트 케이스 목록]\n{current_md_table}"
-            refined_md = refine_content("", instruction)
-            table_match = re.search(r'\|.*\|(?:\n\|.*\|)+', refined_md)
-            if table_match:
-                refined_md_table = table_match.group(0)
-                st.session_state['generated_test_cases_md'] = refined_md_table
-                st.session_state['generated_test_cases_df'] = convert_markdown_to_df(refined_md_table)
-            else:
-                st.warning("AI가 테이블 형식으로 응답하지 않았습니다.")
-                st.code(refined_md)
-            st.rerun()
+            # 표를 JSON 레코드로 주고받아 검증 (지시에 TC_ID가 있으면 해당 행만 수정해 표에 다시 끼워 넣음)
+            refined_df, refine_errors, scope = refine_test_cases(edited_df, custom_instruction)
+        if refine_errors:
+            # 일부 행만 반영되거나 사라지지 않도록 표는 그대로 두고 오류를 보여줌
+            st.session_state['test_case_refine_errors'] = {"scope": scope, "errors": refine_errors}
+        else:
+            st.session_state['generated_test_cases_df'] = refined_df
+            st.session_state['generated_test_cases_md'] = test_cases_to_markdown(refined_df)
+            st.session_state.pop('test_case_refine_errors', None)
+            st.session_state['test_case_refine_scope'] = scope
+        st.rerun()
+    if st.session_state.get('test_case_refine_scope'):
+        st.info(f"편집 범위: {st.session_state.pop('test_case_refine_scope')}")
+    if st.session_state.get('test_case_refine_errors'):
+        failure = st.session_state['test_case_refine_errors']
+        st.error(f"AI 편집 결과를 검증하지 못해 표를 바꾸지 않았습니다. (편집 범위: {failure['scope']})\n\n"
+                 + "\n".join(f"- {e}" for e in failure['errors']))
     st.markdown("---")
     st.subheader("Step 3: 최종본 저장 및 다운로드")
     col1, col2 = st.columns(2)
     with col1:
         if st.button("💾 이력으로 저장하기", use_container_width=True):
-            final_md_to_save = st.session_state['generated_test_cases_df'].to_markdown(index=False)
+            final_md_to_save = test_cases_to_markdown(st.session_state['generated_test_cases_df'])
             save_artifact(project_id=selected_id, stage="IMPLEMENT", type="TEST_CASE", content=final_md_to_save)
             st.success("테스트 케이스가 이력으로 저장되었습니다.")
             del st.session_state['generated_test_cases_md']
             del st.session_state['generated_test_cases_df']
+            st.session_state.pop('test_case_errors', None)
+            st.session_state.pop('test_case_suite_report', None)
+            st.session_state.pop('test_case_refine_errors', None)
             st.rerun()
     with col2:
         csv = st.session_state['generated_test_cases_df'].to_csv(index=False).encode('utf-8-sig')
@@ -88,10 +122,4 @@ if 'generated_test_cases_df' in st.session_state and not st.session_state['gener
 # --- 저장된 이력 ---
 st.markdown("---")
 st.header("📜 저장된 테스트 케이스 이력")
-artifacts = get_artifacts_for_project(selected_id, "TEST_CASE")
-if artifacts:
-    for i, artifact in enumerate(artifacts):
-        with st.expander(f"버전 {len(artifacts) - i} ({artifact['created_at']})"):
-            st.markdown(artifact['content'])
-else:
-    st.info("이 프로젝트에 저장된 테스트 케이스가 없습니다.")
+render_artifact_history(selected_id, "TEST_CASE", "이 프로젝트에 저장된 테스트 케이스가 없습니다.")
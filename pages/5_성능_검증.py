@@ -4,26 +4,32 @@ import streamlit as st
 from datetime import datetime
 import sys
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
 
 # --- 경로 설정 ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from persistence import save_artifact, get_artifacts_for_project
-from gemini_agent import generate_performance_report, refine_content
+from persistence import save_artifact, get_project_snapshot
+from history_view import render_artifact_history
+from gemini_agent import stream_performance_report, stream_refine_content_scoped, generate_verification_reports, LLMCallError
+from llm_telemetry import set_current_project
+from job_view import submit_generation_job, render_job_panel
 
 # --- 페이지 설정 ---
 st.set_page_config(page_title="성능 검증", layout="wide")
 
 # --- Matplotlib 한글 폰트 설정 ---
-try:
-    font_path = fm.findfont("NanumGothic", fallback_to_default=True)
-    if font_path: plt.rc("font", family="NanumGothic")
-    elif sys.platform == "darwin": plt.rc("font", family="AppleGothic")
-    elif sys.platform == "win32": plt.rc("font", family="Malgun Gothic")
-except Exception: pass
-plt.rcParams['axes.unicode_minus'] = False
+@st.cache_resource
+def get_pyplot():
+    """한글 폰트를 설정한 pyplot을 반환합니다. matplotlib 임포트와 폰트 탐색은 차트를 처음 그릴 때 프로세스당 한 번만 실행됩니다."""
+    import matplotlib.pyplot as plt
+    import matplotlib.font_manager as fm
+    try:
+        font_path = fm.findfont("NanumGothic", fallback_to_default=True)
+        if font_path: plt.rc("font", family="NanumGothic")
+        elif sys.platform == "darwin": plt.rc("font", family="AppleGothic")
+        elif sys.platform == "win32": plt.rc("font", family="Malgun Gothic")
+    except Exception: pass
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
 
 # --- 페이지 제목 ---
 st.title("📊 성능 검증")
@@ -34,11 +40,14 @@ selected_id = st.session_state.get('selected_project_id', None)
 if not selected_id:
     st.error("프로젝트를 선택해주세요. 메인 대시보드(app)로 돌아가 작업할 프로젝트를 먼저 선택해주세요.")
     st.stop()
-design_doc_artifacts = get_artifacts_for_project(selected_id, "MODEL_DESIGN")
-if not design_doc_artifacts:
+set_current_project(selected_id)  # 이 페이지의 LLM 호출을 프로젝트별로 기록
+snapshot = get_project_snapshot(selected_id, ["MODEL_DESIGN", "PROBLEM_DEF"])
+design_doc_artifact = snapshot["MODEL_DESIGN"]
+problem_def_artifact = snapshot["PROBLEM_DEF"]
+if not design_doc_artifact:
     st.warning("이 프로젝트에 대한 '모델 설계서'가 없습니다. '모델 설계' 페이지에서 먼저 작성해주세요.")
     st.stop()
-latest_design_doc = design_doc_artifacts[0]['content']
+latest_design_doc = design_doc_artifact['content']
 st.header(f"프로젝트: {st.session_state.get('selected_project_name', 'N/A')}")
 with st.expander("참고: 이 프로젝트의 모델 설계서 보기"):
     st.markdown(latest_design_doc)
@@ -55,16 +64,55 @@ for i, metric in enumerate(st.session_state.metrics):
     col3.button("삭제", on_click=remove_metric, args=(i,), key=f"perf_remove_metric_{i}", use_container_width=True)
 st.button("➕ 지표 추가", on_click=add_metric, use_container_width=True)
 
+
+# --- 신뢰성 검증 항목 입력 (일괄 생성용) ---
+with st.expander("신뢰성 검증 항목 (Trustworthy AI) — '모든 검증 리포트 생성' 시 사용"):
+    fairness_input = st.text_area("공정성 (Fairness)", "예: 성별/연령 그룹 간 정확도 차이 2%p 이내", key="trust_fairness")
+    explainability_input = st.text_area("설명가능성 (Explainability, XAI)", "예: SHAP으로 주요 피처 기여도 확인", key="trust_explainability")
+    robustness_input = st.text_area("강건성 (Robustness)", "예: 오탈자 노이즈 10% 주입 시 정확도 3%p 하락", key="trust_robustness")
+
 # --- AI 리포트 생성 ---
-if st.button("🤖 AI로 성능 평가 리포트 생성하기", type="primary", use_container_width=True):
+col_single, col_all, col_background = st.columns([2, 2, 1])
+generate_single = col_single.button("🤖 AI로 성능 평가 리포트 생성하기", type="primary", use_container_width=True)
+generate_all = col_all.button("🚀 모든 검증 리포트 한 번에 생성하기", use_container_width=True, disabled=not problem_def_artifact,
+                              help=None if problem_def_artifact else "Trustworthy AI 리포트에는 문제정의서가 필요합니다.")
+generate_background = col_background.button("⏳ 백그라운드로 생성", use_container_width=True,
+                                            help="성능 평가 리포트를 백그라운드에서 생성합니다. 아래 작업 목록에서 결과를 불러올 수 있습니다.")
+if generate_single or generate_all or generate_background:
     metrics_dict = {m['name']: m['value'] for m in st.session_state.metrics if m['name']}
     if not metrics_dict: st.error("하나 이상의 유효한 성능 지표를 입력해주세요.")
+    elif generate_background:
+        params = {"design_doc": latest_design_doc, "metrics": metrics_dict}
+        if submit_generation_job(selected_id, "performance_report", params, label=", ".join(metrics_dict)[:30]):
+            st.rerun()
+    elif generate_single:
+        report_text = st.write_stream(stream_performance_report(latest_design_doc, metrics_dict))
+        st.session_state['generated_perf_report'] = report_text
+        st.session_state['current_perf_metrics'] = metrics_dict
+        st.rerun()
     else:
-        with st.spinner("Gemini 에이전트가 성능을 분석하고 리포트를 작성하고 있습니다..."):
-            report_text = generate_performance_report(latest_design_doc, metrics_dict)
-            st.session_state['generated_perf_report'] = report_text
+        # 성능 리포트와 Trustworthy AI 리포트를 동시에 생성 (대기 시간 ≈ 가장 느린 호출 1회)
+        with st.spinner("Gemini 에이전트가 검증 리포트들을 동시에 작성하고 있습니다..."):
+            results = generate_verification_reports(
+                latest_design_doc, metrics_dict, problem_def_artifact['content'],
+                fairness_input, explainability_input, robustness_input,
+            )
+        if results["PERF_REPORT"]["text"] is not None:
+            st.session_state['generated_perf_report'] = results["PERF_REPORT"]["text"]
             st.session_state['current_perf_metrics'] = metrics_dict
-            st.rerun()
+        if results["TRUST_REPORT"]["text"] is not None:
+            st.session_state['generated_trust_report'] = results["TRUST_REPORT"]["text"]
+        # 실패한 리포트는 성공한 결과와 함께 다음 실행에서 표시
+        st.session_state['verification_errors'] = {name: r["error"] for name, r in results.items() if r["error"]}
+        st.rerun()
+
+for name, error in st.session_state.pop('verification_errors', {}).items():
+    st.error(f"{name} 생성 실패: {error}")
+
+def load_perf_report_job(job):
+    st.session_state['generated_perf_report'] = job["result"]
+    st.session_state['current_perf_metrics'] = job["params"]["metrics"]
+render_job_panel(selected_id, "performance_report", load_perf_report_job)
 
 # --- 생성 결과 확인, 발전 및 저장 ---
 if 'generated_perf_report' in st.session_state:
@@ -75,9 +123,9 @@ if 'generated_perf_report' in st.session_state:
     with col2:
         metrics_to_plot = st.session_state.get('current_perf_metrics', {})
         if metrics_to_plot:
-            df_metrics = pd.DataFrame(list(metrics_to_plot.items()), columns=['Metric', 'Value'])
+            plt = get_pyplot()
             fig, ax = plt.subplots()
-            ax.bar(df_metrics['Metric'], df_metrics['Value'], color='skyblue')
+            ax.bar(list(metrics_to_plot.keys()), list(metrics_to_plot.values()), color='skyblue')
             ax.set_ylabel('Score'); ax.set_title('Performance Metrics'); ax.tick_params(axis='x', rotation=45)
             st.pyplot(fig)
     st.markdown("---")
@@ -85,9 +133,14 @@ if 'generated_perf_report' in st.session_state:
     current_text = st.session_state.perf_report_editor
     custom_instruction = st.text_input("직접 편집 지시하기 (예: 이 리포트 내용을 비전문가도 이해하기 쉽게 다시 써줘)")
     if st.button("실행", disabled=not custom_instruction, key="custom_perf_report"):
-        with st.spinner("AI가 당신의 지시를 수행하고 있습니다..."):
-            refined_text = refine_content(current_text, custom_instruction)
-            st.session_state.generated_perf_report = refined_text
+        scope, chunks, splice = stream_refine_content_scoped(current_text, custom_instruction)
+        st.caption(f"편집 범위: {scope}")
+        try:
+            refined_part = st.write_stream(chunks)
+        except LLMCallError as e:
+            st.error(f"편집하지 못해 원문을 그대로 두었습니다. {e}")
+        else:
+            st.session_state.generated_perf_report = splice(refined_part)
             st.rerun()
     st.markdown("---")
     st.subheader("Step 3: 최종본 저장")
@@ -101,13 +154,20 @@ if 'generated_perf_report' in st.session_state:
         del st.session_state['current_perf_metrics']
         st.rerun()
 
+# --- Trustworthy AI 리포트 확인 및 저장 ---
+if st.session_state.get('generated_trust_report'):
+    st.markdown("---")
+    st.subheader("🛡️ 생성된 Trustworthy AI 검증 리포트")
+    trust_text = st.text_area("내용을 검토하고 필요 시 수정하세요.", value=st.session_state.generated_trust_report, height=400, key="trust_report_editor")
+    if st.button("💾 Trustworthy AI 리포트를 이력으로 저장하기", use_container_width=True):
+        save_artifact(project_id=selected_id, stage="VERIFICATION", type="TRUST_REPORT", content=trust_text)
+        st.success("Trustworthy AI 검증 리포트가 이력으로 저장되었습니다.")
+        del st.session_state['generated_trust_report']
+        st.rerun()
+
 # --- 저장된 이력 ---
 st.markdown("---")
 st.header("📜 저장된 성능 평가 리포트 이력")
-artifacts = get_artifacts_for_project(selected_id, "PERF_REPORT")
-if artifacts:
-    for i, artifact in enumerate(artifacts):
-        with st.expander(f"버전 {len(artifacts) - i} ({artifact['created_at']})"):
-            st.markdown(artifact['content'])
-else:
-    st.info("이 프로젝트에 저장된 성능 평가 리포트가 없습니다.")
+render_artifact_history(selected_id, "PERF_REPORT", "이 프로젝트에 저장된 성능 평가 리포트가 없습니다.")
+st.header("📜 저장된 Trustworthy AI 검증 리포트 이력")
+render_artifact_history(selected_id, "TRUST_REPORT", "이 프로젝트에 저장된 Trustworthy AI 검증 리포트가 없습니다.")
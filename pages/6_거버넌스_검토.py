@@ -9,8 +9,11 @@ from datetime import datetime
 
 # --- 경로 설정 및 모듈 import ---
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from persistence import get_latest_artifact, save_artifact, get_artifacts_for_project
-from gemini_agent import generate_governance_summary
+from persistence import get_project_snapshot, save_artifact, artifact_contains_any
+from history_view import render_artifact_history
+from gemini_agent import stream_governance_summary
+from llm_telemetry import set_current_project
+from job_view import submit_generation_job, render_job_panel, BACKGROUND_JOB_HELP
 
 # --- 페이지 설정 ---
 st.set_page_config(page_title="거버넌스 검증", layout="wide")
@@ -22,6 +25,7 @@ selected_id = st.session_state.get('selected_project_id')
 if not selected_id:
     st.error("프로젝트를 선택해주세요. 메인 대시보드(app)로 돌아가 작업할 프로젝트를 먼저 선택해주세요.")
     st.stop()
+set_current_project(selected_id)  # 이 페이지의 LLM 호출을 프로젝트별로 기록
 
 st.header(f"프로젝트: {st.session_state.get('selected_project_name', 'N/A')}")
 st.info("이전 단계들에서 저장된 모든 산출물을 자동으로 불러와 거버넌스 항목들을 점검합니다.")
@@ -30,12 +34,13 @@ st.info("이전 단계들에서 저장된 모든 산출물을 자동으로 불
 # --- 2. 데이터 집계 및 컨텍스트 추출 ---
 st.subheader("Step 1: 프로젝트 데이터 자동 집계")
 
-# 각 산출물의 최신 버전을 불러옵니다.
+# 각 산출물의 최신 버전을 한 번의 쿼리로 불러옵니다.
 with st.spinner("프로젝트의 모든 산출물 데이터를 불러오는 중입니다..."):
-    mcp_artifact = get_latest_artifact(selected_id, "MCP_YAML")
-    problem_def_artifact = get_latest_artifact(selected_id, "PROBLEM_DEF")
-    design_doc_artifact = get_latest_artifact(selected_id, "MODEL_DESIGN")
-    perf_report_artifact = get_latest_artifact(selected_id, "PERF_REPORT")
+    snapshot = get_project_snapshot(selected_id, ["MCP_YAML", "PROBLEM_DEF", "MODEL_DESIGN", "PERF_REPORT"])
+    mcp_artifact = snapshot["MCP_YAML"]
+    problem_def_artifact = snapshot["PROBLEM_DEF"]
+    design_doc_artifact = snapshot["MODEL_DESIGN"]
+    perf_report_artifact = snapshot["PERF_REPORT"]
 
 # 각 산출물의 존재 여부 확인 및 컨텍스트 추출
 data_summary = {}
@@ -50,10 +55,8 @@ if mcp_artifact:
 else:
     data_summary["MCP 컨텍스트"] = "❌ 없음"
 
-problem_def_text = ""
 if problem_def_artifact:
     data_summary["문제정의서"] = f"✅ (버전: {problem_def_artifact['created_at']})"
-    problem_def_text = problem_def_artifact['content']
 else:
     data_summary["문제정의서"] = "❌ 없음"
 
@@ -93,7 +96,8 @@ rules = {
     "담당자(responsible_party)가 MCP에 명시되었는가?": bool(responsible_party),
     "성능(Accuracy)이 0.9 이상인가?": accuracy >= 0.9,
     "고위험(High-Risk) 모델인가?": risk_level.lower() == "high",
-    "개인정보 처리 관련 내용이 문제정의서에 포함되었는가?": "개인정보" in problem_def_text or "PII" in problem_def_text
+    # 본문을 직접 훑지 않고 전문 검색 인덱스로 키워드 포함 여부를 확인
+    "개인정보 처리 관련 내용이 문제정의서에 포함되었는가?": artifact_contains_any(problem_def_artifact['id'], ["개인정보", "PII"])
 }
 
 passed_count = 0
@@ -116,11 +120,17 @@ for rule_name, is_passed in rules.items():
 st.markdown("---")
 st.subheader("Step 3: AI 종합 리스크 분석")
 
-if st.button("🤖 점검 결과 기반으로 리포트 생성", type="primary", use_container_width=True):
-    with st.spinner("AI가 종합 리스크 분석 및 권고안을 작성합니다..."):
-        report_text = generate_governance_summary(mcp_data, check_results_text_list)
-        st.session_state['generated_gov_report'] = report_text
+col_now, col_background = st.columns([3, 1])
+if col_now.button("🤖 점검 결과 기반으로 리포트 생성", type="primary", use_container_width=True):
+    report_text = st.write_stream(stream_governance_summary(mcp_data, check_results_text_list))
+    st.session_state['generated_gov_report'] = report_text
+    st.rerun()
+if col_background.button("⏳ 백그라운드로 생성", use_container_width=True, help=BACKGROUND_JOB_HELP):
+    params = {"mcp_context": mcp_data, "check_results": check_results_text_list}
+    if submit_generation_job(selected_id, "governance_summary", params, label=f"통과 {passed_count}/{len(rules)}"):
         st.rerun()
+render_job_panel(selected_id, "governance_summary",
+                 lambda job: st.session_state.update(generated_gov_report=job["result"]))
 
 # --- 5. 생성된 리포트 확인 및 저장 ---
 if 'generated_gov_report' in st.session_state and st.session_state.get('generated_gov_report'):
@@ -149,10 +159,4 @@ if 'generated_gov_report' in st.session_state and st.session_state.get('generate
 # --- 6. 저장된 이력 ---
 st.markdown("---")
 st.header("📜 저장된 거버넌스 검토 리포트 이력")
-artifacts = get_artifacts_for_project(selected_id, "GOV_REPORT")
-if artifacts:
-    for i, artifact in enumerate(artifacts):
-        with st.expander(f"버전 {len(artifacts) - i} ({artifact['created_at']})"):
-            st.markdown(artifact['content'])
-else:
-    st.info("이 프로젝트에 저장된 거버넌스 검토 리포트가 없습니다.")
+render_artifact_history(selected_id, "GOV_REPORT", "이 프로젝트에 저장된 거버넌스 검토 리포트가 없습니다.")
@@ -0,0 +1,57 @@
+# pages/7_산출물_검색.py
+
+import streamlit as st
+import sys
+import os
+
+# --- 경로 설정 ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from persistence import search_artifacts, unindexed_search_terms
+
+# --- 페이지 설정 ---
+st.set_page_config(page_title="산출물 검색", layout="wide")
+
+# --- 페이지 제목 ---
+st.title("🔎 산출물 검색")
+st.markdown("---")
+st.info("모든 프로젝트의 저장된 산출물 본문을 전문 검색합니다. 공백으로 나눈 검색어가 모두 포함된 산출물을 찾습니다.")
+
+ARTIFACT_TYPES = {
+    "전체": None,
+    "MCP (MCP_YAML)": "MCP_YAML",
+    "문제정의서 (PROBLEM_DEF)": "PROBLEM_DEF",
+    "모델 설계서 (MODEL_DESIGN)": "MODEL_DESIGN",
+    "테스트 케이스 (TEST_CASE)": "TEST_CASE",
+    "성능 평가 리포트 (PERF_REPORT)": "PERF_REPORT",
+    "Trustworthy AI 리포트 (TRUST_REPORT)": "TRUST_REPORT",
+    "거버넌스 리포트 (GOV_REPORT)": "GOV_REPORT",
+}
+
+# --- 검색 조건 ---
+col1, col2, col3 = st.columns([3, 2, 1])
+with col1:
+    query = st.text_input("검색어", placeholder="예: 개인정보")
+with col2:
+    type_label = st.selectbox("산출물 유형", list(ARTIFACT_TYPES.keys()))
+with col3:
+    selected_id = st.session_state.get('selected_project_id', None)
+    only_current = st.checkbox("현재 프로젝트만", value=False, disabled=not selected_id)
+
+# --- 검색 결과 ---
+if query:
+    results = search_artifacts(
+        query,
+        type=ARTIFACT_TYPES[type_label],
+        project_id=selected_id if only_current else None,
+    )
+    short_terms = unindexed_search_terms(query)
+    if short_terms:
+        st.caption(f"3글자 미만 검색어({', '.join(short_terms)})는 검색 색인을 쓸 수 없어 본문에서 직접 찾습니다. "
+                   "짧은 검색어만 입력하면 관련도 대신 최신순으로 보여주며, 검색이 느릴 수 있습니다.")
+    st.subheader(f"검색 결과 ({len(results)}건)")
+    if not results:
+        st.warning("검색 결과가 없습니다.")
+    for result in results:
+        with st.container(border=True):
+            st.markdown(f"**{result['project_name']}** · `{result['type']}` · {result['created_at']}")
+            st.markdown(result['snippet'])
@@ -0,0 +1,105 @@
+# pages/8_LLM_사용_현황.py
+
+import streamlit as st
+import sys
+import os
+import time
+
+# --- 경로 설정 ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from persistence import get_all_projects
+from llm_telemetry import load_calls, summarize_calls, usage_over_time
+
+# --- 페이지 설정 ---
+st.set_page_config(page_title="LLM 사용 현황", layout="wide")
+
+# --- 페이지 제목 ---
+st.title("📈 LLM 사용 현황")
+st.markdown("---")
+st.info("생성 함수와 프로젝트별 LLM 호출 지연, 오류율, 토큰 사용량을 보여줍니다. 토큰 수는 글자 수 기반 추정치입니다.")
+
+# 기간 → (조회 시작 시점까지의 초, 시계열 집계 단위)
+PERIODS = {
+    "최근 24시간": (24 * 60 * 60, "h"),
+    "최근 7일": (7 * 24 * 60 * 60, "D"),
+    "최근 30일": (30 * 24 * 60 * 60, "D"),
+    "최근 90일": (90 * 24 * 60 * 60, "W"),
+}
+
+# --- 조회 조건 ---
+col1, col2 = st.columns([2, 1])
+with col1:
+    period = st.selectbox("기간", list(PERIODS.keys()), index=1)
+with col2:
+    selected_id = st.session_state.get('selected_project_id', None)
+    only_current = st.checkbox("현재 프로젝트만", value=False, disabled=not selected_id)
+
+seconds, freq = PERIODS[period]
+calls = load_calls(since=time.time() - seconds, project_id=selected_id if only_current else None)
+if calls.empty:
+    st.warning("선택한 기간에 기록된 LLM 호출이 없습니다.")
+    st.stop()
+
+# --- 요약 지표 ---
+live = calls[~calls["cache_hit"]]
+errors = calls[~calls["outcome"].isin(["ok", "cancelled"])]
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("호출 수", f"{len(calls):,}")
+col2.metric("오류율", f"{len(errors) / len(calls):.1%}")
+col3.metric("캐시 히트율", f"{calls['cache_hit'].mean():.1%}")
+col4.metric("지연 p95", f"{live['latency_ms'].quantile(0.95) / 1000:.1f}초" if not live.empty else "-")
+col5.metric("토큰 사용량", f"{int(calls['prompt_tokens'].sum() + calls['response_tokens'].sum()):,}")
+
+SUMMARY_COLUMNS = {
+    "calls": "호출 수",
+    "error_rate": "오류율",
+    "timeout_rate": "타임아웃 비율",
+    "cache_hit_rate": "캐시 히트율",
+    "coalesced_rate": "합류 비율",
+    "p50_ms": "p50 (ms)",
+    "p95_ms": "p95 (ms)",
+    "p99_ms": "p99 (ms)",
+    "prompt_tokens": "입력 토큰",
+    "response_tokens": "출력 토큰",
+    "total_tokens": "총 토큰",
+}
+SUMMARY_FORMAT = {
+    "오류율": "{:.1%}", "타임아웃 비율": "{:.1%}", "캐시 히트율": "{:.1%}", "합류 비율": "{:.1%}",
+    "p50 (ms)": "{:,.0f}", "p95 (ms)": "{:,.0f}", "p99 (ms)": "{:,.0f}",
+    "입력 토큰": "{:,}", "출력 토큰": "{:,}", "총 토큰": "{:,}",
+}
+
+def show_summary(summary):
+    table = summary[list(SUMMARY_COLUMNS)].rename(columns=SUMMARY_COLUMNS)
+    st.dataframe(table.style.format(SUMMARY_FORMAT, na_rep="-"), use_container_width=True)
+
+# --- 생성 함수별 ---
+st.subheader("생성 함수별")
+show_summary(summarize_calls(calls.fillna({"function": "(기타)"}), "function").rename_axis("함수"))
+
+# --- 프로젝트별 ---
+if not only_current:
+    st.subheader("프로젝트별")
+    project_names = {project["id"]: project["name"] for project in get_all_projects()}
+    by_project = calls.assign(project=calls["project_id"].map(project_names).fillna("(프로젝트 없음)"))
+    show_summary(summarize_calls(by_project, "project").rename_axis("프로젝트"))
+
+# --- 기간별 추이 ---
+st.subheader("기간별 추이")
+trend = usage_over_time(calls, freq)
+col1, col2 = st.columns(2)
+with col1:
+    st.caption("토큰 사용량")
+    st.bar_chart(trend["total_tokens"])
+    st.caption("호출 수 / 오류 수")
+    st.line_chart(trend[["calls", "errors"]])
+with col2:
+    st.caption("지연 p95 (ms)")
+    st.line_chart(trend["p95_ms"])
+
+# --- 최근 오류 ---
+if not errors.empty:
+    st.subheader("최근 오류")
+    recent = errors.sort_values("started_at", ascending=False).head(20)
+    st.dataframe(recent[["started_at", "function", "project_id", "outcome", "latency_ms", "error"]],
+                 use_container_width=True, hide_index=True)
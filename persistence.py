@@ -3,112 +3,1356 @@
 import sqlite3
 from datetime import datetime
 import os
+import random
+import threading
+import time
+import functools
+import weakref
+import hashlib
+import json
+import zlib
+import difflib
+import io
+import tarfile
+import gzip
+import queue
+import copy
+import re
+from concurrent.futures import Future
+from collections import OrderedDict
+from contextlib import contextmanager
 
 DB_PATH = "database/mcp_database.db"
+SCHEMA_VERSION = 3            # 스키마(테이블, 인덱스, 트리거)를 바꾸면 올림. DB의 PRAGMA user_version과 비교
 
-def init_db():
-    """DB 파일과 테이블을 초기화합니다. DB가 위치할 폴더도 자동으로 생성합니다."""
-    db_dir = os.path.dirname(DB_PATH)
-    if not os.path.exists(db_dir):
-        os.makedirs(db_dir)
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # 데이터베이스 연결 시 외부 키 제약 조건 활성화
-    cursor.execute("PRAGMA foreign_keys = ON;")
-    
-    # 프로젝트 테이블 (이름은 중복될 수 없도록 UNIQUE 제약 조건 추가)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS projects (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL UNIQUE,
-        description TEXT,
-        created_at TEXT NOT NULL
+# --- 커넥션 관리 설정 ---
+BUSY_TIMEOUT_MS = 5000        # 잠금 대기 시간 (SQLite busy_timeout)
+LOCK_RETRY_ATTEMPTS = 5       # busy_timeout 이후에도 잠겨 있을 때의 재시도 횟수
+LOCK_RETRY_BASE_DELAY = 0.05  # 재시도 간 기본 대기 시간(초), 지수적으로 증가
+
+MAX_IDLE_CONNECTIONS = 8      # 스레드 종료 후 재사용을 위해 보관할 유휴 커넥션 수 (DB 파일별)
+
+HISTORY_PAGE_SIZE = 10        # 이력 목록 한 페이지당 버전 수
+PROJECT_PAGE_SIZE = 25        # 대시보드 프로젝트 목록 한 페이지당 행 수
+
+READ_CACHE_SIZE = 1024        # 조회 결과를 (프로젝트, 데이터 버전, 함수, 인자) 기준으로 보관하는 LRU 크기 (모든 세션 공유)
+
+# --- 산출물 본문 저장소 설정 ---
+SNAPSHOT_INTERVAL = 16        # 델타 체인이 이 길이에 도달하면 전체 스냅샷을 새로 저장 (읽기 비용 상한)
+COMPRESSION_LEVEL = 6         # zlib 압축 레벨
+CONTENT_CACHE_SIZE = 256      # 복원한 본문을 해시 기준으로 보관하는 LRU 크기
+
+# 대시보드에 진행 현황을 표시할 단계별 산출물 타입 (표시 순서)
+DASHBOARD_STAGES = ["PROBLEM_DEF", "MODEL_DESIGN", "TEST_CASE", "PERF_REPORT", "GOV_REPORT"]
+# 대시보드 프로젝트 목록의 정렬 기준 → projects 컬럼 (모두 인덱스가 있어 페이지 조회 비용이 전체 프로젝트 수와 무관)
+PROJECT_SORT_COLUMNS = {"created_at": "created_at", "name": "name", "id": "id"}
+
+# --- 내보내기/가져오기 설정 ---
+EXPORT_FORMAT_VERSION = 1
+EXPORT_FETCH_SIZE = 500       # 내보내기 시 커서에서 한 번에 가져오는 행 수
+EXPORT_TAR_MEMBER_RECORDS = 5000  # tar.gz 내보내기 시 멤버 파일 하나에 담는 레코드 수
+IMPORT_BATCH_SIZE = 1000      # 가져오기 시 executemany 한 번에 넣는 산출물 수
+
+# --- 그룹 커밋 쓰기 큐 설정 ---
+WRITE_QUEUE_MAX_BATCH = 256   # 한 트랜잭션에 묶는 최대 저장 요청 수
+WRITE_QUEUE_MAX_DELAY_MS = 5  # 첫 요청 이후 다른 요청을 모으기 위해 기다리는 최대 시간
+
+# --- 보존 정책 / 아카이브 / 공간 회수 설정 ---
+# 타입별 보존 정책: 최근 keep_last개 버전과, keep_monthly이면 월별 마지막 버전 1개씩을 DB에 남기고
+# 나머지는 압축 아카이브 파일로 옮깁니다. 정책이 없는 타입은 DEFAULT_RETENTION을 따르며, None이면 모두 보존합니다.
+RETENTION_POLICIES = {
+    "MCP_YAML": {"keep_last": 30, "keep_monthly": True},
+    "PROBLEM_DEF": {"keep_last": 20, "keep_monthly": True},
+    "MODEL_DESIGN": {"keep_last": 20, "keep_monthly": True},
+    "TEST_CASE": {"keep_last": 20, "keep_monthly": True},
+    "PERF_REPORT": {"keep_last": 20, "keep_monthly": True},
+    "TRUST_REPORT": {"keep_last": 20, "keep_monthly": True},
+    "GOV_REPORT": {"keep_last": 20, "keep_monthly": True},
+}
+DEFAULT_RETENTION = {"keep_last": 20, "keep_monthly": True}
+# 백그라운드 보존 정책 자동 적용 여부 (기본 꺼짐). 켜려면 환경 변수 MCP_RETENTION_ENABLED=1
+# 꺼져 있어도 apply_retention()을 직접 호출하면 정책이 적용됩니다.
+RETENTION_ENABLED = os.environ.get("MCP_RETENTION_ENABLED") == "1"
+ARCHIVE_PATH = "database/archive/artifacts_archive.jsonl.gz"
+VACUUM_STEP_PAGES = 256       # 백그라운드 incremental_vacuum 한 번에 회수하는 최대 페이지 수
+VACUUM_MIN_FREE_PAGES = 64    # 빈 페이지가 이보다 적으면 회수를 건너뜀
+MAINTENANCE_INTERVAL_SECONDS = 60       # 백그라운드 공간 회수 주기
+RETENTION_INTERVAL_SECONDS = 60 * 60    # 백그라운드 보존 정책 적용 주기
+
+# --- 전문 검색 설정 ---
+FTS_TOKENIZER = "trigram"     # 한국어처럼 띄어쓰기 단위가 아닌 부분 문자열 검색을 위해 trigram 사용 (3글자 미만 검색어는 본문에서 직접 찾음)
+SEARCH_SNIPPET_TOKENS = 32    # 검색 결과 스니펫 길이 (trigram 기준 약 글자 수)
+
+_local = threading.local()
+_idle_connections = {}        # db_path -> [sqlite3.Connection]
+_pool_lock = threading.Lock()
+
+class _ThreadConnections:
+    """스레드별 커넥션 묶음. 스레드가 종료되어 수거되면 커넥션은 유휴 풀로 반환됩니다."""
+    def __init__(self):
+        self.connections = {}
+        weakref.finalize(self, _release_connections, self.connections)
+
+def _release_connections(connections):
+    with _pool_lock:
+        for db_path, conn in connections.items():
+            idle = _idle_connections.setdefault(db_path, [])
+            if conn.in_transaction or len(idle) >= MAX_IDLE_CONNECTIONS:
+                conn.close()
+            else:
+                idle.append(conn)
+        connections.clear()
+
+def _apply_pragmas(conn):
+    """커넥션 생성 시 한 번만 적용되는 PRAGMA 설정."""
+    # 새 DB 파일에만 바로 적용됨 (WAL 전환이 파일 헤더를 쓰기 전에 설정해야 함). 기존 DB는 enable_incremental_vacuum()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+
+def _register_functions(conn):
+    """트리거와 뷰에서 사용하는 SQL 함수를 등록합니다. (artifact_text: content_hash → 본문)"""
+    conn.create_function("artifact_text", 1, lambda content_hash: _load_content(conn, content_hash),
+                         deterministic=True)
+
+def get_connection(db_path=None):
+    """
+    현재 스레드 전용 커넥션을 반환합니다.
+    스레드마다 DB 파일별로 커넥션을 하나씩 배정하고, 스레드가 끝나면 풀로 돌려받아 재사용합니다.
+    (Streamlit은 rerun마다 새 스레드에서 스크립트를 실행하므로 스레드 간 재사용이 필요합니다.)
+    트랜잭션은 transaction()으로 명시적으로 시작하므로 autocommit 모드로 엽니다.
+    """
+    db_path = db_path or DB_PATH
+    holder = getattr(_local, "holder", None)
+    if holder is None:
+        holder = _local.holder = _ThreadConnections()
+    conn = holder.connections.get(db_path)
+    if conn is None:
+        with _pool_lock:
+            idle = _idle_connections.get(db_path)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            _apply_pragmas(conn)
+            _register_functions(conn)
+        holder.connections[db_path] = conn
+    return conn
+
+def close_all_connections():
+    """현재 스레드와 유휴 풀의 커넥션을 모두 닫습니다. (DB 경로 변경, 벤치마크 정리 용도)"""
+    holder = getattr(_local, "holder", None)
+    if holder is not None:
+        for conn in holder.connections.values():
+            conn.close()
+        holder.connections.clear()
+    with _pool_lock:
+        for idle in _idle_connections.values():
+            for conn in idle:
+                conn.close()
+        _idle_connections.clear()
+
+def _is_lock_error(e):
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+def retry_on_locked(func):
+    """'database is locked' 오류 발생 시 지터가 포함된 지수 백오프로 재시도합니다."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(LOCK_RETRY_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_lock_error(e) or attempt == LOCK_RETRY_ATTEMPTS - 1:
+                    raise
+                delay = LOCK_RETRY_BASE_DELAY * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+    return wrapper
+
+@contextmanager
+def transaction(db_path=None):
+    """
+    쓰기 트랜잭션을 BEGIN IMMEDIATE로 시작합니다.
+    쓰기 잠금을 처음부터 확보하므로 WAL 모드에서 읽기→쓰기 승격 시의 교착을 피합니다.
+    """
+    conn = get_connection(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+# --- 산출물 본문 저장소 (해시 기반 blob + 델타) ---
+# 본문은 sha256 해시를 키로 artifact_blobs에 한 번만 저장됩니다(완전 중복 제거).
+# 각 blob은 zlib으로 압축된 전체 스냅샷이거나, 같은 프로젝트·타입의 직전 버전(base_hash)에 대한
+# 줄 단위 델타입니다. 델타 체인 길이(depth)가 SNAPSHOT_INTERVAL에 닿으면 스냅샷을 새로 저장하므로
+# 어떤 버전이든 최대 SNAPSHOT_INTERVAL개의 blob만 읽어 복원합니다.
+
+_content_cache = OrderedDict()
+_content_cache_lock = threading.Lock()
+
+def _content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def _cache_content(content_hash, content):
+    with _content_cache_lock:
+        _content_cache[content_hash] = content
+        _content_cache.move_to_end(content_hash)
+        while len(_content_cache) > CONTENT_CACHE_SIZE:
+            _content_cache.popitem(last=False)
+
+def _make_delta(base, target):
+    """base → target 변환을 줄 단위 연산 목록(["c", i1, i2] 복사 / ["i", text] 삽입)으로 만듭니다."""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif j2 > j1:  # replace / insert (delete는 복사하지 않는 것으로 충분)
+            ops.append(["i", "".join(target_lines[j1:j2])])
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+def _apply_delta(base, delta):
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(delta):
+        if op[0] == "c":
+            parts.extend(base_lines[op[1]:op[2]])
+        else:
+            parts.append(op[1])
+    return "".join(parts)
+
+def _load_content(conn, content_hash):
+    """해시에 해당하는 본문을 복원합니다. 스냅샷까지의 체인을 재귀 CTE 한 번으로 읽습니다."""
+    if content_hash is None:
+        return None
+    with _content_cache_lock:
+        if content_hash in _content_cache:
+            _content_cache.move_to_end(content_hash)
+            return _content_cache[content_hash]
+
+    chain = conn.execute("""
+    WITH RECURSIVE chain(hash, base_hash, data, lvl) AS (
+        SELECT hash, base_hash, data, 0 FROM artifact_blobs WHERE hash = ?
+        UNION ALL
+        SELECT b.hash, b.base_hash, b.data, chain.lvl + 1
+        FROM artifact_blobs b JOIN chain ON b.hash = chain.base_hash
     )
+    SELECT base_hash, data FROM chain ORDER BY lvl DESC
+    """, (content_hash,)).fetchall()
+    if not chain:
+        return None
+
+    content = None
+    for row in chain:
+        data = zlib.decompress(row["data"]).decode("utf-8")
+        content = data if row["base_hash"] is None else _apply_delta(content, data)
+    _cache_content(content_hash, content)
+    return content
+
+def _store_content(conn, project_id, type, content):
+    """
+    본문을 blob 저장소에 넣고 해시를 반환합니다. 트랜잭션 안에서 호출해야 합니다.
+    동일한 본문이 이미 있으면 아무것도 쓰지 않고, 직전 버전과의 델타가 스냅샷보다 작을 때만 델타로 저장합니다.
+    """
+    if content is None:
+        return None
+    content_hash = _content_hash(content)
+    if conn.execute("SELECT 1 FROM artifact_blobs WHERE hash = ?", (content_hash,)).fetchone():
+        _cache_content(content_hash, content)
+        return content_hash
+
+    snapshot = zlib.compress(content.encode("utf-8"), COMPRESSION_LEVEL)
+    base_hash, depth, data = None, 0, snapshot
+    prev = conn.execute("""
+    SELECT a.content_hash, b.depth FROM artifacts a
+    JOIN artifact_blobs b ON b.hash = a.content_hash
+    WHERE a.project_id = ? AND a.type = ?
+    ORDER BY a.created_at DESC, a.id DESC
+    LIMIT 1
+    """, (project_id, type)).fetchone()
+    if prev and prev["depth"] + 1 < SNAPSHOT_INTERVAL:
+        base = _load_content(conn, prev["content_hash"])
+        delta = zlib.compress(_make_delta(base, content).encode("utf-8"), COMPRESSION_LEVEL)
+        if len(delta) < len(snapshot):
+            base_hash, depth, data = prev["content_hash"], prev["depth"] + 1, delta
+
+    conn.execute("INSERT INTO artifact_blobs (hash, base_hash, depth, data) VALUES (?, ?, ?, ?)",
+                 (content_hash, base_hash, depth, data))
+    _cache_content(content_hash, content)
+    return content_hash
+
+def _collect_garbage_blobs(conn, candidate_hashes):
+    """
+    삭제된 산출물이 참조하던 blob(candidate_hashes) 중 더 이상 참조되지 않는 것을 삭제합니다. 트랜잭션 안에서 호출해야 합니다.
+    전체 blob을 훑지 않고 후보에서 출발해, 산출물(content_hash)이나 다른 blob의 델타 기준(base_hash)으로
+    쓰이지 않는 것만 인덱스 조회로 확인해 지우고, 지운 blob의 base_hash를 다시 후보로 올려 델타 체인을 따라갑니다.
+    """
+    pending = {h for h in candidate_hashes if h is not None}
+    while pending:
+        content_hash = pending.pop()
+        if conn.execute("SELECT 1 FROM artifacts WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone():
+            continue
+        if conn.execute("SELECT 1 FROM artifact_blobs WHERE base_hash = ? LIMIT 1", (content_hash,)).fetchone():
+            continue  # 아직 살아 있는 델타의 기준 (그 델타가 지워질 때 다시 후보가 됨)
+        row = conn.execute("SELECT base_hash FROM artifact_blobs WHERE hash = ?", (content_hash,)).fetchone()
+        if row is None:
+            continue
+        conn.execute("DELETE FROM artifact_blobs WHERE hash = ?", (content_hash,))
+        conn.execute("DELETE FROM artifact_summaries WHERE content_hash = ?", (content_hash,))
+        if row["base_hash"] is not None:
+            pending.add(row["base_hash"])
+
+def _migrate_inline_content(conn):
+    """이전 버전 DB의 artifacts.content 평문을 blob 저장소로 옮깁니다. (버전 순서대로 델타 생성)"""
+    rows = conn.execute("""
+    SELECT id, project_id, type, content FROM artifacts
+    WHERE content IS NOT NULL AND content_hash IS NULL
+    ORDER BY project_id, type, created_at, id
+    """).fetchall()
+    for row in rows:
+        content_hash = _store_content(conn, row["project_id"], row["type"], row["content"])
+        conn.execute("UPDATE artifacts SET content_hash = ?, content = NULL WHERE id = ?",
+                     (content_hash, row["id"]))
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+def init_db():
+    """
+    DB 파일과 테이블을 초기화합니다. DB가 위치할 폴더도 자동으로 생성합니다.
+    프로세스당 (DB 파일별로) 한 번만 실행되므로 rerun마다 호출해도 SQL을 실행하지 않습니다.
+    DB에 저장된 스키마 버전(PRAGMA user_version)이 SCHEMA_VERSION 이상이면 DDL과 마이그레이션을 건너뜁니다.
+    """
+    if DB_PATH in _initialized_paths:
+        return
+    with _init_lock:
+        if DB_PATH in _initialized_paths:
+            return
+        db_dir = os.path.dirname(DB_PATH)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # auto_vacuum 전환(전체 VACUUM)은 페이지 로딩을 막지 않도록 유지보수 스레드가 담당 (enable_incremental_vacuum)
+        if get_connection().execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            _create_schema()
+        _initialized_paths.add(DB_PATH)
+
+@retry_on_locked
+def _create_schema():
+    with transaction() as conn:
+        # 프로젝트 테이블 (이름은 중복될 수 없도록 UNIQUE 제약 조건 추가)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            description TEXT,
+            created_at TEXT NOT NULL
+        )
+        """)
+        # 대시보드 목록의 생성일순 페이지 조회용 (이름순은 UNIQUE 인덱스 사용)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects (created_at, id)")
+        # 산출물 테이블 (프로젝트 삭제 시 함께 삭제되도록 ON DELETE CASCADE 추가)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            type TEXT NOT NULL,
+            content TEXT,
+            content_hash TEXT,
+            content_size INTEGER,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+        )
+        """)
+        # 본문 저장소 (content는 이전 버전 DB 호환용으로만 남고, 새 본문은 content_hash로 참조)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS artifact_blobs (
+            hash TEXT PRIMARY KEY,
+            base_hash TEXT,
+            depth INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+        """)
+        # 프롬프트용 문서 요약 캐시 (본문 해시 + 토큰 예산별, 해당 blob이 정리되면 함께 삭제)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS artifact_summaries (
+            content_hash TEXT NOT NULL,
+            token_budget INTEGER NOT NULL,
+            summary TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (content_hash, token_budget)
+        )
+        """)
+        # 이전 버전 DB 마이그레이션: 이력 목록에서 본문을 읽지 않도록 크기(바이트)를 별도 컬럼에 보관
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(artifacts)")}
+        if "content_size" not in columns:
+            conn.execute("ALTER TABLE artifacts ADD COLUMN content_size INTEGER")
+            conn.execute("UPDATE artifacts SET content_size = length(CAST(content AS BLOB))")
+        if "content_hash" not in columns:
+            conn.execute("ALTER TABLE artifacts ADD COLUMN content_hash TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_content_hash ON artifacts (content_hash)")
+        # 삭제 후 blob 정리에서 '다른 델타의 기준인지' 확인용
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_artifact_blobs_base_hash ON artifact_blobs (base_hash)")
+        # 최신 버전 조회(프로젝트+타입별 created_at 역순)를 위한 복합 인덱스
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_artifacts_project_type_created
+        ON artifacts (project_id, type, created_at)
+        """)
+        _migrate_inline_content(conn)
+        _create_search_index(conn)
+        _create_project_summary(conn)
+        # 같은 트랜잭션에서 기록하므로, 중간에 실패하면 다음 실행에서 처음부터 다시 초기화
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _create_search_index(conn):
+    """
+    artifacts 본문에 대한 FTS5 인덱스와 동기화 트리거를 만듭니다.
+    본문은 blob 저장소에 있으므로 artifact_text()로 복원하는 뷰를 외부 콘텐츠 테이블로 사용합니다.
+    """
+    conn.execute("""
+    CREATE VIEW IF NOT EXISTS artifact_texts AS
+    SELECT id, COALESCE(content, artifact_text(content_hash)) AS content FROM artifacts
+    """)
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'artifacts_fts'").fetchone()
+    if not exists:
+        try:
+            conn.execute(f"""
+            CREATE VIRTUAL TABLE artifacts_fts USING fts5(
+                content, content='artifact_texts', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+            )
+            """)
+        except sqlite3.OperationalError:
+            # trigram 토크나이저가 없는 구버전 SQLite(3.34 미만)
+            conn.execute("""
+            CREATE VIRTUAL TABLE artifacts_fts USING fts5(
+                content, content='artifact_texts', content_rowid='id', tokenize='unicode61'
+            )
+            """)
+        conn.execute("INSERT INTO artifacts_fts(artifacts_fts) VALUES ('rebuild')")
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS artifacts_fts_insert AFTER INSERT ON artifacts BEGIN
+        INSERT INTO artifacts_fts (rowid, content)
+        VALUES (new.id, COALESCE(new.content, artifact_text(new.content_hash)));
+    END
     """)
-    # 산출물 테이블 (프로젝트 삭제 시 함께 삭제되도록 ON DELETE CASCADE 추가)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS artifacts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS artifacts_fts_delete AFTER DELETE ON artifacts BEGIN
+        INSERT INTO artifacts_fts (artifacts_fts, rowid, content)
+        VALUES ('delete', old.id, COALESCE(old.content, artifact_text(old.content_hash)));
+    END
+    """)
+
+def _create_project_summary(conn):
+    """
+    대시보드용 (프로젝트, 산출물 타입)별 버전 수·최신 저장 시각 요약 테이블과 유지 트리거를 만듭니다.
+    artifacts에 행이 추가/삭제될 때마다 트리거가 갱신하므로 대시보드는 집계 없이 이 테이블만 읽습니다.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'project_summary'").fetchone()
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS project_summary (
         project_id INTEGER NOT NULL,
-        stage TEXT NOT NULL,
         type TEXT NOT NULL,
-        content TEXT,
-        created_at TEXT NOT NULL,
+        version_count INTEGER NOT NULL,
+        latest_created_at TEXT,
+        PRIMARY KEY (project_id, type),
         FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
-    )
+    ) WITHOUT ROWID
+    """)
+    if not exists:
+        conn.execute("""
+        INSERT INTO project_summary (project_id, type, version_count, latest_created_at)
+        SELECT project_id, type, COUNT(*), MAX(created_at) FROM artifacts GROUP BY project_id, type
+        """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS project_summary_insert AFTER INSERT ON artifacts BEGIN
+        INSERT INTO project_summary (project_id, type, version_count, latest_created_at)
+        VALUES (new.project_id, new.type, 1, new.created_at)
+        ON CONFLICT (project_id, type) DO UPDATE SET
+            version_count = version_count + 1,
+            latest_created_at = MAX(COALESCE(latest_created_at, ''), excluded.latest_created_at);
+    END
     """)
-    conn.commit()
-    conn.close()
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS project_summary_delete AFTER DELETE ON artifacts BEGIN
+        UPDATE project_summary SET
+            version_count = version_count - 1,
+            latest_created_at = (SELECT MAX(created_at) FROM artifacts
+                                 WHERE project_id = old.project_id AND type = old.type)
+        WHERE project_id = old.project_id AND type = old.type;
+        DELETE FROM project_summary
+        WHERE project_id = old.project_id AND type = old.type AND version_count <= 0;
+    END
+    """)
+
+# --- 조회 결과 캐시 (쓰기 시 무효화) ---
+# Streamlit은 위젯을 조작할 때마다 페이지 스크립트 전체를 다시 실행하므로, 같은 조회가 rerun마다 반복됩니다.
+# 조회 결과를 프로세스 전역 LRU(모든 세션 공유)에 보관하고, 키에 프로젝트별 데이터 버전을 넣습니다.
+# 이 모듈의 쓰기 함수는 커밋한 뒤 해당 프로젝트와 전체 범위(_ALL_PROJECTS)의 버전을 올리고 캐시 항목을 지우므로,
+# 데이터가 바뀌지 않은 rerun은 SQL을 실행하지 않습니다.
+# 다른 프로세스가 DB를 직접 고친 경우는 감지하지 못하므로 invalidate_read_cache()를 호출해야 합니다.
+
+_ALL_PROJECTS = "*"           # 프로젝트 목록, 대시보드처럼 여러 프로젝트에 걸친 조회의 범위
+_MISSING = object()
+_read_cache = OrderedDict()   # (db_path, 범위, 데이터 버전, 함수 이름, 인자) -> 조회 결과
+_data_versions = {}           # (db_path, 범위) -> 데이터 버전. 범위 None은 DB 전체 무효화 횟수
+_read_cache_lock = threading.Lock()
+
+def _data_version(db_path, scope):
+    return _data_versions.get((db_path, None), 0), _data_versions.get((db_path, scope), 0)
 
+def _invalidate_reads(project_ids=None, db_path=None):
+    """
+    쓰기를 커밋한 뒤 호출합니다. project_ids의 각 프로젝트와 전체 범위의 버전을 올리고 해당 캐시 항목을 지웁니다.
+    project_ids가 None이면 (가져오기, 보존 정책처럼 여러 프로젝트에 걸친 쓰기) 이 DB의 모든 항목을 무효화합니다.
+    """
+    db_path = db_path or DB_PATH
+    scopes = {None} if project_ids is None else {*project_ids, _ALL_PROJECTS}
+    with _read_cache_lock:
+        for scope in scopes:
+            _data_versions[(db_path, scope)] = _data_versions.get((db_path, scope), 0) + 1
+        stale = [key for key in _read_cache if key[0] == db_path and (project_ids is None or key[1] in scopes)]
+        for key in stale:
+            del _read_cache[key]
+
+def invalidate_read_cache():
+    """조회 결과 캐시를 모두 비웁니다. (다른 프로세스가 DB를 고쳤거나 DB 경로를 바꾼 경우)"""
+    _invalidate_reads(None)
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+def _cached_read(project_scoped=True):
+    """
+    데코레이터. 조회 결과를 캐시하고, 호출자에게는 복사본을 돌려줍니다. (호출자가 결과를 고쳐도 캐시는 그대로)
+    project_scoped이면 첫 번째 인자(project_id)의 프로젝트 범위, 아니면 전체 범위의 데이터 버전에 묶입니다.
+    조회 도중 쓰기가 커밋되면 결과를 보관하지 않습니다. (조회 시작 시점의 버전으로 키를 만들기 때문)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            db_path = DB_PATH
+            scope = (kwargs["project_id"] if "project_id" in kwargs else args[0]) if project_scoped else _ALL_PROJECTS
+            arguments = (tuple(_freeze(a) for a in args), tuple(sorted((k, _freeze(v)) for k, v in kwargs.items())))
+            with _read_cache_lock:
+                version = _data_version(db_path, scope)
+                key = (db_path, scope, version, func.__name__, arguments)
+                result = _read_cache.get(key, _MISSING)
+                if result is not _MISSING:
+                    _read_cache.move_to_end(key)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                with _read_cache_lock:
+                    if _data_version(db_path, scope) == version:
+                        _read_cache[key] = result
+                        while len(_read_cache) > READ_CACHE_SIZE:
+                            _read_cache.popitem(last=False)
+            return copy.deepcopy(result)
+        return wrapper
+    return decorator
+
+@_cached_read(project_scoped=False)
+@retry_on_locked
 def get_all_projects():
     """모든 프로젝트 목록을 불러옵니다."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, description, created_at FROM projects ORDER BY created_at DESC")
-    projects = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return projects
+    conn = get_connection()
+    cursor = conn.execute("SELECT id, name, description, created_at FROM projects ORDER BY created_at DESC")
+    return [dict(row) for row in cursor.fetchall()]
+
+@_cached_read(project_scoped=False)
+@retry_on_locked
+def get_dashboard_rows():
+    """
+    대시보드에 필요한 프로젝트 목록과 단계별 진행 현황을 한 번의 쿼리로 불러옵니다.
+    각 행은 프로젝트 정보에 더해 stages({타입: {"count", "latest"} 또는 None})와
+    last_activity(가장 최근 산출물 저장 시각)를 포함합니다.
+    프로젝트가 많으면 한 페이지씩 불러오는 get_project_page를 사용합니다.
+    """
+    conn = get_connection()
+    cursor = conn.execute(f"""
+    SELECT p.id, p.name, p.description, p.created_at,
+           {_stage_columns()},
+           MAX(s.latest_created_at) AS last_activity
+    FROM projects p
+    LEFT JOIN project_summary s ON s.project_id = p.id
+    GROUP BY p.id
+    ORDER BY p.created_at DESC
+    """, _stage_params())
+    return [_dashboard_row(row) for row in cursor.fetchall()]
+
+def _stage_columns():
+    """project_summary(s)를 DASHBOARD_STAGES 타입별 버전 수/최신 저장 시각 컬럼으로 펼치는 집계식."""
+    columns = []
+    for i, _ in enumerate(DASHBOARD_STAGES):
+        columns.append(f"MAX(CASE WHEN s.type = :t{i} THEN s.version_count END) AS count_{i}")
+        columns.append(f"MAX(CASE WHEN s.type = :t{i} THEN s.latest_created_at END) AS latest_{i}")
+    return ", ".join(columns)
+
+def _stage_params():
+    return {f"t{i}": t for i, t in enumerate(DASHBOARD_STAGES)}
+
+def _dashboard_row(row):
+    stages = {}
+    for i, t in enumerate(DASHBOARD_STAGES):
+        count = row[f"count_{i}"]
+        stages[t] = {"count": count, "latest": row[f"latest_{i}"]} if count else None
+    return {
+        "id": row["id"], "name": row["name"], "description": row["description"],
+        "created_at": row["created_at"], "stages": stages, "last_activity": row["last_activity"],
+    }
 
+def _project_search_filter(search):
+    """이름 또는 설명에 search가 들어 있는 프로젝트만 고르는 WHERE 조건과 파라미터. (대소문자 무시, 빈 검색어는 전체)"""
+    if not search or not search.strip():
+        return "1", {}
+    escaped = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return ("(name LIKE :search ESCAPE '\\' OR COALESCE(description, '') LIKE :search ESCAPE '\\')",
+            {"search": f"%{escaped}%"})
+
+@_cached_read(project_scoped=False)
+@retry_on_locked
+def count_projects(search=None):
+    """검색 조건에 맞는 프로젝트 수를 반환합니다."""
+    where, params = _project_search_filter(search)
+    return get_connection().execute(f"SELECT COUNT(*) FROM projects WHERE {where}", params).fetchone()[0]
+
+@_cached_read(project_scoped=False)
+@retry_on_locked
+def get_project_page(search=None, sort="created_at", descending=True, limit=PROJECT_PAGE_SIZE, cursor=None):
+    """
+    대시보드 프로젝트 목록을 한 페이지 불러옵니다. 각 행은 get_dashboard_rows와 같은 형태입니다.
+    sort는 PROJECT_SORT_COLUMNS의 키이고, search는 이름/설명 부분 일치 검색어입니다.
+    cursor는 직전 페이지가 반환한 next_cursor((정렬 값, id))이며, None이면 첫 페이지입니다. (keyset 페이지네이션)
+    진행 현황은 이 페이지의 프로젝트에 대해서만 집계하므로 비용이 전체 프로젝트 수와 무관합니다.
+    (rows, next_cursor)를 반환하고, 더 이상 페이지가 없으면 next_cursor는 None입니다.
+    """
+    column = PROJECT_SORT_COLUMNS[sort]
+    direction, compare = ("DESC", "<") if descending else ("ASC", ">")
+    where, params = _project_search_filter(search)
+    if cursor is not None:
+        where += f" AND ({column}, id) {compare} (:cursor_value, :cursor_id)"
+        params.update(cursor_value=cursor[0], cursor_id=cursor[1])
+    params.update(_stage_params(), limit=limit + 1)
+    conn = get_connection()
+    rows = conn.execute(f"""
+    WITH page AS (
+        SELECT id, name, description, created_at FROM projects
+        WHERE {where}
+        ORDER BY {column} {direction}, id {direction}
+        LIMIT :limit
+    )
+    SELECT p.id, p.name, p.description, p.created_at,
+           {_stage_columns()},
+           MAX(s.latest_created_at) AS last_activity
+    FROM page p
+    LEFT JOIN project_summary s ON s.project_id = p.id
+    GROUP BY p.id
+    ORDER BY p.{column} {direction}, p.id {direction}
+    """, params).fetchall()
+    items = [_dashboard_row(row) for row in rows[:limit]]
+    next_cursor = (items[-1][sort], items[-1]["id"]) if len(rows) > limit else None
+    return items, next_cursor
+
+@retry_on_locked
 def create_project(name, description):
     """새 프로젝트를 생성합니다. 이름이 중복되면 False를 반환합니다."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     now = datetime.now().isoformat()
     try:
-        cursor.execute("INSERT INTO projects (name, description, created_at) VALUES (?, ?, ?)",
-                       (name, description, now))
-        conn.commit()
+        with transaction() as conn:
+            cursor = conn.execute("INSERT INTO projects (name, description, created_at) VALUES (?, ?, ?)",
+                                  (name, description, now))
+        # 삭제된 프로젝트의 id가 재사용될 수 있으므로 새 id의 범위도 무효화
+        _invalidate_reads([cursor.lastrowid])
         return True
     except sqlite3.IntegrityError: # 이름 중복 시 발생하는 오류
         return False
-    finally:
-        conn.close()
 
+@retry_on_locked
 def update_project(project_id, name, description):
     """프로젝트 이름과 설명을 수정합니다."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE projects SET name = ?, description = ? WHERE id = ?",
-                   (name, description, project_id))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("UPDATE projects SET name = ?, description = ? WHERE id = ?",
+                     (name, description, project_id))
+    _invalidate_reads([project_id])
 
+@retry_on_locked
 def delete_project(project_id):
-    """프로젝트와 관련된 모든 산출물을 삭제합니다."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON;")
-    cursor.execute("DELETE FROM projects WHERE id = ?", (project_id,))
-    conn.commit()
-    conn.close()
-    
-# --- 이 아래 두 함수가 누락되었을 가능성이 높습니다. ---
+    """프로젝트와 관련된 모든 산출물을 삭제합니다. (foreign_keys PRAGMA는 커넥션 생성 시 적용됨)"""
+    with transaction() as conn:
+        hashes = [row[0] for row in conn.execute(
+            "SELECT DISTINCT content_hash FROM artifacts WHERE project_id = ?", (project_id,))]
+        conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+        _collect_garbage_blobs(conn, hashes)
+    _invalidate_reads([project_id])
+
+def _insert_artifact(conn, project_id, stage, type, content, created_at):
+    """트랜잭션 안에서 산출물 한 건을 넣고 id를 반환합니다."""
+    size = len(content.encode("utf-8")) if content is not None else 0
+    content_hash = _store_content(conn, project_id, type, content)
+    cursor = conn.execute("""
+    INSERT INTO artifacts (project_id, stage, type, content_hash, content_size, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """, (project_id, stage, type, content_hash, size, created_at))
+    return cursor.lastrowid
 
+@retry_on_locked
 def save_artifact(project_id, stage, type, content):
-    """생성된 산출물을 DB에 저장합니다."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    """생성된 산출물을 DB에 저장하고 id를 반환합니다. 본문은 압축·중복 제거된 blob 저장소에 보관됩니다."""
     now = datetime.now().isoformat()
-    cursor.execute("""
-    INSERT INTO artifacts (project_id, stage, type, content, created_at)
-    VALUES (?, ?, ?, ?, ?)
-    """, (project_id, stage, type, content, now))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        artifact_id = _insert_artifact(conn, project_id, stage, type, content, now)
+    _invalidate_reads([project_id])
+    return artifact_id
 
+@_cached_read()
+@retry_on_locked
 def get_artifacts_for_project(project_id, type):
     """특정 프로젝트의 특정 타입 산출물을 모두 불러옵니다."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("""
-    SELECT content, created_at FROM artifacts
+    conn = get_connection()
+    cursor = conn.execute("""
+    SELECT content, content_hash, created_at FROM artifacts
     WHERE project_id = ? AND type = ?
     ORDER BY created_at DESC
     """, (project_id, type))
-    artifacts = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return artifacts
+    return [_artifact_row(conn, row) for row in cursor.fetchall()]
+
+def _artifact_row(conn, row):
+    """조회 결과 행을 dict로 바꾸고, content_hash를 실제 본문(content)으로 복원합니다."""
+    artifact = dict(row)
+    content_hash = artifact.pop("content_hash")
+    if content_hash is not None:
+        artifact["content"] = _load_content(conn, content_hash)
+    return artifact
+
+@_cached_read()
+@retry_on_locked
+def get_latest_artifact(project_id, type):
+    """특정 프로젝트의 특정 타입 산출물 중 최신 버전 하나만 불러옵니다. 없으면 None을 반환합니다."""
+    conn = get_connection()
+    row = conn.execute("""
+    SELECT id, stage, type, content, content_hash, created_at FROM artifacts
+    WHERE project_id = ? AND type = ?
+    ORDER BY created_at DESC, id DESC
+    LIMIT 1
+    """, (project_id, type)).fetchone()
+    return _artifact_row(conn, row) if row else None
+
+@_cached_read()
+@retry_on_locked
+def get_project_snapshot(project_id, types):
+    """
+    요청한 타입별 최신 산출물을 한 번의 쿼리로 불러옵니다.
+    {type: artifact dict 또는 None} 형태로 반환합니다.
+    순위 계산은 인덱스만으로 처리하고, 본문(content)은 최신 버전에 대해서만 읽습니다.
+    """
+    types = list(types)
+    snapshot = {t: None for t in types}
+    if not types:
+        return snapshot
+    placeholders = ", ".join("?" for _ in types)
+    conn = get_connection()
+    cursor = conn.execute(f"""
+    WITH ranked AS (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY type ORDER BY created_at DESC, id DESC
+        ) AS rn
+        FROM artifacts
+        WHERE project_id = ? AND type IN ({placeholders})
+    )
+    SELECT a.id, a.stage, a.type, a.content, a.content_hash, a.created_at
+    FROM ranked JOIN artifacts a ON a.id = ranked.id
+    WHERE ranked.rn = 1
+    """, (project_id, *types))
+    for row in cursor.fetchall():
+        snapshot[row["type"]] = _artifact_row(conn, row)
+    return snapshot
+
+@_cached_read()
+@retry_on_locked
+def count_artifacts(project_id, type):
+    """특정 프로젝트의 특정 타입 산출물 버전 수를 반환합니다. (인덱스만 사용)"""
+    conn = get_connection()
+    row = conn.execute("SELECT COUNT(*) FROM artifacts WHERE project_id = ? AND type = ?",
+                       (project_id, type)).fetchone()
+    return row[0]
+
+@_cached_read()
+@retry_on_locked
+def get_artifact_history(project_id, type, limit=HISTORY_PAGE_SIZE, cursor=None):
+    """
+    본문 없이 id, created_at, size만 담은 이력 목록을 최신순으로 한 페이지 불러옵니다.
+    cursor는 직전 페이지가 반환한 next_cursor((created_at, id))이며, None이면 첫 페이지입니다.
+    (items, next_cursor)를 반환하고, 더 이상 페이지가 없으면 next_cursor는 None입니다.
+    """
+    query = """
+    SELECT id, created_at, content_size AS size FROM artifacts
+    WHERE project_id = ? AND type = ?
+    """
+    params = [project_id, type]
+    if cursor is not None:
+        query += " AND (created_at, id) < (?, ?)"
+        params.extend(cursor)
+    query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_connection()
+    rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+    items = rows[:limit]
+    next_cursor = (items[-1]["created_at"], items[-1]["id"]) if len(rows) > limit else None
+    return items, next_cursor
+
+@_cached_read(project_scoped=False)
+@retry_on_locked
+def get_artifact_content(artifact_id):
+    """산출물 하나의 본문을 불러옵니다. 이력 expander가 열렸을 때만 호출됩니다."""
+    conn = get_connection()
+    row = conn.execute("SELECT content, content_hash FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+    return _artifact_row(conn, row)["content"] if row else None
+
+# --- 프로젝트 내보내기 / 가져오기 ---
+# 아카이브는 JSON Lines 레코드의 나열입니다: header 1개, 그 뒤로 project 레코드와 해당 프로젝트의 artifact 레코드.
+# .tar.gz는 같은 레코드를 EXPORT_TAR_MEMBER_RECORDS개씩 part-NNNNN.jsonl 멤버로 나누어 담습니다.
+# 양방향 모두 커서/스트림 단위로 처리하므로 메모리 사용량은 아카이브 크기와 무관합니다.
+
+def _is_tar_path(path):
+    return str(path).endswith((".tar.gz", ".tgz"))
+
+def _iter_export_records(conn, project_ids=None):
+    yield {"record": "header", "format": "mcp-export", "version": EXPORT_FORMAT_VERSION,
+           "exported_at": datetime.now().isoformat()}
+    query = "SELECT id, name, description, created_at FROM projects"
+    params = ()
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        query += f" WHERE id IN ({', '.join('?' for _ in project_ids)})"
+        params = project_ids
+    projects = conn.execute(query + " ORDER BY id", params)
+    while True:
+        project_rows = projects.fetchmany(EXPORT_FETCH_SIZE)
+        if not project_rows:
+            break
+        for project in project_rows:
+            yield {"record": "project", **dict(project)}
+            artifacts = conn.execute("""
+            SELECT project_id, stage, type, content, content_hash, created_at FROM artifacts
+            WHERE project_id = ?
+            ORDER BY type, created_at, id
+            """, (project["id"],))
+            while True:
+                rows = artifacts.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {"record": "artifact", **_artifact_row(conn, row)}
+
+def _write_records(path, records):
+    """레코드를 JSONL 또는 tar.gz 아카이브로 씁니다. 쓴 레코드 수를 반환합니다."""
+    count = 0
+    if not _is_tar_path(path):
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    with tarfile.open(path, "w:gz") as tar:
+        def add_member(index, buffer):
+            data = buffer.getvalue()
+            info = tarfile.TarInfo(f"part-{index:05d}.jsonl")
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+
+        buffer, in_buffer, index = io.BytesIO(), 0, 0
+        for record in records:
+            buffer.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            in_buffer += 1
+            count += 1
+            if in_buffer >= EXPORT_TAR_MEMBER_RECORDS:
+                add_member(index, buffer)
+                buffer, in_buffer, index = io.BytesIO(), 0, index + 1
+        if in_buffer:
+            add_member(index, buffer)
+    return count
+
+def _read_records(path):
+    """JSONL 또는 tar.gz 아카이브의 레코드를 하나씩 돌려줍니다."""
+    if not _is_tar_path(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with tarfile.open(path, "r|gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            with tar.extractfile(member) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line.decode("utf-8"))
+
+def export_projects(path, project_ids=None):
+    """
+    프로젝트(기본값: 전체)와 모든 산출물 버전을 아카이브 파일로 내보냅니다.
+    확장자가 .tar.gz/.tgz이면 tar.gz, 그 외에는 JSONL로 씁니다. 쓴 레코드 수를 반환합니다.
+    하나의 읽기 트랜잭션 안에서 내보내므로 내보내는 동안의 저장과 섞이지 않습니다.
+    """
+    conn = get_connection()
+    conn.execute("BEGIN")
+    try:
+        return _write_records(path, _iter_export_records(conn, project_ids))
+    finally:
+        conn.execute("COMMIT")
+
+def _unique_project_name(conn, name):
+    candidate, n = name, 1
+    while conn.execute("SELECT 1 FROM projects WHERE name = ?", (candidate,)).fetchone():
+        n += 1
+        candidate = f"{name} ({n})"
+    return candidate
+
+def _flush_import_batch(conn, blobs, artifacts):
+    conn.executemany("INSERT OR IGNORE INTO artifact_blobs (hash, base_hash, depth, data) VALUES (?, NULL, 0, ?)", blobs)
+    conn.executemany("""
+    INSERT INTO artifacts (project_id, stage, type, content_hash, content_size, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """, artifacts)
+    blobs.clear()
+    artifacts.clear()
+
+@retry_on_locked
+def import_projects(path):
+    """
+    export_projects로 만든 아카이브를 한 트랜잭션으로 가져옵니다.
+    프로젝트에는 새 id가 부여되고(project_id 재매핑), 이름이 겹치면 "이름 (2)"처럼 바꿔 저장합니다.
+    산출물은 IMPORT_BATCH_SIZE개씩 executemany로 넣으며, 본문은 중복 제거된 압축 스냅샷으로 저장됩니다.
+    {"projects": 가져온 프로젝트 수, "artifacts": 가져온 산출물 수}를 반환합니다.
+    """
+    id_map = {}
+    counts = {"projects": 0, "artifacts": 0}
+    blobs, artifacts = [], []
+    with transaction() as conn:
+        for record in _read_records(path):
+            kind = record.get("record")
+            if kind == "header":
+                if record.get("format") != "mcp-export" or record.get("version", 0) > EXPORT_FORMAT_VERSION:
+                    raise ValueError(f"지원하지 않는 아카이브 형식입니다: {record.get('format')} v{record.get('version')}")
+            elif kind == "project":
+                cursor = conn.execute("INSERT INTO projects (name, description, created_at) VALUES (?, ?, ?)",
+                                      (_unique_project_name(conn, record["name"]), record.get("description"),
+                                       record["created_at"]))
+                id_map[record["id"]] = cursor.lastrowid
+                counts["projects"] += 1
+            elif kind == "artifact":
+                content = record.get("content")
+                content_hash, size = None, 0
+                if content is not None:
+                    raw = content.encode("utf-8")
+                    content_hash, size = hashlib.sha256(raw).hexdigest(), len(raw)
+                    blobs.append((content_hash, zlib.compress(raw, COMPRESSION_LEVEL)))
+                artifacts.append((id_map[record["project_id"]], record["stage"], record["type"],
+                                  content_hash, size, record["created_at"]))
+                counts["artifacts"] += 1
+                if len(artifacts) >= IMPORT_BATCH_SIZE:
+                    _flush_import_batch(conn, blobs, artifacts)
+        _flush_import_batch(conn, blobs, artifacts)
+    _invalidate_reads(list(id_map.values()))
+    return counts
+
+# --- 전문 검색 ---
+
+def _fts_phrase(term):
+    """검색어를 FTS5 구문으로 감싸 연산자(AND, *, - 등)로 해석되지 않도록 합니다."""
+    return '"' + term.replace('"', '""') + '"'
+
+def _split_search_terms(terms):
+    """
+    검색어를 (검색 인덱스로 찾을 단어, 인덱스로 찾을 수 없는 짧은 단어)로 나눕니다.
+    trigram 인덱스는 3글자 미만 단어와 일치할 수 없으므로, 짧은 단어는 본문에서 직접(instr) 찾습니다.
+    """
+    min_len = 3 if FTS_TOKENIZER == "trigram" else 1
+    return [t for t in terms if len(t) >= min_len], [t for t in terms if len(t) < min_len]
+
+def unindexed_search_terms(query):
+    """검색 인덱스를 쓰지 못하고 본문을 훑어 찾는 짧은 검색어 목록. (검색 화면 안내용)"""
+    return _split_search_terms(query.split())[1]
+
+def _fts_query(terms, operator="AND"):
+    """단어 목록을 FTS5 질의로 바꿉니다. 각 단어를 구문으로 감싸 operator(AND/OR)로 묶습니다."""
+    return f" {operator} ".join(_fts_phrase(t) for t in terms)
+
+def _substring_filter(terms, operator="AND", column="t.content"):
+    """짧은 검색어용 조건. 대소문자는 trigram 토크나이저처럼 구분하지 않습니다. 반환값: (SQL 조건, 파라미터)"""
+    return f" {operator} ".join(f"instr(lower({column}), lower(?)) > 0" for _ in terms), list(terms)
+
+def _substring_snippet(content, terms):
+    """인덱스 없이 찾은 결과의 snippet. 첫 번째 일치 위치 주변을 잘라 검색어를 **굵게** 표시합니다."""
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    match = pattern.search(content)
+    if match is None:
+        return ""
+    start = max(0, match.start() - SEARCH_SNIPPET_TOKENS // 2)
+    end = min(len(content), start + SEARCH_SNIPPET_TOKENS)
+    snippet = pattern.sub(lambda m: f"**{m.group(0)}**", content[start:end])
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(content) else "")
+
+@retry_on_locked
+def search_artifacts(query, type=None, project_id=None, limit=50):
+    """
+    모든 산출물 본문을 전문 검색합니다. 관련도(bm25) 순으로 정렬하며,
+    각 결과에는 검색어가 **굵게** 강조된 snippet이 포함됩니다.
+    type, project_id로 범위를 좁힐 수 있습니다. 공백으로 나눈 단어는 모두 포함되어야 합니다(AND).
+    trigram 인덱스로 찾을 수 없는 3글자 미만 단어는 버리지 않고 본문에서 직접 찾으며,
+    짧은 단어만 있으면 인덱스 없이 훑어 최신순으로 돌려줍니다. (unindexed_search_terms로 안내)
+    """
+    indexed, short = _split_search_terms(query.split())
+    if not indexed and not short:
+        return []
+    if indexed:
+        sql = f"""
+        SELECT a.id, a.project_id, p.name AS project_name, a.stage, a.type, a.created_at,
+               snippet(artifacts_fts, 0, '**', '**', '…', {SEARCH_SNIPPET_TOKENS}) AS snippet,
+               artifacts_fts.rank AS rank
+        FROM artifacts_fts
+        JOIN artifacts a ON a.id = artifacts_fts.rowid
+        JOIN projects p ON p.id = a.project_id
+        """
+        conditions, params = ["artifacts_fts MATCH ?"], [_fts_query(indexed)]
+        order = "artifacts_fts.rank"
+    else:
+        sql = """
+        SELECT a.id, a.project_id, p.name AS project_name, a.stage, a.type, a.created_at,
+               t.content AS snippet, NULL AS rank
+        FROM artifacts a
+        JOIN projects p ON p.id = a.project_id
+        """
+        conditions, params = [], []
+        order = "a.created_at DESC, a.id DESC"
+    if short:
+        sql += " JOIN artifact_texts t ON t.id = a.id"
+        condition, short_params = _substring_filter(short)
+        conditions.append(condition)
+        params.extend(short_params)
+    if type is not None:
+        conditions.append("a.type = ?")
+        params.append(type)
+    if project_id is not None:
+        conditions.append("a.project_id = ?")
+        params.append(project_id)
+    sql += " WHERE " + " AND ".join(conditions) + f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+    conn = get_connection()
+    results = [dict(row) for row in conn.execute(sql, params).fetchall()]
+    if not indexed:
+        for result in results:
+            result["snippet"] = _substring_snippet(result["snippet"], short)
+    return results
+
+@retry_on_locked
+def artifact_contains_any(artifact_id, terms):
+    """산출물 본문에 terms 중 하나라도 포함되어 있는지 검색 인덱스로 확인합니다. (3글자 미만 단어는 본문에서 직접 확인)"""
+    conn = get_connection()
+    indexed, short = _split_search_terms(terms)
+    if indexed and conn.execute("SELECT 1 FROM artifacts_fts WHERE artifacts_fts MATCH ? AND rowid = ?",
+                                (_fts_query(indexed, "OR"), artifact_id)).fetchone() is not None:
+        return True
+    if short:
+        condition, params = _substring_filter(short, "OR", "content")
+        return conn.execute(f"SELECT 1 FROM artifact_texts WHERE id = ? AND ({condition})",
+                            [artifact_id] + params).fetchone() is not None
+    return False
+
+# --- 문서 요약 캐시 ---
+# 본문 해시는 blob 저장소와 같으므로, 저장된 산출물 버전 하나당 요약이 한 번만 만들어집니다.
+
+@retry_on_locked
+def get_content_summary(content, token_budget):
+    """본문에 대해 저장된 요약을 반환합니다. 없으면 None."""
+    row = get_connection().execute(
+        "SELECT summary FROM artifact_summaries WHERE content_hash = ? AND token_budget = ?",
+        (_content_hash(content), token_budget),
+    ).fetchone()
+    return row["summary"] if row else None
+
+@retry_on_locked
+def save_content_summary(content, token_budget, summary):
+    """본문의 요약을 저장합니다. (같은 키가 있으면 덮어씀)"""
+    with transaction() as conn:
+        conn.execute("""
+        INSERT OR REPLACE INTO artifact_summaries (content_hash, token_budget, summary, created_at)
+        VALUES (?, ?, ?, ?)
+        """, (_content_hash(content), token_budget, summary, datetime.now().isoformat()))
+
+# --- 그룹 커밋 쓰기 큐 ---
+# 여러 호출자의 save_artifact 요청을 모아 하나의 트랜잭션(커밋 1회)으로 기록합니다.
+# 배치는 WRITE_QUEUE_MAX_BATCH건이 모이거나 첫 요청 후 WRITE_QUEUE_MAX_DELAY_MS가 지나면 기록되며,
+# 각 호출자는 자신의 행이 커밋된 뒤 artifact id로 완료되는 Future를 받습니다.
+
+class ArtifactWriteQueue:
+    """save_artifact 요청을 배치로 묶어 기록하는 write-behind 큐."""
+
+    def __init__(self, max_batch=WRITE_QUEUE_MAX_BATCH, max_delay_ms=WRITE_QUEUE_MAX_DELAY_MS, db_path=None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.db_path = db_path
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="mcp-write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, project_id, stage, type, content):
+        """저장 요청을 큐에 넣고, 커밋되면 artifact id로 완료되는 Future를 반환합니다."""
+        if self._closed:
+            raise RuntimeError("닫힌 쓰기 큐에는 저장 요청을 넣을 수 없습니다.")
+        future = Future()
+        self._queue.put((future, (project_id, stage, type, content, datetime.now().isoformat())))
+        return future
+
+    def close(self):
+        """남은 요청을 모두 기록한 뒤 기록 스레드를 종료합니다."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # 종료 신호는 현재 배치를 기록한 뒤 처리
+                break
+            batch.append(item)
+        return batch
+
+    @retry_on_locked
+    def _write_batch(self, batch):
+        with transaction(self.db_path) as conn:
+            ids = [_insert_artifact(conn, *args) for _, args in batch]
+        _invalidate_reads({args[0] for _, args in batch}, self.db_path)
+        return ids
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = self._collect_batch(item)
+            try:
+                ids = self._write_batch(batch)
+            except Exception:
+                # 배치 중 한 건의 오류(예: 없는 project_id)가 다른 요청을 실패시키지 않도록 한 건씩 다시 기록
+                for future, args in batch:
+                    try:
+                        future.set_result(self._write_batch([(future, args)])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+            else:
+                for (future, _), artifact_id in zip(batch, ids):
+                    future.set_result(artifact_id)
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue():
+    """프로세스 전역 쓰기 큐를 반환합니다. (최초 호출 시 생성)"""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = ArtifactWriteQueue()
+        return _write_queue
+
+def enqueue_artifact(project_id, stage, type, content):
+    """
+    save_artifact의 그룹 커밋 버전. 즉시 Future를 반환하며, future.result()는 커밋된 뒤 artifact id를 돌려줍니다.
+    동시에 많은 저장이 몰리는 배치 작업에서 커밋(fsync) 횟수를 줄이기 위해 사용합니다.
+    """
+    return get_write_queue().submit(project_id, stage, type, content)
+
+def close_write_queue():
+    """전역 쓰기 큐의 남은 요청을 기록하고 종료합니다."""
+    global _write_queue
+    with _write_queue_lock:
+        write_queue, _write_queue = _write_queue, None
+    if write_queue is not None:
+        write_queue.close()
+
+# --- 보존 정책 및 아카이브 ---
+# 정리된 버전은 ARCHIVE_PATH에 gzip 멤버 단위로 덧붙여(append-only) 저장됩니다.
+# 레코드 형식은 내보내기의 artifact 레코드에 원래 id와 archived_at을 더한 것입니다.
+
+def _retention_policy(type, policies):
+    if type in policies:
+        return policies[type]
+    return DEFAULT_RETENTION
+
+def _select_prunable(conn, project_id, type, policy):
+    return conn.execute("""
+    WITH ranked AS (
+        SELECT id,
+               ROW_NUMBER() OVER (ORDER BY created_at DESC, id DESC) AS rn,
+               ROW_NUMBER() OVER (PARTITION BY substr(created_at, 1, 7)
+                                  ORDER BY created_at DESC, id DESC) AS month_rn
+        FROM artifacts WHERE project_id = ? AND type = ?
+    )
+    SELECT a.id, a.project_id, p.name AS project_name, a.stage, a.type,
+           a.content, a.content_hash, a.created_at
+    FROM ranked
+    JOIN artifacts a ON a.id = ranked.id
+    JOIN projects p ON p.id = a.project_id
+    WHERE ranked.rn > ? AND (? = 0 OR ranked.month_rn > 1)
+    ORDER BY a.created_at, a.id
+    """, (project_id, type, policy["keep_last"], 1 if policy.get("keep_monthly") else 0)).fetchall()
+
+def _append_to_archive(records):
+    """레코드를 아카이브 파일 끝에 새 gzip 멤버로 덧붙이고 디스크에 기록합니다."""
+    archive_dir = os.path.dirname(ARCHIVE_PATH)
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+    with open(ARCHIVE_PATH, "ab") as f:
+        with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+            for record in records:
+                gz.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+@retry_on_locked
+def apply_retention(project_id=None, policies=None):
+    """
+    보존 정책을 적용해 정책 밖의 오래된 버전을 아카이브 파일로 옮기고 DB에서 삭제합니다.
+    project_summary의 버전 수로 대상 (프로젝트, 타입)을 먼저 거르므로 정리할 것이 없으면 거의 비용이 없습니다.
+    아카이브로 옮긴 버전 수를 반환합니다.
+    """
+    policies = RETENTION_POLICIES if policies is None else policies
+    archived = 0
+    deleted_hashes = set()
+    with transaction() as conn:
+        query = "SELECT project_id, type, version_count FROM project_summary"
+        params = ()
+        if project_id is not None:
+            query += " WHERE project_id = ?"
+            params = (project_id,)
+        candidates = []
+        for row in conn.execute(query, params).fetchall():
+            policy = _retention_policy(row["type"], policies)
+            if policy is not None and row["version_count"] > policy["keep_last"]:
+                candidates.append((row["project_id"], row["type"], policy))
+        now = datetime.now().isoformat()
+        for candidate_project, type, policy in candidates:
+            rows = _select_prunable(conn, candidate_project, type, policy)
+            if not rows:
+                continue
+            # 아카이브에 먼저 기록한 뒤 삭제 (커밋 실패 시 중복 기록은 read_archived_artifacts가 걸러냄)
+            _append_to_archive({"record": "artifact", **_artifact_row(conn, row), "archived_at": now} for row in rows)
+            conn.executemany("DELETE FROM artifacts WHERE id = ?", [(row["id"],) for row in rows])
+            deleted_hashes.update(row["content_hash"] for row in rows)
+            archived += len(rows)
+        if archived:
+            _collect_garbage_blobs(conn, deleted_hashes)
+    if archived:
+        _invalidate_reads(None)
+    return archived
+
+def read_archived_artifacts(project_id=None, type=None):
+    """아카이브 파일에서 정리된 버전을 필요할 때 읽어옵니다. (오래된 것부터, 조건에 맞는 레코드만)"""
+    if not os.path.exists(ARCHIVE_PATH):
+        return
+    seen = set()
+    with gzip.open(ARCHIVE_PATH, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if project_id is not None and record["project_id"] != project_id:
+                continue
+            if type is not None and record["type"] != type:
+                continue
+            if record["id"] in seen:
+                continue
+            seen.add(record["id"])
+            yield record
+
+# --- 공간 회수 및 백그라운드 유지보수 ---
+
+@retry_on_locked
+def incremental_vacuum(max_pages=VACUUM_STEP_PAGES):
+    """빈 페이지가 충분히 쌓였을 때 최대 max_pages개를 파일에서 회수합니다. 회수한 페이지 수를 반환합니다."""
+    conn = get_connection()
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if free_pages < VACUUM_MIN_FREE_PAGES:
+        return 0
+    # execute()는 한 단계만 실행해 한 페이지만 회수하므로, 끝까지 실행되는 executescript를 사용
+    conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    return free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+def enable_incremental_vacuum():
+    """
+    auto_vacuum=INCREMENTAL이 아닌 기존 DB를 전환합니다. 설정 반영에 전체 VACUUM이 필요해 DB 크기에 비례해 오래 걸리고
+    그동안 쓰기가 대기하므로, 페이지 로딩이 아니라 유지보수 스레드(또는 사용량이 적은 시간에 직접 호출)에서 한 번 실행합니다.
+    전환했으면 True.
+    """
+    conn = get_connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+_maintenance_thread = None
+_maintenance_lock = threading.Lock()
+
+def _run_maintenance_task(name, task):
+    """유지보수 작업 하나를 실행합니다. 어떤 예외든 기록만 하고 삼켜서, 한 번의 실패로 유지보수 스레드가 끝나지 않게 합니다."""
+    try:
+        task()
+        return True
+    except Exception as e:
+        # sqlite3.Error 외에도 아카이브 쓰기의 OSError(디스크 가득 참, 권한, 잘못된 ARCHIVE_PATH) 등
+        print(f"DB 유지보수 오류 ({name}): {type(e).__name__}: {e}")
+        return False
+
+def _maintenance_loop():
+    last_retention = None
+    last_conversion = None   # auto_vacuum 전환을 시도한 시각 (성공하면 더 시도하지 않음)
+    converted = False
+    while True:
+        # 첫 작업도 한 주기 뒤에 시작해 앱 시작 직후의 페이지 로딩과 겹치지 않게 함
+        time.sleep(MAINTENANCE_INTERVAL_SECONDS)
+        # 실패한 무거운 작업(전체 VACUUM, 보존 정책)은 매 주기가 아니라 RETENTION_INTERVAL_SECONDS마다 다시 시도
+        if not converted and (last_conversion is None or time.monotonic() - last_conversion >= RETENTION_INTERVAL_SECONDS):
+            last_conversion = time.monotonic()
+            converted = _run_maintenance_task("auto_vacuum 전환", enable_incremental_vacuum)
+        if RETENTION_ENABLED and (last_retention is None or time.monotonic() - last_retention >= RETENTION_INTERVAL_SECONDS):
+            last_retention = time.monotonic()
+            _run_maintenance_task("보존 정책", apply_retention)
+        _run_maintenance_task("incremental vacuum", incremental_vacuum)
+
+def start_maintenance():
+    """
+    공간 회수(기존 DB의 auto_vacuum 전환, incremental vacuum)와, RETENTION_ENABLED이면 보존 정책 적용을
+    주기적으로 수행하는 백그라운드 스레드를 (프로세스당 한 번) 시작합니다.
+    """
+    global _maintenance_thread
+    with _maintenance_lock:
+        if _maintenance_thread is None:
+            _maintenance_thread = threading.Thread(target=_maintenance_loop, name="mcp-db-maintenance", daemon=True)
+            _maintenance_thread.start()
@@ -0,0 +1,101 @@
+# prompt_budget.py (토큰 예산 기반 프롬프트 조립)
+#
+# 프롬프트에 붙여 넣는 문서(문제정의서, 모델 설계서 등)가 예산을 넘으면 조각으로 나눠 요약(map)하고
+# 요약들을 이어 붙여(reduce) 예산 안에 들 때까지 반복합니다. 요약 결과는 (본문 해시, 예산)을 키로
+# DB에 저장되므로 같은 산출물 버전은 한 번만 요약되고, 그 버전을 쓰는 모든 생성기가 재사용합니다.
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from persistence import get_content_summary, save_content_summary
+
+CHARS_PER_TOKEN = 2               # 토큰 수 추정치 (한국어 기준 보수적으로, API 호출 없이 계산)
+DOCUMENT_TOKEN_BUDGET = 6000      # 프롬프트에 넣는 문서 하나의 최대 토큰 수
+PROMPT_TOKEN_BUDGET = 16000       # 프롬프트 전체의 최대 토큰 수
+CHUNK_TOKENS = 3000               # map 단계에서 한 번에 요약하는 조각 크기
+MIN_SUMMARY_TOKENS = 200          # 조각 하나의 요약 목표 최솟값
+MAX_REDUCE_ROUNDS = 3             # 요약을 다시 요약하는 최대 횟수 (이후에는 잘라냄)
+SUMMARY_MAX_WORKERS = 4           # map 단계 동시 요약 수
+TRUNCATION_MARKER = "\n\n(… 토큰 예산 초과로 이하 생략 …)"
+
+def count_tokens(text: str) -> int:
+    """텍스트의 토큰 수를 추정합니다."""
+    return -(-len(text) // CHARS_PER_TOKEN) if text else 0
+
+def truncate_to_budget(text: str, token_budget: int) -> str:
+    """예산을 넘는 텍스트를 앞부분만 남기고 자릅니다. (요약할 수 없을 때의 최후 수단)"""
+    if count_tokens(text) <= token_budget:
+        return text
+    keep_chars = max(0, token_budget * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    return text[:keep_chars] + TRUNCATION_MARKER
+
+def split_into_chunks(text: str, max_tokens: int) -> list:
+    """빈 줄(문단) 경계를 우선해 max_tokens 이하의 조각으로 나눕니다. 너무 긴 문단은 글자 수로 자릅니다."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks, current = [], ""
+    for paragraph in text.split("\n\n"):
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+def condense(text: str, token_budget: int, summarize, chunk_tokens: int = CHUNK_TOKENS) -> str:
+    """
+    map-reduce 요약으로 text를 token_budget 이하로 줄입니다.
+    summarize(chunk, target_tokens)는 조각 하나의 요약문을 돌려주는 함수이며, 조각들은 동시에 요약됩니다.
+    """
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if count_tokens(text) <= token_budget:
+            return text
+        chunks = split_into_chunks(text, chunk_tokens)
+        target = max(MIN_SUMMARY_TOKENS, token_budget // len(chunks))
+        with ThreadPoolExecutor(max_workers=min(SUMMARY_MAX_WORKERS, len(chunks)), thread_name_prefix="summarize") as pool:
+            # 호출 맥락(contextvars: 호출 기록용 함수/프로젝트)을 작업 스레드로 넘김.
+            # 복사는 호출한 스레드에서 해야 하고, 한 Context는 동시에 한 스레드만 들어갈 수 있으므로 조각마다 복사
+            contexts = [contextvars.copy_context() for _ in chunks]
+            summaries = list(pool.map(lambda ctx, chunk: ctx.run(summarize, chunk, target), contexts, chunks))
+        text = "\n\n".join(summaries)
+    return truncate_to_budget(text, token_budget)
+
+def fit_document(text: str, summarize, token_budget: int = DOCUMENT_TOKEN_BUDGET) -> str:
+    """
+    문서가 예산 안이면 그대로, 넘으면 요약본을 돌려줍니다. 요약본은 산출물 버전(본문 해시)별로 캐시됩니다.
+    요약 호출이 실패하면 앞부분만 남겨 잘라내고, 그 결과는 캐시하지 않습니다.
+    """
+    if count_tokens(text) <= token_budget:
+        return text
+    summary = get_content_summary(text, token_budget)
+    if summary is not None:
+        return summary
+    try:
+        summary = condense(text, token_budget, summarize)
+    except Exception as e:
+        print(f"문서 요약 실패, 잘라서 사용합니다: {e}")
+        return truncate_to_budget(text, token_budget)
+    save_content_summary(text, token_budget, summary)
+    return summary
+
+def build_prompt(render, documents: dict, summarize, document_budget: int = DOCUMENT_TOKEN_BUDGET,
+                 prompt_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """
+    render(**documents)로 프롬프트를 만들되, 각 문서는 document_budget 안으로 요약해 넣습니다.
+    문서가 여러 개라 전체가 prompt_budget을 넘으면 고정 문구를 뺀 나머지 예산을 문서들에 똑같이 나눠 자릅니다.
+    """
+    fitted = {name: fit_document(text, summarize, document_budget) for name, text in documents.items()}
+    prompt = render(**fitted)
+    if count_tokens(prompt) <= prompt_budget:
+        return prompt
+    fixed_tokens = count_tokens(render(**{name: "" for name in documents}))
+    share = max(0, (prompt_budget - fixed_tokens) // max(1, len(documents)))
+    return render(**{name: truncate_to_budget(text, share) for name, text in fitted.items()})